@@ -0,0 +1,69 @@
+# ==========================================
+# Script Name: bench_binary_codec.py
+# Description:
+#   [EN] Size and parse-time comparison of the binary encoding (binary_codec.py)
+#        against the current compact JSON, for the v2 data and a synthetic
+#        50k-course catalogue.
+#   [JP] バイナリ形式と現在の JSON のサイズ・パース時間を比較します
+#        (v2 データと 5万件の合成カタログ)。
+#
+# Data Flow:
+#   Input  : ../v2/syllabus_vectors.json, ../v2/recommendations.json
+#   Output : (Console Output / コンソール出力)
+# ==========================================
+
+import json
+import os
+import sys
+import time
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+v2_dir = os.path.join(base_dir, "../v2")
+sys.path.append(v2_dir)
+
+import synthetic
+from binary_codec import encode_vectors, encode_recommendations, decode_csr
+
+REPEAT = 5
+
+
+def best_time(fn, *args):
+    best = float("inf")
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def compare(label, obj, encoder):
+    text = json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode("utf-8")
+    blob = encoder(obj)
+    json_ms = best_time(json.loads, text) * 1000
+    bin_ms = best_time(decode_csr, blob) * 1000
+    print(f"{label:<28}{len(text):>12,}{len(blob):>12,}{len(blob) / len(text):>8.1%}"
+          f"{json_ms:>10.1f}{bin_ms:>10.1f}")
+
+
+def main():
+    with open(os.path.join(v2_dir, "syllabus_vectors.json"), "r", encoding="utf-8") as f:
+        vector_data = json.load(f)
+    with open(os.path.join(v2_dir, "recommendations.json"), "r", encoding="utf-8") as f:
+        recommendations = json.load(f)
+
+    n_synthetic = 50000
+    synthetic_vectors = synthetic.vector_data(n_synthetic)
+    synthetic_recs = synthetic.recommendations(n_synthetic)
+
+    vectors_only = lambda data: {k: data[k] for k in ("v", "d", "i")}
+
+    print(f"{'Artifact':<28}{'JSON bytes':>12}{'Bin bytes':>12}{'Ratio':>8}{'JSON ms':>10}{'Bin ms':>10}")
+    compare("v2 recommendations", recommendations, encode_recommendations)
+    compare("v2 vectors (v/d/i)", vectors_only(vector_data), encode_vectors)
+    compare(f"synthetic {n_synthetic} recs", synthetic_recs, encode_recommendations)
+    compare(f"synthetic {n_synthetic} vectors", vectors_only(synthetic_vectors), encode_vectors)
+    print("\n(Bin ms = decode_csr: typed-array views + delta decoding, same work as binary_codec.js)")
+
+
+if __name__ == "__main__":
+    main()
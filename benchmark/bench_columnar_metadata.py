@@ -0,0 +1,121 @@
+# ==========================================
+# Script Name: bench_columnar_metadata.py
+# Description:
+#   [EN] course_metadata.json (dict of per-course dicts) vs the columnar
+#        course_columns.json (columnar_metadata.py) on a synthetic 50k-course
+#        catalogue: file size, load time, memory held after loading (and peak
+#        while loading, via tracemalloc), and latency of the filters of
+#        demo002.html (populateFilterDepts / runFilterSearch conditions,
+#        all matches). Checks that both return the same courses.
+#   [JP] course_metadata.json (授業ごとの辞書) と列指向版 course_columns.json の
+#        サイズ・読み込み時間・メモリ使用量・絞り込みの速さを、合成した 5万件で比べます。
+#
+# Data Flow:
+#   Input  : synthetic.py
+#   Output : (Console Output / コンソール出力)
+# ==========================================
+
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(base_dir, "../v2"))
+
+import synthetic
+from columnar_metadata import ColumnarMetadata, write_columns
+
+N_COURSES = 50_000
+REPEAT = 5
+
+
+def best_time(fn):
+    best, result = float("inf"), None
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def load_dict(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def measure_load(loader, path):
+    """(読み込み後に残るメモリ MB, 読み込み中の最大 MB, 読み込んだもの)"""
+    gc.collect()
+    tracemalloc.start()
+    obj = loader(path)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current / 1e6, peak / 1e6, obj
+
+
+def dict_filter(data, d=None, a=None, f=None, t=None, w=None, kw=None):
+    """demo002.html の runFilterSearch と同じ走査 (件数の上限なし)"""
+    matches = []
+    for row, c in enumerate(data.values()):
+        if d and c["d"] != d: continue
+        if a and c["a"] != a: continue
+        if f and c["f"] != f: continue
+        if t and t not in c["t"]: continue
+        if w and w not in c["w"]: continue
+        if kw and kw.lower() not in (c["n"] + c["i"]).lower(): continue
+        matches.append(row)
+    return matches
+
+
+def main():
+    ids = synthetic.course_ids(N_COURSES)
+    metadata = synthetic.metadata(N_COURSES)
+    with tempfile.TemporaryDirectory() as tmp:
+        dict_path = os.path.join(tmp, "course_metadata.json")
+        columns_path = os.path.join(tmp, "course_columns.json")
+        with open(dict_path, "w", encoding="utf-8") as f:
+            json.dump(metadata, f, ensure_ascii=False, separators=(',', ':'))
+        write_columns(columns_path, ids, metadata)
+        del metadata
+
+        dict_held, dict_peak, data = measure_load(load_dict, dict_path)
+        cols_held, cols_peak, cols = measure_load(ColumnarMetadata.load, columns_path)
+        dict_load, _ = best_time(lambda: load_dict(dict_path))
+        cols_load, _ = best_time(lambda: ColumnarMetadata.load(columns_path))
+
+        print(f"{N_COURSES:,} courses\n")
+        print(f"{'Layout':<16}{'File MB':>9}{'Load ms':>9}{'Held MB':>9}{'Peak MB':>9}")
+        for name, path, load_s, held, peak in (("dict of dicts", dict_path, dict_load, dict_held, dict_peak),
+                                               ("columnar", columns_path, cols_load, cols_held, cols_peak)):
+            print(f"{name:<16}{os.path.getsize(path) / 1e6:>9.1f}{load_s * 1e3:>9.0f}{held:>9.1f}{peak:>9.1f}")
+
+        cases = [
+            ("dept list", lambda: sorted({c["d"] for c in data.values() if c["d"]}),
+             lambda: [v for v in cols.values("d") if v]),
+            ("dept", dict(d="総合科学部")),
+            ("area + field", dict(a="人間探究領域", f="人間文化")),
+            ("term contains", dict(t="前期")),
+            ("dept + day", dict(d="文学部", w="月")),
+            ("dept + term + kw", dict(d="総合科学部", t="前期", kw="授業1")),
+            ("kw only", dict(kw="教員 12")),
+        ]
+        print(f"\n{'Filter':<20}{'Hits':>8}{'Dict ms':>10}{'Columnar ms':>13}{'Speedup':>9}{'Same':>6}")
+        for case in cases:
+            if len(case) == 3:
+                name, dict_fn, cols_fn = case
+            else:
+                name, conditions = case
+                dict_fn = lambda c=conditions: dict_filter(data, **c)
+                cols_fn = lambda c=conditions: cols.filter(**c).tolist()
+            dict_s, dict_result = best_time(dict_fn)
+            cols_s, cols_result = best_time(cols_fn)
+            print(f"{name:<20}{len(dict_result):>8,}{dict_s * 1e3:>10.2f}{cols_s * 1e3:>13.2f}"
+                  f"{dict_s / cols_s:>8.1f}x{str(dict_result == cols_result):>6}")
+
+
+if __name__ == "__main__":
+    main()
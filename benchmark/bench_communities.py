@@ -0,0 +1,88 @@
+# ==========================================
+# Script Name: bench_communities.py
+# Description:
+#   [EN] Scaling of the community-detection stage (communities.py): kNN graph
+#        construction and Louvain time vs number of edges, at 478 (real),
+#        10k and 50k (synthetic) courses. For the real data also reports
+#        modularity and agreement (NMI) with the manual 分野 labels and with
+#        spherical k-means. Above neighbors.EXACT_LIMIT the kNN lists come
+#        from the IVF approximation; its time and recall@10 against the exact
+#        brute force are reported at 10k / 50k on uniformly random rows (no
+#        neighbour structure, worst case) and on topical rows.
+#   [JP] コミュニティ検出の処理時間 (辺の数に対する伸び方) と、実データでの
+#        モジュラリティ・手作業の分野ラベルとの一致度 (NMI) を測ります。
+#        近似 kNN (IVF) の速さと、総当たりとの一致率 (recall@10) も測ります。
+#
+# Data Flow:
+#   Input  : ../v2/syllabus_vectors.json / ../v2/course_metadata.json / synthetic.py
+#   Output : (Console Output / コンソール出力)
+# ==========================================
+
+import json
+import os
+import sys
+import time
+from sklearn.metrics import normalized_mutual_info_score
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+v2_dir = os.path.join(base_dir, "../v2")
+sys.path.append(v2_dir)
+
+import synthetic
+from communities import GRAPH_NEIGHBORS, knn_graph, louvain, modularity
+from neighbors import IVF_PROBES, exact_top_k_neighbors, ivf_top_k_neighbors
+from sparse_cluster import SphericalKMeans, to_csr
+
+
+def run_case(name, vector_data):
+    X = to_csr(vector_data)
+    start = time.perf_counter()
+    graph = knn_graph(X)
+    graph_s = time.perf_counter() - start
+    start = time.perf_counter()
+    labels = louvain(graph)
+    louvain_s = time.perf_counter() - start
+    edges = graph.nnz // 2
+    print(f"{name:<16}{X.shape[0]:>8,}{edges:>10,}{graph_s:>10.2f}{louvain_s:>10.2f}"
+          f"{louvain_s / edges * 1e6:>12.2f}{labels.max() + 1:>8}{modularity(graph, labels):>8.3f}")
+    return labels
+
+
+def knn_recall(name, X, k=GRAPH_NEIGHBORS):
+    start = time.perf_counter()
+    exact, _ = exact_top_k_neighbors(X, k)
+    exact_s = time.perf_counter() - start
+    start = time.perf_counter()
+    approx, _ = ivf_top_k_neighbors(X, k)
+    ivf_s = time.perf_counter() - start
+    hits = sum(len(set(a) & set(b)) for a, b in zip(exact.tolist(), approx.tolist()))
+    print(f"{name:<20}{X.shape[0]:>8,}{exact_s:>10.2f}{ivf_s:>8.2f}{hits / exact.size:>10.1%}")
+
+
+def main():
+    with open(os.path.join(v2_dir, "syllabus_vectors.json"), "r", encoding="utf-8") as f:
+        real = json.load(f)
+    with open(os.path.join(v2_dir, "course_metadata.json"), "r", encoding="utf-8") as f:
+        metadata = json.load(f)
+
+    print(f"{'Data':<16}{'Courses':>8}{'Edges':>10}{'kNN s':>10}{'Louvain s':>10}{'us/edge':>12}{'Comms':>8}{'Q':>8}")
+    labels = run_case("real", real)
+    for n in (10_000, 50_000):
+        run_case(f"synthetic_{n // 1000}k", synthetic.vector_data(n, vocab_size=500, nnz=25))
+
+    fields = [metadata.get(cid, {}).get("f", "") for cid in real["i"]]
+    kmeans = SphericalKMeans(n_clusters=labels.max() + 1).fit_predict(to_csr(real))
+    print(f"\nReal data NMI: communities vs 分野 {normalized_mutual_info_score(fields, labels):.3f}, "
+          f"k-means (same k) vs 分野 {normalized_mutual_info_score(fields, kmeans):.3f}, "
+          f"communities vs k-means {normalized_mutual_info_score(labels, kmeans):.3f}")
+
+    print(f"\nkNN lists (k={GRAPH_NEIGHBORS}): exact brute force vs IVF ({IVF_PROBES} probes, sqrt(N) lists)")
+    print(f"{'Data':<20}{'Courses':>8}{'Exact s':>10}{'IVF s':>8}{'Recall':>10}")
+    for n in (10_000, 50_000):
+        for topical in (False, True):
+            name = f"{'topical' if topical else 'random'}_{n // 1000}k"
+            knn_recall(name, to_csr(synthetic.vector_data(n, vocab_size=500, nnz=25, topical=topical)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+# ==========================================
+# Script Name: bench_course_model.py
+# Description:
+#   [EN] Memory of 200k syllabus records held as json.load dicts vs the
+#        Course model (common/course.py: __slots__, interned categorical
+#        fields), with the long text kept in memory or loaded lazily from the
+#        file. The records are copies of the real integrated_arts_courses.json
+#        ones (all fields), with unique names and truncated 概要. Each mode
+#        runs in its own process; reports load time, RSS held after loading,
+#        peak RSS, and the cost of reading 授業の目標・概要等 back (one full
+#        pass in file order, and 1000 random courses).
+#   [JP] 20万件のシラバスを json.load の辞書で持つ場合と、Course モデル
+#        (本文をメモリに持つ / 必要なときにファイルから読む) で持つ場合の
+#        メモリ使用量・読み込み時間・本文を読むコストを比べます。
+#
+# Data Flow:
+#   Input  : ../common_data/integrated_arts_courses.json + synthetic.py
+#   Output : (Console Output / コンソール出力)
+# ==========================================
+
+import gc
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+common_dir = os.path.join(base_dir, "../common")
+sys.path.append(common_dir)
+
+N_COURSES = 200_000
+RANDOM_READS = 1000
+GOAL = "授業の目標・概要等"
+
+
+def rss_mb(field):
+    """/proc/self/status の VmRSS (現在) / VmHWM (最大)"""
+    with open("/proc/self/status", "r") as f:
+        return int(next(line for line in f if line.startswith(field)).split()[1]) / 1024
+
+
+def worker(mode, path):
+    from course import load_courses
+    gc.collect()
+    base = rss_mb("VmRSS")
+    start = time.perf_counter()
+    if mode == "dict (json.load)":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    else:
+        data = load_courses(path, lazy_text=(mode == "Course (lazy text)"))
+    load_s = time.perf_counter() - start
+    gc.collect()
+    held = rss_mb("VmRSS") - base
+
+    start = time.perf_counter()
+    chars = sum(len(info.get(GOAL, "")) for info in data.values())
+    scan_s = time.perf_counter() - start
+    keys = random.Random(0).sample(list(data), RANDOM_READS)
+    start = time.perf_counter()
+    for key in keys:
+        data[key].get(GOAL, "")
+    random_s = time.perf_counter() - start
+    print(json.dumps({"count": len(data), "load_s": load_s, "held_mb": held, "peak_mb": rss_mb("VmHWM") - base,
+                      "scan_s": scan_s, "random_ms": random_s * 1e3, "chars": chars}))
+
+
+def write_file(path):
+    """実データの授業を複製した合成ファイル (1件ずつ書き出す)"""
+    import synthetic
+    with open(os.path.join(base_dir, "../common_data/integrated_arts_courses.json"), "r", encoding="utf-8") as f:
+        source = json.load(f)
+    corpus = synthetic.syllabus(source, N_COURSES)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("{")
+        for k, (cid, info) in enumerate(corpus.items()):
+            f.write(("," if k else "") + json.dumps(cid) + ":" + json.dumps(info, ensure_ascii=False))
+        f.write("}")
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "subject_details.json")
+        write_file(path)
+        print(f"{N_COURSES:,} courses, {os.path.getsize(path) / 1e6:.0f} MB\n")
+        print(f"{'Mode':<22}{'Load s':>8}{'Held MB':>9}{'Peak MB':>9}{'Full pass s':>13}{'1000 random ms':>16}")
+        chars = set()
+        for mode in ("dict (json.load)", "Course (eager text)", "Course (lazy text)"):
+            out = subprocess.run([sys.executable, os.path.abspath(__file__), "--worker", mode, path],
+                                 capture_output=True, text=True, check=True).stdout
+            r = json.loads(out.strip().splitlines()[-1])
+            chars.add((r["count"], r["chars"]))
+            print(f"{mode:<22}{r['load_s']:>8.1f}{r['held_mb']:>9.0f}{r['peak_mb']:>9.0f}"
+                  f"{r['scan_s']:>13.2f}{r['random_ms']:>16.1f}")
+        print(f"\nsame records and text in every mode: {len(chars) == 1}")
+
+
+if __name__ == "__main__":
+    if "--worker" in sys.argv:
+        worker(*sys.argv[2:4])
+    else:
+        main()
@@ -0,0 +1,84 @@
+# ==========================================
+# Script Name: bench_embedding_store.py
+# Description:
+#   [EN] Memory and recall@5 of the int8 embedding store (embedding_store.py)
+#        against exact float32 cosine search, with and without exact
+#        re-ranking of the shortlist, plus per-query latency.
+#        Embeddings come from the HashingEncoder stub (no model download).
+#   [JP] int8 埋め込みストアのメモリ削減量と recall@5 (float32 の厳密検索との一致率)、
+#        検索速度を測ります。
+#
+# Data Flow:
+#   Input  : ../common_data/integrated_arts_courses.json (実データ + 合成で増やしたコーパス)
+#   Output : (Console Output / コンソール出力)
+# ==========================================
+
+import json
+import os
+import sys
+import time
+import numpy as np
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(base_dir, "../v2"))
+
+import synthetic
+from embed_courses import course_text, encode_sorted
+from embedding_store import EmbeddingStore, quantize
+
+N_QUERIES = 200
+TOP_K = 5
+
+
+def exact_top_k(matrix, queries, k):
+    scores = queries @ matrix.T
+    return np.argsort(-scores, axis=1, kind="stable")[:, :k]
+
+
+def run_case(name, corpus, encoder):
+    ids = list(corpus)
+    matrix = encode_sorted(encoder, [course_text(corpus[cid]) for cid in ids])
+    codes, scales = quantize(matrix)
+    store = EmbeddingStore(ids, codes, scales, full=matrix)
+
+    rng = np.random.default_rng(1)
+    query_rows = rng.choice(len(ids), size=min(N_QUERIES, len(ids)), replace=False)
+    # クエリ = 授業ベクトルに少しノイズを加えたもの (自分自身も正解に含める)
+    queries = matrix[query_rows] + rng.normal(0, 0.02, size=(len(query_rows), matrix.shape[1])).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    truth = exact_top_k(matrix, queries, TOP_K)
+
+    print(f"\n[{name}] {len(ids):,} x {matrix.shape[1]}")
+    print(f"  Memory: float32 {matrix.nbytes / 1e6:7.1f} MB -> int8 {store.nbytes / 1e6:7.1f} MB "
+          f"({store.nbytes / matrix.nbytes:.1%})")
+
+    start = time.perf_counter()
+    for q in queries:
+        exact_top_k(matrix, q[None, :], TOP_K)
+    exact_ms = (time.perf_counter() - start) / len(queries) * 1000
+    print(f"  {'Search':<26}{'recall@5':>9}{'ms/query':>10}")
+    print(f"  {'float32 exact':<26}{1.0:>9.1%}{exact_ms:>10.2f}")
+
+    for label, rerank in (("int8", 0), ("int8 + re-rank top 20", 20), ("int8 + re-rank top 50", 50)):
+        start = time.perf_counter()
+        found = [store.search(q, TOP_K, rerank) for q in queries]
+        ms = (time.perf_counter() - start) / len(queries) * 1000
+        hit = sum(len({store.row_of[cid] for cid, _ in hits} & set(t.tolist())) for hits, t in zip(found, truth))
+        print(f"  {label:<26}{hit / truth.size:>9.1%}{ms:>10.2f}")
+
+    start = time.perf_counter()
+    store.search_many(queries, TOP_K)
+    batch_ms = (time.perf_counter() - start) / len(queries) * 1000
+    print(f"  int8 batched ({len(queries)} queries at once): {batch_ms:.3f} ms/query")
+
+
+def main():
+    with open(os.path.join(base_dir, "../common_data/integrated_arts_courses.json"), "r", encoding="utf-8") as f:
+        source = json.load(f)
+    encoder = synthetic.HashingEncoder()
+    run_case("real", source, encoder)
+    run_case("synthetic_50k", synthetic.syllabus(source, 50_000), encoder)
+
+
+if __name__ == "__main__":
+    main()
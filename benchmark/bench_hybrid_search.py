@@ -0,0 +1,154 @@
+# ==========================================
+# Script Name: bench_hybrid_search.py
+# Description:
+#   [EN] Latency and quality of hybrid retrieval (hybrid_search.py) for
+#        interest / career queries like the ones runAiSearch() builds.
+#        Compares lexical only, hybrid (lexical candidates + embedding
+#        re-rank, RRF) and an exhaustive semantic scan. Quality is measured
+#        as overlap with the exhaustive semantic top 10.
+#        Embeddings come from the HashingEncoder stub, so absolute quality
+#        says little about SBERT; the latency numbers hold for any encoder
+#        (query tokenisation / encoding are cached in every row, the search
+#        result cache is cleared before each timed call). The budget rows
+#        use an encoder that sleeps 50 ms per call (like SBERT on a CPU) and
+#        fresh queries, so the encode stage is not cached.
+#   [JP] ハイブリッド検索の速度と、全件の意味検索との一致率を測ります。
+#
+# Data Flow:
+#   Input  : ../v2/syllabus_vectors.json / ../v2/course_metadata.json
+#          : ../common_data/integrated_arts_courses.json (埋め込み用テキスト)
+#   Output : (Console Output / コンソール出力)
+# ==========================================
+
+import json
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+v2_dir = os.path.join(base_dir, "../v2")
+sys.path.append(v2_dir)
+
+import synthetic
+from embed_courses import course_text, encode_sorted
+from embedding_store import EmbeddingStore, quantize
+from hybrid_search import HybridSearch
+from search_service import SyllabusSearch
+
+# runAiSearch() と同じく 興味 + 将来の目標 (+ 分野の強調語) をつなげたクエリ
+QUERIES = [
+    "プログラミング データ分析 エンジニア",
+    "人の気持ちや考えを知りたい 心理カウンセラー",
+    "環境問題 国際協力 NGO",
+    "日本の歴史と文化 学芸員",
+    "社会の仕組み 公務員 Society Economics Law",
+    "生き物の進化 研究者 Math Science Experiment",
+    "英語で議論できるようになりたい 外資系企業",
+    "地域の課題を解決したい まちづくり",
+    "脳と心の科学 医療",
+    "メディアと表現 編集者",
+]
+SLOW_ENCODE_S = 0.05
+
+
+def time_ms(fn, repeat=20, before=None):
+    fn()  # 形態素解析・クエリ埋め込みのキャッシュを温める
+    total = 0.0
+    for _ in range(repeat):
+        if before:
+            before()
+        start = time.perf_counter()
+        result = fn()
+        total += time.perf_counter() - start
+    return total / repeat * 1000, result
+
+
+class SlowEncoder:
+    """1回の encode に delay 秒かかるエンコーダー (SBERT の代わり)"""
+
+    def __init__(self, encoder, delay):
+        self.encoder = encoder
+        self.delay = delay
+
+    def encode(self, texts, **kwargs):
+        time.sleep(self.delay)
+        return self.encoder.encode(texts, **kwargs)
+
+
+def budget_rows(hybrid, queries):
+    """キャッシュされていないクエリで、時間予算ごとの所要時間と飛ばした段"""
+    slow = HybridSearch(hybrid.lexical, hybrid.store, SlowEncoder(hybrid.encoder, SLOW_ENCODE_S))
+    slow.warm_up()
+    for budget in (None, 200.0, 20.0, 0.0):
+        times, skipped = [], set()
+        for k, q in enumerate(queries):
+            hybrid.lexical.result_cache.clear()
+            start = time.perf_counter()
+            slow.search(f"{q} {budget} {k}", top_k=10, budget_ms=budget)
+            times.append((time.perf_counter() - start) * 1000)
+            skipped.add(slow.last_timing.get("skipped"))
+        label = "no budget" if budget is None else f"budget_ms={budget:g}"
+        print(f"  {label:<28}{np.mean(times):>10.2f}  max {max(times):.2f} ms, skipped {sorted(map(str, skipped))}")
+
+
+def run_case(name, hybrid, queries):
+    print(f"\n[{name}] {len(hybrid.store.ids):,} courses, {len(queries)} queries")
+    rows = {"lexical only": [], "hybrid (RRF)": [], "hybrid (semantic re-rank)": [], "semantic full scan": []}
+    overlap = {key: [] for key in rows}
+    for q in queries:
+        qvec = hybrid.embed(q)
+        ms, full = time_ms(lambda: hybrid.store.search(qvec, top_k=10))
+        rows["semantic full scan"].append(ms)
+        truth = {cid for cid, _ in full}
+        for label, kwargs in (("lexical only", {"fusion": "none"}),
+                              ("hybrid (RRF)", {"fusion": "rrf"}),
+                              ("hybrid (semantic re-rank)", {"fusion": "semantic"})):
+            ms, hits = time_ms(lambda: hybrid.search(q, top_k=10, **kwargs), before=hybrid.lexical.result_cache.clear)
+            rows[label].append(ms)
+            overlap[label].append(len({h["id"] for h in hits} & truth) / 10)
+        overlap["semantic full scan"].append(1.0)
+
+    print(f"  {'Retrieval':<28}{'ms/query':>10}{'overlap@10 w/ full scan':>26}")
+    for label in rows:
+        print(f"  {label:<28}{np.mean(rows[label]):>10.2f}{np.mean(overlap[label]):>26.1%}")
+
+    print(f"\n  Encoder taking {SLOW_ENCODE_S * 1000:.0f} ms, uncached queries:")
+    budget_rows(hybrid, queries)
+
+
+def main():
+    encoder = synthetic.HashingEncoder()
+    with open(os.path.join(base_dir, "../common_data/integrated_arts_courses.json"), "r", encoding="utf-8") as f:
+        source = json.load(f)
+
+    # 実データ: 語彙検索は既存の成果物、埋め込みはスタブ
+    lexical = SyllabusSearch(os.path.join(v2_dir, "syllabus_vectors.json"), os.path.join(v2_dir, "course_metadata.json"))
+    ids = [cid for cid, info in source.items() if isinstance(info, dict)]
+    matrix = encode_sorted(encoder, [course_text(source[cid]) for cid in ids])
+    store = EmbeddingStore(ids, *quantize(matrix), full=matrix)
+    run_case("real", HybridSearch(lexical, store, encoder), QUERIES)
+
+    # 50k: 実データの語彙を使った合成の疎ベクトル + ランダムな埋め込み (速度のみ意味がある)
+    vocab = lexical.vocab
+    n = 50_000
+    data = synthetic.vector_data(n, vocab_size=len(vocab), nnz=30)
+    data["v"] = vocab
+    with tempfile.TemporaryDirectory() as workdir:
+        vector_path = os.path.join(workdir, "syllabus_vectors.json")
+        metadata_path = os.path.join(workdir, "course_metadata.json")
+        with open(vector_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        with open(metadata_path, "w", encoding="utf-8") as f:
+            json.dump(synthetic.metadata(n), f, ensure_ascii=False)
+        big_lexical = SyllabusSearch(vector_path, metadata_path)
+        rng = np.random.default_rng(0)
+        big = rng.normal(size=(n, 768)).astype(np.float32)
+        big /= np.linalg.norm(big, axis=1, keepdims=True)
+        big_store = EmbeddingStore(data["i"], *quantize(big), full=big)
+        run_case("synthetic_50k (latency only)", HybridSearch(big_lexical, big_store, encoder), QUERIES)
+
+
+if __name__ == "__main__":
+    main()
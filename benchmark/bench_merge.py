@@ -0,0 +1,139 @@
+# ==========================================
+# Script Name: bench_merge.py
+# Description:
+#   [EN] The old common/merge.py (sequential json.load + extend, no dedupe,
+#        indent=4 dump) vs the new merge engine (parallel shard loading,
+#        latest-crawl-wins dedupe by code, compact JSON / JSONL output), on
+#        100 synthetic scraper shards holding 200k records, 10% of which are
+#        re-crawls of a course already in an earlier shard. Reports wall
+#        time, peak RSS (separate process per run), records written, output
+#        size, and checks that the result does not depend on the shard order
+#        or the number of workers.
+#   [JP] 旧 merge.py (順に読み込んで連結・重複そのまま・indent=4) と新しいマージの
+#        実行時間・メモリ・出力件数・サイズを、合成した 100 ファイル / 20万件
+#        (1割は同じ科目の再取得) で比べます。
+#
+# Data Flow:
+#   Input  : (一時ディレクトリに合成した syllabus_*.json)
+#   Output : (Console Output / コンソール出力)
+# ==========================================
+
+import glob
+import hashlib
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+common_dir = os.path.join(base_dir, "../common")
+sys.path.append(common_dir)
+
+N_SHARDS = 100
+N_RECORDS = 200_000
+RECRAWL_FRACTION = 0.1
+
+
+def peak_rss_mb():
+    """VmHWM (ru_maxrss は fork 元のプロセスの値を引き継いでしまうため)"""
+    with open("/proc/self/status", "r") as f:
+        return int(next(line for line in f if line.startswith("VmHWM")).split()[1]) / 1024
+
+
+def write_shards(out_dir, seed=0):
+    """
+    main.py の出力と同じ形のシャード。再取得分は後のシャードに新しい crawled_at で入れる。
+    戻り値: 再取得した科目コードの集合
+    """
+    rng = random.Random(seed)
+    n_unique = int(N_RECORDS * (1 - RECRAWL_FRACTION))
+    shards = [[] for _ in range(N_SHARDS)]
+    recrawled = set()
+    for k in range(N_RECORDS):
+        code = f"SYN{k:06d}" if k < n_unique else f"SYN{rng.randrange(n_unique):06d}"
+        recrawl = k >= n_unique
+        if recrawl:
+            recrawled.add(code)
+        shard = rng.randrange(N_SHARDS // 2, N_SHARDS) if recrawl else rng.randrange(N_SHARDS // 2)
+        shards[shard].append({
+            "url": f"https://momiji.hiroshima-u.ac.jp/syllabusHtml/2025_0101_{code}.html",
+            "course_name": f"合成授業 {code}" + (" (改訂)" if recrawl else ""),
+            "schedule": "第1回 ガイダンス\n第2回 " + "講義 " * rng.randrange(20, 120),
+            "textbooks": "授業中に指示する",
+            "advice": "予習・復習をすること。" * rng.randrange(1, 10),
+            "code": code,
+            "crawled_at": f"2025-04-{(2 if recrawl else 1):02d}T{rng.randrange(24):02d}:00:00",
+        })
+    for s, records in enumerate(shards):
+        with open(os.path.join(out_dir, f"syllabus_{s:03d}.json"), "w", encoding="utf-8") as f:
+            json.dump(records, f, ensure_ascii=False, indent=4)
+    return recrawled
+
+
+def old_merge(files, output_file):
+    """旧 merge.py と同じ処理"""
+    merged_data = []
+    for file_path in files:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+            if isinstance(data, list):
+                merged_data.extend(data)
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(merged_data, f, ensure_ascii=False, indent=4)
+    return len(merged_data)
+
+
+def worker(mode, shard_dir, output_file):
+    from merge import merge_shards, write_merged
+    files = sorted(glob.glob(os.path.join(shard_dir, "syllabus_*.json")))
+    start = time.perf_counter()
+    if mode == "old":
+        written = old_merge(files, output_file)
+    else:
+        fmt, workers = mode.split("-")
+        if workers == "reversed":
+            files, workers = files[::-1], "pool"
+        # プールは CPU が1つでも2プロセスで動かす (受け渡しのコストを見るため)
+        merged, _ = merge_shards(files, max_workers=1 if workers == "seq" else max(2, os.cpu_count() or 1))
+        write_merged(merged, output_file, fmt)
+        written = len(merged)
+    print(json.dumps({"seconds": time.perf_counter() - start, "peak_rss_mb": peak_rss_mb(), "written": written}))
+
+
+def digest(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()[:12]
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        shard_dir = os.path.join(tmp, "shards")
+        os.makedirs(shard_dir)
+        recrawled = write_shards(shard_dir)
+        total_mb = sum(os.path.getsize(p) for p in glob.glob(os.path.join(shard_dir, "*.json"))) / 1e6
+        print(f"{N_SHARDS} shards, {N_RECORDS:,} records ({RECRAWL_FRACTION:.0%} re-crawls), {total_mb:.0f} MB, "
+              f"{os.cpu_count()} cpu\n")
+        print(f"{'Mode':<16}{'Wall s':>9}{'Peak RSS MB':>13}{'Written':>10}{'Output MB':>11}  sha256")
+        for mode in ("old", "json-seq", "json-pool", "json-reversed", "jsonl-pool"):
+            output_file = os.path.join(tmp, f"merged_{mode}.{'jsonl' if mode.startswith('jsonl') else 'json'}")
+            out = subprocess.run([sys.executable, os.path.abspath(__file__), "--worker", mode, shard_dir, output_file],
+                                 capture_output=True, text=True, check=True).stdout
+            r = json.loads(out.strip().splitlines()[-1])
+            print(f"{mode:<16}{r['seconds']:>9.2f}{r['peak_rss_mb']:>13.0f}{r['written']:>10,}"
+                  f"{os.path.getsize(output_file) / 1e6:>11.1f}  {digest(output_file)}")
+
+        # 再取得された科目は新しい方 (改訂) が残っているか
+        with open(os.path.join(tmp, "merged_json-pool.json"), "r", encoding="utf-8") as f:
+            merged = json.load(f)
+        stale = sum(r["code"] in recrawled and r["crawled_at"].startswith("2025-04-01") for r in merged)
+        print(f"\nre-crawled courses: {len(recrawled):,}, kept at an older crawl: {stale}")
+
+
+if __name__ == "__main__":
+    if "--worker" in sys.argv:
+        worker(*sys.argv[2:5])
+    else:
+        main()
@@ -0,0 +1,100 @@
+# ==========================================
+# Script Name: bench_near_duplicates.py
+# Description:
+#   [EN] Near-duplicate detection (near_duplicates.py) on synthetic
+#        tokenised syllabi (80 Zipf-distributed words each) at 10k / 50k
+#        courses, 10 % of which are planted copies of another course with
+#        10 % of their words replaced (Jaccard of the 2-gram shingles around
+#        0.7). Reports MinHash and LSH time, LSH candidate pairs, verified
+#        pairs, recall of the planted copies above the threshold, and
+#        precision (found pairs that come from the same original). The
+#        all-pairs exact Jaccard baseline is timed on 2k courses and
+#        extrapolated (quadratic) to the full size.
+#   [JP] 合成した分かち書き済みのシラバス (1万件・5万件、1割は別の授業の語を1割入れ替えた複製) で、
+#        MinHash + LSH による「ほぼ同じ授業」の検出の速さと、埋め込んだ複製をどれだけ見つけられるかを
+#        測ります。全組み合わせの Jaccard 係数との比較は 2千件で測って件数の2乗で見積もります。
+#
+# Data Flow:
+#   Input  : (合成データ)
+#   Output : (Console Output / コンソール出力)
+# ==========================================
+
+import os
+import sys
+import time
+
+import numpy as np
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(base_dir, "../v2"))
+
+from near_duplicates import JACCARD_THRESHOLD, candidate_pairs, jaccard, minhash_signatures, shingles
+
+SIZES = (10_000, 50_000)
+DUPLICATE_RATE = 0.1
+EDIT_RATE = 0.1
+WORDS_PER_COURSE = 80
+VOCAB_SIZE = 30_000
+BRUTE_FORCE_SIZE = 2_000
+
+
+def make_texts(n_courses, seed=0):
+    """分かち書き済みの本文と、埋め込んだ複製の組 {(元, 複製)}"""
+    rng = np.random.default_rng(seed)
+    texts, planted = [], set()
+    for k in range(n_courses):
+        if k and rng.random() < DUPLICATE_RATE:
+            source = int(rng.integers(k))
+            words = texts[source].split()
+            for pos in np.flatnonzero(rng.random(len(words)) < EDIT_RATE):
+                words[pos] = f"w{rng.integers(VOCAB_SIZE)}"
+            texts.append(" ".join(words))
+            planted.add((source, k))
+        else:
+            ranks = np.minimum(rng.zipf(1.3, size=WORDS_PER_COURSE), VOCAB_SIZE)
+            texts.append(" ".join(f"w{r}" for r in ranks))
+    return texts, planted
+
+
+def brute_force_seconds(shingle_sets):
+    start = time.perf_counter()
+    for i in range(len(shingle_sets)):
+        for j in range(i + 1, len(shingle_sets)):
+            jaccard(shingle_sets[i], shingle_sets[j])
+    return time.perf_counter() - start
+
+
+def main():
+    print(f"{DUPLICATE_RATE:.0%} planted copies with {EDIT_RATE:.0%} of the words replaced, "
+          f"Jaccard threshold {JACCARD_THRESHOLD}\n")
+    sample = [shingles(t) for t in make_texts(BRUTE_FORCE_SIZE, seed=1)[0]]
+    pair_s = brute_force_seconds(sample) / (BRUTE_FORCE_SIZE * (BRUTE_FORCE_SIZE - 1) / 2)
+
+    print(f"{'Courses':>8}{'MinHash s':>11}{'LSH s':>8}{'Verify s':>10}{'Candidates':>12}{'Pairs':>8}"
+          f"{'Recall':>8}{'Precision':>11}{'All-pairs s (est.)':>20}")
+    for n in SIZES:
+        texts, planted = make_texts(n)
+        shingle_sets = [shingles(t) for t in texts]
+        start = time.perf_counter()
+        signatures = minhash_signatures(shingle_sets)
+        minhash_s = time.perf_counter() - start
+        start = time.perf_counter()
+        candidates = candidate_pairs(signatures)
+        lsh_s = time.perf_counter() - start
+        start = time.perf_counter()
+        found = {(i, j) for i, j in candidates if jaccard(shingle_sets[i], shingle_sets[j]) >= JACCARD_THRESHOLD}
+        verify_s = time.perf_counter() - start
+
+        # 正解: 埋め込んだ複製のうち閾値を超える組。適合率は同じ元から作った授業どうしの組の割合
+        expected = {p for p in planted if jaccard(shingle_sets[p[0]], shingle_sets[p[1]]) >= JACCARD_THRESHOLD}
+        recall = len(expected & found) / max(len(expected), 1)
+        root = list(range(n))
+        for source, copy in sorted(planted, key=lambda p: p[1]):
+            root[copy] = root[source]
+        precision = sum(1 for i, j in found if root[i] == root[j]) / max(len(found), 1)
+        print(f"{n:>8,}{minhash_s:>11.2f}{lsh_s:>8.2f}{verify_s:>10.2f}{len(candidates):>12,}{len(found):>8,}"
+              f"{recall:>8.1%}{precision:>11.1%}{pair_s * n * (n - 1) / 2:>20,.0f}")
+
+
+if __name__ == "__main__":
+    main()
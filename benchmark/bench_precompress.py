@@ -0,0 +1,115 @@
+# ==========================================
+# Script Name: bench_precompress.py
+# Description:
+#   [EN] Transfer size and cold-load time of demo002.html and its data files
+#        through a local static server: plain files vs precompressed
+#        (gzip / brotli) content-hashed files from precompress.py.
+#        Cold load = new connection per request, client decodes and parses
+#        the JSON like the page does (no rendering).
+#   [JP] ローカル静的サーバー経由で demo002.html とデータの転送量・
+#        初回読み込み時間を、通常配信と事前圧縮配信で比較します。
+#
+# Data Flow:
+#   Input  : ../v2/demo002.html, ../v2/*.json
+#   Output : (Console Output / コンソール出力)
+# ==========================================
+
+import gzip
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from http.server import SimpleHTTPRequestHandler
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+v2_dir = os.path.join(base_dir, "../v2")
+sys.path.append(v2_dir)
+
+from precompress import write_asset_manifest, make_server, brotli
+
+# アクセスログを出さない
+SimpleHTTPRequestHandler.log_message = lambda self, *args: None
+
+ARTIFACTS = ["syllabus_vectors.json", "course_metadata.json", "recommendations.json"]
+RUNS = 20
+# ループバックは帯域制限がないので、モバイル回線相当の転送時間も見積もる
+LINK_MBPS = 10
+
+
+def fetch(url, accept_encoding):
+    """1リクエスト (新規接続)。戻り値: (転送バイト数, 復号済み本文)"""
+    request = urllib.request.Request(url, headers={"Accept-Encoding": accept_encoding})
+    with urllib.request.urlopen(request) as response:
+        body = response.read()
+        encoding = response.headers.get("Content-Encoding")
+    if encoding == "gzip":
+        return len(body), gzip.decompress(body)
+    if encoding == "br":
+        return len(body), brotli.decompress(body)
+    return len(body), body
+
+
+def cold_load(base_url, accept_encoding, use_manifest):
+    """ページ本体 → (assets.json) → データ3件を並列取得してパース"""
+    transferred, _ = fetch(base_url + "demo002.html", accept_encoding)
+    names = {name: name for name in ARTIFACTS}
+    if use_manifest:
+        nbytes, body = fetch(base_url + "assets.json", accept_encoding)
+        transferred += nbytes
+        names = {name: entry["file"] for name, entry in json.loads(body).items()}
+    with ThreadPoolExecutor(max_workers=len(ARTIFACTS)) as pool:
+        results = list(pool.map(lambda n: fetch(base_url + names[n], accept_encoding), ARTIFACTS))
+    for nbytes, body in results:
+        transferred += nbytes
+        json.loads(body)
+    return transferred
+
+
+def measure(directory, precompressed, accept_encoding, use_manifest):
+    server = make_server(directory, port=0, precompressed=precompressed)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/"
+    try:
+        cold_load(base_url, accept_encoding, use_manifest)  # warm-up (ディスクキャッシュ)
+        times = []
+        for _ in range(RUNS):
+            start = time.perf_counter()
+            transferred = cold_load(base_url, accept_encoding, use_manifest)
+            times.append(time.perf_counter() - start)
+    finally:
+        server.shutdown()
+        server.server_close()
+    times.sort()
+    return transferred, times[len(times) // 2] * 1000
+
+
+def main():
+    with tempfile.TemporaryDirectory() as work_dir:
+        shutil.copy(os.path.join(v2_dir, "demo002.html"), work_dir)
+        for name in ARTIFACTS:
+            shutil.copy(os.path.join(v2_dir, name), work_dir)
+        write_asset_manifest([os.path.join(work_dir, n) for n in ARTIFACTS], os.path.join(work_dir, "assets.json"))
+
+        cases = [("plain (current)", False, "identity", False),
+                 ("precompressed gzip", True, "gzip", True)]
+        if brotli is not None:
+            cases.append(("precompressed br", True, "br, gzip", True))
+        else:
+            print("(brotli not installed: skipping .br case)")
+
+        print(f"{'Mode':<22}{'Transfer bytes':>16}{'Loopback ms':>14}{f'@{LINK_MBPS}Mbps ms':>14}")
+        for label, precompressed, accept, use_manifest in cases:
+            transferred, median_ms = measure(work_dir, precompressed, accept, use_manifest)
+            link_ms = median_ms + transferred * 8 / (LINK_MBPS * 1e6) * 1000
+            print(f"{label:<22}{transferred:>16,}{median_ms:>14.1f}{link_ms:>14.1f}")
+        print("\n(demo002.html itself is served uncompressed in every mode)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+# ==========================================
+# Script Name: bench_prerequisites.py
+# Description:
+#   [EN] Scaling of the prerequisite DAG stage (prerequisites.py) at 478
+#        (real), 10k and 50k (synthetic) courses: time for the top-k
+#        neighbour lists (neighbors.py), candidate edges, the per-course cap
+#        and transitive reduction, and the edge counts after each step.
+#        The reduction is checked against a plain one that computes every
+#        course's full ancestor set, and the memory a full N x N similarity
+#        matrix would need is shown for comparison. Synthetic courses get a
+#        random 開設期 year and a random 入門 / 特論 name tag.
+#   [JP] 前提となる授業の推定 (上位 k 件の類似授業 -> 候補の辺 -> 推移簡約) の
+#        処理時間と辺の数を、実データと合成データ (1万件・5万件) で測ります。
+#
+# Data Flow:
+#   Input  : ../v2/syllabus_vectors.json / ../v2/course_metadata.json / synthetic.py
+#   Output : (Console Output / コンソール出力)
+# ==========================================
+
+import json
+import os
+import sys
+import time
+from collections import defaultdict
+
+import numpy as np
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+v2_dir = os.path.join(base_dir, "../v2")
+sys.path.append(v2_dir)
+
+import synthetic
+from neighbors import top_k_neighbors
+from prerequisites import (MAX_PREREQUISITES, PREREQ_NEIGHBORS, candidate_edges, course_level,
+                           transitive_reduction)
+from sparse_cluster import to_csr
+
+SIZES = (10_000, 50_000)
+
+
+def full_reduction(parents):
+    """全授業の祖先の集合を作ってから、ほかの前提の祖先になっている前提を除く (比較用)"""
+    ancestors = {}
+
+    def ancestors_of(node):
+        if node not in ancestors:
+            found = set()
+            for p, _ in parents.get(node, ()):
+                found.add(p)
+                found |= ancestors_of(p)
+            ancestors[node] = found
+        return ancestors[node]
+
+    sys.setrecursionlimit(100_000)
+    reduced = {}
+    for child, edges in parents.items():
+        redundant = set().union(*(ancestors_of(p) for p, _ in edges))
+        kept = [(p, s) for p, s in edges if p not in redundant]
+        if kept:
+            reduced[child] = kept
+    return reduced
+
+
+def run_case(name, X, levels):
+    n = X.shape[0]
+    start = time.perf_counter()
+    indices, sims = top_k_neighbors(X, PREREQ_NEIGHBORS)
+    knn_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    parent, child, weight = candidate_edges(indices, sims, levels)
+    parents = defaultdict(list)
+    for p, c, w in zip(parent.tolist(), child.tolist(), weight.tolist()):
+        parents[c].append((p, w))
+    for c in parents:
+        parents[c] = sorted(parents[c], key=lambda e: -e[1])[:MAX_PREREQUISITES]
+    edges_s = time.perf_counter() - start
+    capped = sum(map(len, parents.values()))
+
+    start = time.perf_counter()
+    reduced = transitive_reduction(parents, levels)
+    reduce_s = time.perf_counter() - start
+    start = time.perf_counter()
+    reference = full_reduction(parents)
+    full_s = time.perf_counter() - start
+    kept = sum(map(len, reduced.values()))
+
+    print(f"{name:<14}{n:>8,}{knn_s:>8.2f}{edges_s:>8.2f}{reduce_s:>9.3f}{full_s:>10.3f}"
+          f"{len(parent):>10,}{capped:>9,}{kept:>9,}{str(reduced == reference):>6}{n * n * 4 / 1e9:>10.2f}")
+
+
+def main():
+    with open(os.path.join(v2_dir, "syllabus_vectors.json"), "r", encoding="utf-8") as f:
+        real = json.load(f)
+    with open(os.path.join(v2_dir, "course_metadata.json"), "r", encoding="utf-8") as f:
+        metadata = json.load(f)
+    from preprocess002 import get_grade
+
+    print(f"k = {PREREQ_NEIGHBORS} neighbours, at most {MAX_PREREQUISITES} prerequisites per course before reduction\n")
+    print(f"{'Data':<14}{'Courses':>8}{'kNN s':>8}{'Edge s':>8}{'Reduce s':>9}{'Full TR s':>10}"
+          f"{'Candidate':>10}{'Capped':>9}{'Reduced':>9}{'Same':>6}{'NxN GB':>10}")
+    levels = [course_level(get_grade(metadata.get(cid, {}).get("t", "")), skills)
+              for cid, skills in zip(real["i"], real["skills"])]
+    run_case("real", to_csr(real), levels)
+    for n in SIZES:
+        rng = np.random.default_rng(0)
+        grades = rng.integers(1, 5, size=n)
+        tags = rng.choice(["tag_intro", "", "tag_advanced"], size=n, p=[0.2, 0.7, 0.1])
+        levels = [course_level(int(g), [t]) for g, t in zip(grades, tags)]
+        run_case(f"synthetic_{n // 1000}k", to_csr(synthetic.vector_data(n, vocab_size=500, nnz=25)), levels)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+# ==========================================
+# Script Name: bench_projection.py
+# Description:
+#   [EN] Cost of the ClusterViz 3D projection: the old path (t-SNE on the
+#        dense 500-dim matrix every launch) vs projection.py (TruncatedSVD ->
+#        Barnes-Hut t-SNE, cached by course ID + text hash, incremental
+#        placement of new courses). Like preprocess002.py, every run refits
+#        the TfidfVectorizer (max_features=500) on the current texts: the
+#        map is built on 95 % of the courses, then the vectorizer is refitted
+#        on all of them and the map is updated. Reports how many existing
+#        rows keep identical TF-IDF bytes (what the old row-content keys
+#        needed) vs rows kept by course ID + text hash, the update time vs a full
+#        recompute, and layout quality (trustworthiness, k=10).
+#        The synthetic texts are unstructured Zipf words, which is the
+#        worst case for t-SNE; use them for timing only.
+#   [JP] ClusterViz の3次元射影の処理時間 (従来 / SVD + キャッシュ + 追加配置) と、
+#        追加配置した地図の品質 (trustworthiness) を、preprocess002.py と同じく
+#        毎回 TF-IDF を学習し直す条件で測ります。
+#
+# Data Flow:
+#   Input  : ../common_data/integrated_arts_courses.json (実データ, preprocess002.py と同じ形態素解析)
+#          : (合成テキスト 3k件)
+#   Output : (Console Output / コンソール出力) ※ 地図は一時ディレクトリに書く
+# ==========================================
+
+import hashlib
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.manifold import TSNE, trustworthiness
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+v2_dir = os.path.join(base_dir, "../v2")
+sys.path.append(v2_dir)
+
+from projection import ProjectionMap, project
+from tfidf_model import TfidfModel
+
+NEW_FRACTION = 0.05
+MAX_FEATURES = 500  # preprocess002.py と同じ
+SYNTHETIC_SIZE = 3000
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def vectorize(texts):
+    """preprocess002.py と同じく毎回学習し直す"""
+    vectorizer = TfidfVectorizer(max_features=MAX_FEATURES)
+    X = vectorizer.fit_transform(texts)
+    return X, TfidfModel.from_vectorizer(vectorizer)
+
+
+def content_keys(X):
+    """TF-IDF の行の内容ハッシュ (以前の行の識別方法)"""
+    return [hashlib.sha1(X.indices[a:b].tobytes() + X.data[a:b].tobytes()).hexdigest()
+            for a, b in zip(X.indptr[:-1], X.indptr[1:])]
+
+
+def real_texts():
+    from preprocess002 import get_noun_runs, load_syllabus_data, prepare_course
+    syllabus = load_syllabus_data(os.path.join(base_dir, "../common_data/integrated_arts_courses.json"))
+    ids, texts = [], []
+    for cid, info in syllabus.items():
+        target_text, _, _ = prepare_course(info)
+        texts.append(" ".join(base for run in get_noun_runs(target_text) for _, base in run))
+        ids.append(cid)
+    return ids, texts
+
+
+def synthetic_texts(n, seed=0, words=80, vocab_size=30_000):
+    rng = np.random.default_rng(seed)
+    texts = [" ".join(f"w{r}" for r in np.minimum(rng.zipf(1.3, size=words), vocab_size)) for _ in range(n)]
+    return [f"C{k:06d}" for k in range(n)], texts
+
+
+def run_case(name, ids, texts, workdir):
+    n = len(ids)
+    path = os.path.join(workdir, f"{name}.npz")
+    # 毎 1/NEW_FRACTION 件目を「後から追加された授業」にする
+    new = set(range(0, n, int(1 / NEW_FRACTION)))
+    base = [k for k in range(n) if k not in new]
+    base_ids, base_texts = [ids[k] for k in base], [texts[k] for k in base]
+
+    X_base, model_base = vectorize(base_texts)
+    X, model = vectorize(texts)
+    dense = X.toarray()
+    print(f"\n[{name}] {n:,} courses x {X.shape[1]} terms, {len(new)} added after the first run")
+
+    old_s, old_coords = timed(lambda: TSNE(n_components=3, random_state=42, perplexity=30, learning_rate=200,
+                                           init="pca").fit_transform(dense))
+    print(f"  Old: t-SNE on dense matrix (every launch)       {old_s:8.2f}s")
+
+    full_s, _ = timed(lambda: project(base_ids, base_texts, X_base, model_base, path=path))
+    print(f"  New: SVD + Barnes-Hut t-SNE (first run)          {full_s:8.2f}s")
+    X_again, model_again = vectorize(base_texts)
+    cached_s, cached = timed(lambda: project(base_ids, base_texts, X_again, model_again, path=path))
+    print(f"  New: rerun, same texts ({cached.mode})".ljust(51) + f"{cached_s:8.3f}s")
+
+    # 語彙・IDF が変わるので、既存の授業でも TF-IDF の行はほぼすべて変わる
+    before = dict(zip(base_ids, content_keys(X_base)))
+    after = content_keys(X)
+    same_rows = sum(before.get(cid) == key for cid, key in zip(ids, after))
+    vocab_changed = len(set(model.words) ^ set(model_base.words)) // 2
+    inc_s, incremental = timed(lambda: project(ids, texts, X, model, path=path))
+    kept = len(ids) - int(incremental.placed.sum())
+    print(f"  Refit on all courses: {vocab_changed} vocabulary terms swapped; existing rows with identical "
+          f"TF-IDF bytes {same_rows}/{len(base)}, kept by course ID + text key {kept}/{len(base)}")
+    print(f"  New: +{len(new)} courses ({incremental.mode})".ljust(51) + f"{inc_s:8.3f}s")
+    refit_s, refit = timed(lambda: ProjectionMap.fit(X, ids, model=model))
+    print(f"  New: full recompute with the new courses         {refit_s:8.2f}s")
+
+    print(f"  Trustworthiness (k=10, current TF-IDF): old {trustworthiness(dense, old_coords, n_neighbors=10):.3f}, "
+          f"SVD+t-SNE {trustworthiness(dense, refit.coords, n_neighbors=10):.3f}, "
+          f"incremental {trustworthiness(dense, incremental.coords, n_neighbors=10):.3f}")
+
+
+def main():
+    with tempfile.TemporaryDirectory() as workdir:
+        run_case("real", *real_texts(), workdir)
+        run_case(f"synthetic_{SYNTHETIC_SIZE // 1000}k", *synthetic_texts(SYNTHETIC_SIZE), workdir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+# ==========================================
+# Script Name: bench_query_analyzer.py
+# Description:
+#   [EN] Recall of query-term -> vocabulary lookup in the browser, before and
+#        after query_lookup.json, plus lookup latency.
+#        Ground truth = vocabulary terms the index tokenisation finds in the
+#        query (preprocess002 noun base forms, then TfidfVectorizer lower-casing).
+#        Browser segmentation uses Intl.Segmenter through Node.js when available,
+#        otherwise Janome surface forms of the raw query as an approximation.
+#   [JP] ブラウザのクエリ語 -> 語彙 の照合率 (query_lookup.json 導入前後) と
+#        照合の速度を測ります。
+#
+# Data Flow:
+#   Input  : ../common_data/integrated_arts_courses.json (コーパス・授業名クエリ)
+#          : ../v2/syllabus_vectors.json (語彙)
+#   Output : (Console Output / コンソール出力)
+# ==========================================
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+v2_dir = os.path.join(base_dir, "../v2")
+sys.path.append(v2_dir)
+
+from preprocess002 import get_noun_runs, clean_course_name, normalize_text
+from query_analyzer import QueryLexicon, QueryAnalyzer, index_terms
+
+# 学生が入力しそうな自由記述 (全角英数・複合語・活用形を含む)
+TYPICAL_QUERIES = [
+    "プログラミング", "心理学", "データ分析を学びたい", "ＡＩと社会", "Ｐｙｔｈｏｎ",
+    "環境問題に興味がある", "国際協力の仕事がしたい", "日本文学と文化", "統計学", "認知科学",
+    "データサイエンティストになりたい", "英語でディスカッション", "生物の進化", "地域社会の課題",
+    "哲学・倫理", "ジェンダー論", "スポーツ科学", "宇宙物理", "経済学入門", "教育心理",
+]
+
+NODE_SEGMENT = """
+const seg = new Intl.Segmenter("ja-JP", { granularity: "word" });
+const queries = JSON.parse(require("fs").readFileSync(0, "utf8"));
+process.stdout.write(JSON.stringify(queries.map(q => ({
+    raw: [...seg.segment(q)].filter(x => x.isWordLike).map(x => x.segment),
+    nfkc: [...seg.segment(q.normalize("NFKC"))].filter(x => x.isWordLike).map(x => x.segment),
+}))));
+"""
+
+
+def segment_queries(queries):
+    """Intl.Segmenter (Node.js) で分割。使えなければ Janome の表層形で近似"""
+    if shutil.which("node"):
+        out = subprocess.run(["node", "-e", NODE_SEGMENT], input=json.dumps(queries),
+                             capture_output=True, text=True, check=True).stdout
+        return json.loads(out), "Intl.Segmenter (node)"
+    segments = []
+    for q in queries:
+        raw = [s for run in get_noun_runs(q) for s, _ in run]
+        segments.append({"raw": raw, "nfkc": [normalize_text(s) for s in raw]})
+    return segments, "Janome surface forms (node not found)"
+
+
+def main():
+    with open(os.path.join(base_dir, "../common_data/integrated_arts_courses.json"), "r", encoding="utf-8") as f:
+        syllabus = json.load(f)
+    with open(os.path.join(v2_dir, "syllabus_vectors.json"), "r", encoding="utf-8") as f:
+        vocab = json.load(f)["v"]
+
+    print("Building lookup table from corpus (Janome)...")
+    lexicon = QueryLexicon()
+    titles = []
+    for info in syllabus.values():
+        text = " ".join(str(info.get(k, "")) for k in ("授業科目名", "授業の目標・概要等", "メッセージ", "履修上の注意 受講条件等"))
+        lexicon.add_runs(get_noun_runs(text))
+        titles.append(clean_course_name(str(info.get("授業科目名", ""))))
+    table = lexicon.to_table(vocab)
+    analyzer = QueryAnalyzer.__new__(QueryAnalyzer)
+    analyzer.table, analyzer.vocab = table["t"], vocab
+    print(f"Lookup keys: {len(table['t'])}, JSON bytes: {len(json.dumps(table, ensure_ascii=False).encode()):,}")
+
+    queries = TYPICAL_QUERIES + titles
+    segments, segmenter_name = segment_queries(queries)
+    print(f"Segmenter: {segmenter_name}, queries: {len(queries)} ({len(TYPICAL_QUERIES)} typical + {len(titles)} course titles)\n")
+
+    results = {"before": [0, 0], "after": [0, 0]}
+    zero_hit = {"before": 0, "after": 0}
+    total_truth = 0
+    for q, seg in zip(queries, segments):
+        truth = {vocab[w] for run in get_noun_runs(q) for _, b in run for w in index_terms(b) if w in vocab}
+        if not truth:
+            continue
+        total_truth += len(truth)
+        before = {vocab[s] for s in seg["raw"] if s in vocab}
+        after = {idx for s in seg["nfkc"] for idx in analyzer.lookup(s)}
+        for name, found in (("before", before), ("after", after)):
+            results[name][0] += len(found & truth)
+            results[name][1] += len(found)
+            if not found:
+                zero_hit[name] += 1
+
+    print(f"{'Lookup':<34}{'Recall':>8}{'Precision':>11}{'Zero-hit queries':>18}")
+    for name, label in (("before", "vocab only (current demo)"), ("after", "NFKC + vocab + query_lookup")):
+        hit, found = results[name]
+        print(f"{label:<34}{hit / total_truth:>8.1%}{(hit / found if found else 0):>11.1%}{zero_hit[name]:>18}")
+
+    # 照合の速度
+    all_segments = [s for seg in segments for s in seg["nfkc"]]
+    start = time.perf_counter()
+    for _ in range(20):
+        for s in all_segments:
+            analyzer.lookup(s)
+    per_lookup_us = (time.perf_counter() - start) / (20 * len(all_segments)) * 1e6
+    start = time.perf_counter()
+    for q in TYPICAL_QUERIES:
+        analyzer.analyze(q)
+    per_query_ms = (time.perf_counter() - start) / len(TYPICAL_QUERIES) * 1000
+    print(f"\nTable lookup: {per_lookup_us:.2f} us / segment (Python dict)")
+    print(f"QueryAnalyzer.analyze (Janome + table): {per_query_ms:.2f} ms / query")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+# ==========================================
+# Script Name: bench_roadmap.py
+# Description:
+#   [EN] Cost of showing one 分野 roadmap on a synthetic 50k-course catalogue
+#        (12 分野, ~4k courses each): what generateRoadmap() in demo003.html
+#        does on every selection (scan every course for the field, bucket by
+#        includes("n年"), build the Mermaid source; the Mermaid layout in the
+#        browser comes on top and cannot be measured here) vs the roadmap.py
+#        output (one lookup of the pre-laid-out field + building the SVG
+#        string from the stored coordinates). Checks that both put the same
+#        courses in each year, and reports the one-time build of all
+#        roadmaps (year buckets, similarity links, layout) and the size of
+#        roadmap.json.
+#   [JP] 5万件の合成カタログで、ロードマップ1分野の表示にかかる時間を、
+#        選択のたびに全授業を調べて Mermaid の元を作る方法 (現在のデモ) と、
+#        roadmap.py で前処理した座標から SVG を作るだけの方法で比べます。
+#
+# Data Flow:
+#   Input  : synthetic.py
+#   Output : (Console Output / コンソール出力)
+# ==========================================
+
+import json
+import os
+import sys
+import time
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(base_dir, "../v2"))
+
+import synthetic
+from roadmap import build_roadmaps
+from sparse_cluster import to_csr
+
+N_COURSES = 50_000
+REPEAT = 3
+
+
+def best_time(fn):
+    best, result = float("inf"), None
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def scan_field(metadata, field):
+    """demo003.html の generateRoadmap と同じく、全授業を調べて年次ごとに分ける"""
+    courses = [dict(id=cid, **info) for cid, info in metadata.items() if info["f"] == field]
+    years = {1: [], 2: [], 3: [], 4: []}
+    for c in courses:
+        y = 4
+        for k in (1, 2, 3, 4):
+            if f"{k}年" in c["t"]:
+                y = k
+                break
+        years[y].append(c)
+    return years
+
+
+def mermaid_source(years):
+    """generateRoadmap が作る Mermaid の元 (Mermaid の配置・描画は除く)"""
+    mm = ["graph LR\n"]
+    for y in range(1, 5):
+        mm.append(f"subgraph Y{y} [Year {y}]\ndirection TB\n")
+        for c in years[y]:
+            name = "".join(ch for ch in c["n"] if ch not in "()[]\"'")[:15]
+            mm.append(f"{c['id']}[\"{name}\"]:::blueNode\nclick {c['id']} call roadmapClick(\"{c['id']}\")\n")
+        mm.append("end\n")
+    return "".join(mm)
+
+
+def svg_source(roadmaps, roadmap):
+    """roadmap.json の座標から SVG を作るだけ (demo003.html の renderRoadmapSvg と同じ処理)"""
+    w, h = roadmaps["box"]
+    nodes = roadmap["nodes"]
+    parts = [f'<svg width="{roadmap["w"]}" height="{roadmap["h"]}">']
+    for a, b, sim in roadmap["links"]:
+        x1, y1, x2, y2 = nodes[a][3] + w, nodes[a][4] + h / 2, nodes[b][3], nodes[b][4] + h / 2
+        mid = (x1 + x2) / 2
+        parts.append(f'<path d="M{x1},{y1} C{mid},{y1} {mid},{y2} {x2},{y2}" stroke-width="{1 + 2 * sim}"/>')
+    for cid, name, _, x, y, _ in nodes:
+        parts.append(f'<g onclick="roadmapClick(\'{cid}\')"><rect x="{x}" y="{y}" width="{w}" height="{h}"/>'
+                     f'<text>{name[:15]}</text></g>')
+    parts.append("</svg>")
+    return "".join(parts)
+
+
+def main():
+    ids = synthetic.course_ids(N_COURSES)
+    metadata = synthetic.metadata(N_COURSES)
+    X = to_csr(synthetic.vector_data(N_COURSES))
+
+    start = time.perf_counter()
+    roadmaps = build_roadmaps(ids, metadata, X)
+    build_s = time.perf_counter() - start
+    size = len(json.dumps(roadmaps, ensure_ascii=False, separators=(',', ':')).encode("utf-8"))
+    roadmaps = json.loads(json.dumps(roadmaps, ensure_ascii=False))  # ブラウザと同じく JSON から読んだ状態
+    links = sum(len(r["links"]) for r in roadmaps["fields"].values())
+    print(f"{N_COURSES:,} courses, {len(roadmaps['fields'])} fields "
+          f"(one-time build: {build_s:.1f} s, {links:,} links, roadmap.json {size / 1e6:.1f} MB)\n")
+
+    print("Per selection (ms). Demo: scan every course + Mermaid source, then Mermaid lays out the graph "
+          "in the browser (not measured).\nPrecomputed: field lookup + SVG from stored coordinates, nothing "
+          "left to lay out.\n")
+    print(f"{'Field':<18}{'Courses':>8}{'Scan+bucket':>13}{'Mermaid src':>13}{'Lookup':>9}{'SVG src':>9}{'Same':>6}")
+    for field in synthetic.FIELDS[:4]:
+        scan_s, years = best_time(lambda: scan_field(metadata, field))
+        mermaid_s, _ = best_time(lambda: mermaid_source(years))
+        lookup_s, roadmap = best_time(lambda: roadmaps["fields"][field])
+        svg_s, _ = best_time(lambda: svg_source(roadmaps, roadmap))
+        same = all(sorted(c["id"] for c in years[y]) == sorted(n[0] for n in roadmap["nodes"] if n[2] == y)
+                   for y in years)
+        print(f"{field:<18}{sum(map(len, years.values())):>8,}{scan_s * 1e3:>13.1f}{mermaid_s * 1e3:>13.1f}"
+              f"{lookup_s * 1e3:>9.3f}{svg_s * 1e3:>9.1f}{str(same):>6}")
+
+
+if __name__ == "__main__":
+    main()
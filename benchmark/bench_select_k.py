@@ -0,0 +1,66 @@
+# ==========================================
+# Script Name: bench_select_k.py
+# Description:
+#   [EN] Wall time of evaluating a range of k with select_k.py: sequential
+#        in one process vs the process pool over the shared-memory CSR
+#        matrix, plus the bytes a pickling pool would have copied to the
+#        workers. On a single-core machine the pool cannot be faster; the
+#        shared-memory saving still applies.
+#   [JP] select_k.py の k の評価を 逐次 / プロセスプール (共有メモリ) で比べ、
+#        共有メモリを使わずに pickle で渡した場合のコピー量も表示します。
+#
+# Data Flow:
+#   Input  : ../v2/syllabus_vectors.json (実データ) / synthetic.py (合成 50k件)
+#   Output : (Console Output / コンソール出力)
+# ==========================================
+
+import json
+import os
+import pickle
+import sys
+import time
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+v2_dir = os.path.join(base_dir, "../v2")
+sys.path.append(v2_dir)
+
+import synthetic
+import select_k
+from sparse_cluster import to_csr
+
+KS = list(range(4, 21, 4))
+
+
+def run_case(name, vector_data):
+    X = to_csr(vector_data)
+    print(f"\n[{name}] {X.shape[0]:,} courses, nnz {X.nnz:,}, k = {KS}")
+
+    # 逐次: 同じプロセスで1つずつ評価
+    select_k._shared["X"] = X
+    start = time.perf_counter()
+    sequential = [select_k.evaluate_k(k) for k in KS]
+    seq_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    parallel = select_k.select_k(X, KS)
+    par_s = time.perf_counter() - start
+
+    workers = min(len(KS), os.cpu_count() or 1)
+    pickled = len(pickle.dumps(X)) * len(KS)
+    same = all(abs(a["silhouette"] - b["silhouette"]) < 1e-9 for a, b in zip(sequential, parallel))
+    print(f"  sequential          : {seq_s:7.2f}s")
+    print(f"  process pool ({workers} cpu) : {par_s:7.2f}s  (same scores: {same})")
+    print(f"  matrix in shared memory once: {(X.data.nbytes + X.indices.nbytes + X.indptr.nbytes) / 1e6:.1f} MB; "
+          f"pickling it per task would copy {pickled / 1e6:.1f} MB")
+    print(f"  chosen k = {select_k.choose_k(parallel)}, "
+          f"elbow k = {select_k.elbow([r['k'] for r in parallel], [r['inertia'] for r in parallel])}")
+
+
+def main():
+    with open(os.path.join(v2_dir, "syllabus_vectors.json"), "r", encoding="utf-8") as f:
+        run_case("real", json.load(f))
+    run_case("synthetic_50k", synthetic.vector_data(50_000, vocab_size=500, nnz=25))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# ==========================================
+# Script Name: bench_shard_index.py
+# Description:
+#   [EN] Compares bytes downloaded per typical query with the sharded index
+#        against the current full download of the three v2 JSON artifacts.
+#   [JP] 分割インデックスを使った場合の1クエリあたりの取得バイト数を、
+#        現在の v2 JSON 3ファイル一括取得と比較します。
+#
+# Data Flow:
+#   Input  : ../v2/syllabus_vectors.json
+#          : ../v2/course_metadata.json
+#          : ../v2/recommendations.json
+#   Output : (Console Output / コンソール出力)
+# ==========================================
+
+import json
+import os
+import sys
+import tempfile
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+v2_dir = os.path.join(base_dir, "../v2")
+sys.path.append(v2_dir)
+
+from shard_index import write_sharded_index, query_download_bytes
+
+# 学生がよく入力する検索語 (名詞の原形 = 語彙と同じ形)
+TYPICAL_QUERIES = [
+    ["プログラミング"],
+    ["心理"],
+    ["歴史", "文化"],
+    ["データ", "分析"],
+    ["環境", "生物"],
+    ["社会", "経済", "政治"],
+    ["キャリア"],
+]
+
+
+def main():
+    vector_path = os.path.join(v2_dir, "syllabus_vectors.json")
+    metadata_path = os.path.join(v2_dir, "course_metadata.json")
+    recommendation_path = os.path.join(v2_dir, "recommendations.json")
+
+    with open(vector_path, "r", encoding="utf-8") as f:
+        vector_data = json.load(f)
+    with open(metadata_path, "r", encoding="utf-8") as f:
+        metadata = json.load(f)
+
+    full_bytes = sum(os.path.getsize(p) for p in (vector_path, metadata_path, recommendation_path))
+    print(f"Courses: {len(vector_data['i'])}, Vocabulary: {len(vector_data['v'])}")
+    print(f"Full download (3 JSON files): {full_bytes:,} bytes\n")
+
+    with tempfile.TemporaryDirectory() as index_dir:
+        index_bytes = write_sharded_index(index_dir, vector_data["v"], vector_data["d"], vector_data["i"], metadata)
+        manifest_bytes = os.path.getsize(os.path.join(index_dir, "manifest.json"))
+        print(f"Sharded index total: {index_bytes:,} bytes (manifest {manifest_bytes:,} bytes)\n")
+
+        print(f"{'Query':<24}{'Bytes':>10}{'vs full':>10}")
+        totals = []
+        for terms in TYPICAL_QUERIES:
+            hit_terms = [w for w in terms if w in vector_data["v"]]
+            nbytes = query_download_bytes(index_dir, hit_terms)
+            totals.append(nbytes)
+            label = " ".join(terms)
+            print(f"{label:<24}{nbytes:>10,}{nbytes / full_bytes:>10.1%}")
+
+        mean_bytes = sum(totals) / len(totals)
+        print(f"\nMean per query: {mean_bytes:,.0f} bytes ({mean_bytes / full_bytes:.1%} of full download)")
+
+
+if __name__ == "__main__":
+    main()
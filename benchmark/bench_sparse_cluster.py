@@ -0,0 +1,107 @@
+# ==========================================
+# Script Name: bench_sparse_cluster.py
+# Description:
+#   [EN] Wall time and peak RSS of the old dense clustering path in
+#        ClusterViz.py (Python-loop densify + KMeans(n_init=10)) vs the
+#        sparse path (sparse_cluster.py: CSR + spherical / mini-batch
+#        k-means + vectorised keywords), at 478 (real) and 50k (synthetic)
+#        courses. Each run is a separate process so peak RSS is not shared.
+#   [JP] ClusterViz.py の従来の密行列の処理と、疎行列のままのクラスタリングの
+#        実行時間・最大メモリ使用量 (peak RSS) を比べます。
+#
+# Data Flow:
+#   Input  : ../v2/syllabus_vectors.json (実データ) / synthetic.py (合成 50k件)
+#   Output : (Console Output / コンソール出力)
+# ==========================================
+
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+import numpy as np
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+v2_dir = os.path.join(base_dir, "../v2")
+sys.path.append(v2_dir)
+
+K = 12
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def load(size):
+    if size == "real":
+        with open(os.path.join(v2_dir, "syllabus_vectors.json"), "r", encoding="utf-8") as f:
+            return json.load(f)
+    import synthetic
+    return synthetic.vector_data(int(size), vocab_size=500, nnz=25)
+
+
+def dense_path(vector_data):
+    """ClusterViz.py の従来の処理 (密行列 + KMeans n_init=10 + argsort でキーワード)"""
+    from sklearn.cluster import KMeans
+    vocab = vector_data["v"]
+    index_to_word = {v: k for k, v in vocab.items()}
+    dense_matrix = np.zeros((len(vector_data["i"]), len(vocab)))
+    for idx, (indices, values) in enumerate(vector_data["d"]):
+        for col, val in zip(indices, values):
+            dense_matrix[idx, col] = val
+    kmeans = KMeans(n_clusters=K, random_state=42, n_init=10)
+    labels = kmeans.fit_predict(dense_matrix)
+    keywords = [[index_to_word.get(ind) for ind in c.argsort()[-10:][::-1]] for c in kmeans.cluster_centers_]
+    norms = np.linalg.norm(dense_matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return labels, keywords, dense_matrix / norms
+
+
+def sparse_path(vector_data):
+    from sparse_cluster import SphericalKMeans, to_csr, top_keywords
+    index_to_word = {v: k for k, v in vector_data["v"].items()}
+    X = to_csr(vector_data)
+    kmeans = SphericalKMeans(n_clusters=K, random_state=42)
+    labels = kmeans.fit_predict(X)
+    return labels, top_keywords(kmeans.cluster_centers_, index_to_word), X
+
+
+def cosine_cohesion(X, labels):
+    """クラスタ内の平均コサイン類似度 (各点と所属クラスタの正規化中心の内積の平均)"""
+    from scipy import sparse
+    onehot = sparse.csr_matrix((np.ones(len(labels)), (labels, np.arange(len(labels)))), shape=(K, len(labels)))
+    centers = onehot @ X
+    centers = centers.toarray() if sparse.issparse(centers) else np.asarray(centers)
+    centers /= np.maximum(np.linalg.norm(centers, axis=1, keepdims=True), 1e-12)
+    return float(np.mean(np.asarray(X @ centers.T)[np.arange(len(labels)), labels]))
+
+
+def worker(path, size):
+    vector_data = load(size)
+    base_rss = peak_rss_mb()
+    start = time.perf_counter()
+    labels, keywords, X = (dense_path if path == "dense" else sparse_path)(vector_data)
+    seconds = time.perf_counter() - start
+    print(json.dumps({"seconds": seconds, "peak_rss_mb": peak_rss_mb(), "base_rss_mb": base_rss,
+                      "cohesion": cosine_cohesion(X, labels), "sample": keywords[0][:5]}, ensure_ascii=False))
+
+
+def main():
+    print(f"k={K}. RSS delta = peak RSS - RSS after loading the vectors.\n")
+    print(f"{'Courses':<10}{'Path':<8}{'Wall s':>9}{'Peak RSS MB':>13}{'Delta MB':>10}{'Cohesion':>10}")
+    for size in ("real", "50000"):
+        for path in ("dense", "sparse"):
+            out = subprocess.run([sys.executable, __file__, "--worker", path, size],
+                                 capture_output=True, text=True, check=True).stdout
+            r = json.loads(out.strip().splitlines()[-1])
+            label = "478" if size == "real" else f"{int(size):,}"
+            print(f"{label:<10}{path:<8}{r['seconds']:>9.2f}{r['peak_rss_mb']:>13.0f}"
+                  f"{r['peak_rss_mb'] - r['base_rss_mb']:>10.0f}{r['cohesion']:>10.3f}")
+
+
+if __name__ == "__main__":
+    if "--worker" in sys.argv:
+        worker(sys.argv[2], sys.argv[3])
+    else:
+        main()
@@ -0,0 +1,110 @@
+# ==========================================
+# Script Name: bench_split_departments.py
+# Description:
+#   [EN] Peak RSS, wall time and bytes written of the current
+#        extract_integrated_arts.py / merge_ias_courses.py (whole-university
+#        file loaded into Course objects + indent=2 re-dump) vs the
+#        streaming split_departments.py (one incremental pass into
+#        per-department JSONL partitions + in-place append of new
+#        courses), on a synthetic 200k-course source. The merge target
+#        already holds all but 1% of the 総合科学部* courses. Each run is a
+#        separate process.
+#   [JP] 現在の抽出・マージのスクリプトと、ストリーミング版 (split_departments.py) の
+#        最大メモリ使用量・実行時間・書き込み量を、合成した 20万件の全学ファイルで比べます。
+#
+# Data Flow:
+#   Input  : synthetic.py (一時ディレクトリに合成ファイルを書き出す)
+#   Output : (Console Output / コンソール出力)
+# ==========================================
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+common_dir = os.path.join(base_dir, "../common")
+sys.path.append(common_dir)
+
+import synthetic
+
+N_COURSES = 200_000
+MISSING_FRACTION = 0.01  # マージ先に無い 総合科学部* の授業の割合
+SOURCE_FILE = "subject_details_main_2025-04-03.json"
+TARGET_FILE = "integrated_arts_courses.json"
+
+
+def peak_rss_mb():
+    """VmHWM (ru_maxrss は fork 元の大きな親プロセスの値を引き継いでしまうため)"""
+    with open("/proc/self/status", "r") as f:
+        return int(next(line for line in f if line.startswith("VmHWM")).split()[1]) / 1024
+
+
+def written_bytes():
+    """このプロセスが write した文字数 (/proc/self/io の wchar)"""
+    with open("/proc/self/io", "r") as f:
+        return int(next(line for line in f if line.startswith("wchar")).split()[1])
+
+
+def worker(mode):
+    base_rss, base_written = peak_rss_mb(), written_bytes()
+    start = time.perf_counter()
+    if mode == "extract (old)":
+        import extract_integrated_arts
+        extract_integrated_arts.main()
+    elif mode == "merge (old)":
+        import merge_ias_courses
+        merge_ias_courses.main()
+    elif mode == "split (new)":
+        from split_departments import split_departments
+        split_departments(SOURCE_FILE)
+    else:
+        from split_departments import merge_into, partition_records
+        merge_into(TARGET_FILE, partition_records())
+    print(json.dumps({"seconds": time.perf_counter() - start, "peak_rss_mb": peak_rss_mb(),
+                      "base_rss_mb": base_rss, "written_mb": (written_bytes() - base_written) / 1e6}))
+
+
+def write_target(source_path, target_path):
+    """総合科学部* の授業のうち MISSING_FRACTION を除いたマージ先 (indent=2, 現在の形式)"""
+    with open(source_path, "r", encoding="utf-8") as f:
+        source = json.load(f)
+    ias = [k for k, v in source.items() if v["開講部局"].startswith("総合科学部")]
+    keep = ias[:int(len(ias) * (1 - MISSING_FRACTION))]
+    with open(target_path, "w", encoding="utf-8") as f:
+        json.dump({k: source[k] for k in keep}, f, ensure_ascii=False, indent=2)
+    return len(ias) - len(keep)
+
+
+def run(mode, cwd):
+    out = subprocess.run([sys.executable, os.path.abspath(__file__), "--worker", mode], cwd=cwd,
+                         env=dict(os.environ, PYTHONPATH=common_dir), capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        source_path = os.path.join(tmp, SOURCE_FILE)
+        target_path = os.path.join(tmp, TARGET_FILE)
+        synthetic.write_syllabus_file(source_path, N_COURSES)
+        missing = write_target(source_path, target_path)
+        shutil.copy(target_path, target_path + ".orig")
+        print(f"{N_COURSES:,} courses, source {os.path.getsize(source_path) / 1e6:.0f} MB, "
+              f"target {os.path.getsize(target_path) / 1e6:.1f} MB ({missing} new courses to merge)\n")
+        print(f"{'Step':<16}{'Wall s':>9}{'Peak RSS MB':>13}{'Delta MB':>10}{'Written MB':>12}")
+        for mode in ("extract (old)", "merge (old)", "split (new)", "merge (new)"):
+            if mode.startswith("merge"):
+                shutil.copy(target_path + ".orig", target_path)
+            r = run(mode, tmp)
+            print(f"{mode:<16}{r['seconds']:>9.1f}{r['peak_rss_mb']:>13.0f}"
+                  f"{r['peak_rss_mb'] - r['base_rss_mb']:>10.0f}{r['written_mb']:>12.1f}")
+
+
+if __name__ == "__main__":
+    if "--worker" in sys.argv:
+        worker(sys.argv[2])
+    else:
+        main()
@@ -0,0 +1,154 @@
+# ==========================================
+# Script Name: bench_stream_vectorize.py
+# Description:
+#   [EN] Peak RSS and wall time of the in-memory vectorisation in
+#        preprocess002.py (json.load + corpus / metadata_map / skills lists +
+#        TfidfVectorizer) vs the streaming two-pass version
+#        (stream_vectorize.py), on synthetic syllabus files of 20k and 200k
+#        courses (JSON object, same fields as integrated_arts_courses.json).
+#        Text is pre-split synthetic words, so both paths use a whitespace
+#        tokenizer instead of Janome (Janome would dominate the run time and
+#        does not change the memory picture). Each run (and each output
+#        comparison) is a separate process, because ru_maxrss is inherited
+#        from the parent across fork/exec.
+#        "streaming/spill" runs with max_terms=SPILL_TERMS so the frequency
+#        tables are spilled to disk and merged, and is checked against the
+#        in-memory output as well.
+#   [JP] preprocess002.py のようにすべてをメモリに載せるベクトル化と、
+#        ストリーミング (stream_vectorize.py) の最大メモリ使用量・実行時間を、
+#        合成した 2万 / 20万 件のシラバスファイルで比べます。
+#
+# Data Flow:
+#   Input  : synthetic.py (一時ディレクトリに合成ファイルを書き出す)
+#   Output : (Console Output / コンソール出力)
+# ==========================================
+
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+v2_dir = os.path.join(base_dir, "../v2")
+sys.path.append(v2_dir)
+
+import synthetic
+
+MAX_FEATURES = 500   # stream_vectorize.MAX_FEATURES と同じ
+SPILL_TERMS = 5_000  # streaming/spill で使う max_terms (合成データの語の種類は約 3万)
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def whitespace_tokens(text):
+    """合成テキストは分かち書き済みなのでそのまま使う"""
+    return text
+
+
+def in_memory(path, out_dir):
+    """preprocess002.main() のベクトル化部分と同じ処理 (すべてメモリ上)"""
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from preprocess002 import prepare_course
+    with open(path, "r", encoding="utf-8") as f:
+        syllabus_data = json.load(f)
+    corpus, course_ids, all_skills_data, metadata_map = [], [], [], {}
+    for code_key, info in syllabus_data.items():
+        target_text, skills, meta = prepare_course(info)
+        corpus.append(whitespace_tokens(target_text))
+        course_ids.append(code_key)
+        all_skills_data.append(skills)
+        metadata_map[code_key] = meta
+    vectorizer = TfidfVectorizer(max_features=500)
+    X = vectorizer.fit_transform(corpus)
+    sparse_vectors = []
+    for i in range(X.shape[0]):
+        row = X.getrow(i)
+        sparse_vectors.append([row.indices.tolist(), [round(v, 3) for v in row.data.tolist()]])
+    vocabulary = {k: int(v) for k, v in vectorizer.vocabulary_.items()}
+    with open(os.path.join(out_dir, "syllabus_vectors.json"), "w", encoding="utf-8") as f:
+        json.dump({"v": vocabulary, "d": sparse_vectors, "i": course_ids, "skills": all_skills_data},
+                  f, ensure_ascii=False, separators=(',', ':'))
+    with open(os.path.join(out_dir, "course_metadata.json"), "w", encoding="utf-8") as f:
+        json.dump(metadata_map, f, ensure_ascii=False, separators=(',', ':'))
+
+
+def streaming(path, out_dir, max_terms=None):
+    from stream_vectorize import MAX_TERMS, stream_vectorize
+    return stream_vectorize(path, out_dir, tokenize=whitespace_tokens, max_terms=max_terms or MAX_TERMS)
+
+
+def worker(mode, path, out_dir):
+    # preprocess002 の import (Janome の辞書など) の分は両方に共通なので差し引く
+    import preprocess002  # noqa: F401
+    base_rss = peak_rss_mb()
+    start = time.perf_counter()
+    if mode == "in-memory":
+        stats = in_memory(path, out_dir) or {}
+    else:
+        stats = streaming(path, out_dir, SPILL_TERMS if mode == "streaming/spill" else None)
+    print(json.dumps({"seconds": time.perf_counter() - start, "peak_rss_mb": peak_rss_mb(), "base_rss_mb": base_rss,
+                      "terms": stats.get("terms"), "spills": stats.get("spills")}))
+
+
+def same_vectors(dir_a, dir_b):
+    """2つの出力の語彙と各行が (丸めの範囲で) 一致するか。戻り値: (一致, 語彙で違う語の数)"""
+    with open(os.path.join(dir_a, "syllabus_vectors.json"), "r", encoding="utf-8") as f:
+        a = json.load(f)
+    with open(os.path.join(dir_b, "syllabus_vectors.json"), "r", encoding="utf-8") as f:
+        b = json.load(f)
+    vocab_diff = len(set(a["v"]) - set(b["v"]))
+    if a["v"] != b["v"] or a["i"] != b["i"]:
+        return False, vocab_diff
+    for (ia, va), (ib, vb) in zip(a["d"], b["d"]):
+        da, db = dict(zip(ia, va)), dict(zip(ib, vb))
+        if da.keys() != db.keys() or any(abs(da[k] - db[k]) > 0.0011 for k in da):
+            return False, vocab_diff
+    return True, vocab_diff
+
+
+def run_worker(*args):
+    """別プロセスで実行する (ru_maxrss は fork 元の値を引き継ぐので、親では大きなデータを読まない)"""
+    out = subprocess.run([sys.executable, __file__, *args], capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    print("RSS delta = peak RSS - RSS after imports.\n")
+    print(f"{'Courses':<10}{'File MB':>9}{'Path':>17}{'Wall s':>9}{'Peak RSS MB':>13}{'Delta MB':>10}{'Spills':>8}"
+          f"{'Same':>6}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_courses in (20_000, 200_000):
+            path = os.path.join(tmp, f"syllabus_{n_courses}.json")
+            synthetic.write_syllabus_file(path, n_courses)
+            size_mb = os.path.getsize(path) / 1e6
+            out_dirs = {}
+            notes = []
+            for mode in ("in-memory", "streaming", "streaming/spill"):
+                out_dirs[mode] = os.path.join(tmp, f"{mode.replace('/', '_')}_{n_courses}")
+                os.makedirs(out_dirs[mode], exist_ok=True)
+                r = run_worker("--worker", mode, path, out_dirs[mode])
+                same = "-"
+                if mode != "in-memory":
+                    same, vocab_diff = run_worker("--compare", out_dirs["in-memory"], out_dirs[mode])
+                    if vocab_diff:
+                        notes.append(f"{mode}: {vocab_diff} of {MAX_FEATURES} vocabulary terms differ")
+                print(f"{n_courses:<10,}{size_mb:>9.0f}{mode:>17}{r['seconds']:>9.1f}{r['peak_rss_mb']:>13.0f}"
+                      f"{r['peak_rss_mb'] - r['base_rss_mb']:>10.0f}{r['spills'] if r['spills'] is not None else '-':>8}"
+                      f"{str(same):>6}")
+            print(f"  streaming counted {r['terms']:,} distinct terms")
+            for note in notes:
+                print(f"  {note} (terms tied at the cut-off; TfidfVectorizer's argsort is not stable)")
+
+
+if __name__ == "__main__":
+    if "--worker" in sys.argv:
+        worker(*sys.argv[2:5])
+    elif "--compare" in sys.argv:
+        print(json.dumps(same_vectors(*sys.argv[2:4])))
+    else:
+        main()
@@ -0,0 +1,99 @@
+# ==========================================
+# Script Name: bench_syllabus_db.py
+# Description:
+#   [EN] Point lookups, department filters and full-text queries on the
+#        SQLite store (common/syllabus_db.py) vs the JSON-scan approach the
+#        tools use today (json.load the file, then loop over it), on a
+#        synthetic 200k-course file. JSON is reported both with the parse
+#        each tool run pays and with the data already in memory. Also
+#        reports ingest time, database size and that both approaches
+#        return the same courses.
+#   [JP] SQLite (syllabus_db.py) と、今のツールのように JSON を読み込んで走査する
+#        方法とで、講義コードでの取得・部局での絞り込み・全文検索の速さを
+#        合成した 20万件のファイルで比べます。
+#
+# Data Flow:
+#   Input  : synthetic.py (一時ディレクトリに合成ファイルを書き出す)
+#   Output : (Console Output / コンソール出力)
+# ==========================================
+
+import json
+import os
+import sys
+import tempfile
+import time
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(base_dir, "../common"))
+
+import synthetic
+from syllabus_db import NAME_FIELDS, TEXT_FIELDS, connect, find_courses, get_course, ingest, search_text
+
+N_COURSES = 200_000
+LOOKUPS = 1000
+
+
+def timed(fn, repeat=1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) / repeat, result
+
+
+def load_json(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def course_text(info):
+    return "\n".join(str(info[f]) for f in NAME_FIELDS + TEXT_FIELDS if info.get(f))
+
+
+def json_search(data, query):
+    """今のツールと同じ: 全授業の本文を走査して、すべての語を含むものを探す"""
+    terms = query.split()
+    return sorted(k for k, v in data.items() if all(t in course_text(v) for t in terms))
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "subject_details.json")
+        db_path = os.path.join(tmp, "syllabus.db")
+        synthetic.write_syllabus_file(path, N_COURSES)
+        ingest_s, count = timed(lambda: ingest([path], db_path))
+        print(f"{count:,} courses: JSON {os.path.getsize(path) / 1e6:.0f} MB, "
+              f"SQLite {os.path.getsize(db_path) / 1e6:.0f} MB (ingest {ingest_s:.1f}s)\n")
+
+        load_s, data = timed(lambda: load_json(path))
+        conn = connect(db_path)
+        codes = synthetic.course_ids(N_COURSES)[::N_COURSES // LOOKUPS]
+
+        cases = [
+            ("point lookup",
+             lambda: [data[c] for c in codes],
+             lambda: [get_course(conn, c) for c in codes], len(codes)),
+            ("dept = 総合科学部",
+             lambda: {k: v for k, v in data.items() if v["開講部局"] == "総合科学部"},
+             lambda: dict(find_courses(conn, department="総合科学部")), 1),
+            ("dept 総合科学部*",
+             lambda: {k: v for k, v in data.items() if v["開講部局"].startswith("総合科学部")},
+             lambda: dict(find_courses(conn, department_prefix="総合科学部")), 1),
+            *[(f"text '{q}'",
+               lambda q=q: json_search(data, q),
+               lambda q=q: sorted(c for c, _ in search_text(conn, q, limit=N_COURSES)), 1)
+              for q in ("データ分析", "w29999", "統計", "w2999 統計")],
+        ]
+        print(f"json.load of the file: {load_s:.2f}s (paid by every tool run)\n")
+        print(f"{'Query':<22}{'Hits':>8}{'JSON ms':>10}{'JSON+load ms':>14}{'SQLite ms':>11}{'Same':>6}")
+        for name, json_fn, db_fn, per in cases:
+            json_s, json_result = timed(json_fn)
+            db_s, db_result = timed(db_fn)
+            hits = len(json_result)
+            label = f"{name} (x{per})" if per > 1 else name
+            print(f"{label:<22}{hits:>8,}{json_s * 1e3:>10.1f}{(json_s + load_s) * 1e3:>14.0f}"
+                  f"{db_s * 1e3:>11.1f}{str(json_result == db_result):>6}")
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+# ==========================================
+# Script Name: bench_tfidf_model.py
+# Description:
+#   [EN] Startup and per-query cost of the persisted TF-IDF model
+#        (common/tfidf_model.py) vs refitting a TfidfVectorizer at startup
+#        (what TFidVectorizer.py used to do). Startup = import + fit (or
+#        load of model + cached matrix); query = vectorising one query.
+#        Also checks the saved model gives the same vectors as sklearn, and
+#        how the model load itself grows with the vocabulary: eager
+#        TfidfModel.load vs load_model (lazy: parsed on the first query).
+#   [JP] 保存済み TF-IDF モデルを読む場合と、起動のたびに学習し直す場合の
+#        起動時間・クエリ1件のベクトル化時間を比べます。
+#
+# Data Flow:
+#   Input  : (合成した分かち書き済みの文書 1k / 10k / 50k 件)
+#   Output : (Console Output / コンソール出力)
+# ==========================================
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+common_dir = os.path.join(base_dir, "../common")
+sys.path.append(common_dir)
+
+from tfidf_model import TfidfModel, load_model
+
+VOCAB_SIZE = 20_000
+WORDS_PER_DOC = 120
+QUERIES = 200
+
+
+def documents(n_docs, seed=0):
+    """Zipf 分布の語からなる分かち書き済みの文書"""
+    rng = np.random.default_rng(seed)
+    words = [f"w{k}" for k in range(VOCAB_SIZE)]
+    ranks = np.minimum(rng.zipf(1.3, size=(n_docs, WORDS_PER_DOC)), VOCAB_SIZE) - 1
+    return [" ".join(words[r] for r in row) for row in ranks]
+
+
+def import_seconds(statement):
+    """新しいプロセスでの import にかかる時間 (起動時間の一部)"""
+    code = f"import sys, time; sys.path.append({common_dir!r}); s = time.perf_counter(); {statement}; print(time.perf_counter() - s)"
+    return float(subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout)
+
+
+def run_case(n_docs, sklearn_import_s, model_import_s):
+    docs = documents(n_docs)
+    queries = documents(QUERIES, seed=1)
+    queries = [" ".join(q.split()[:3]) for q in queries]
+
+    start = time.perf_counter()
+    vectorizer = TfidfVectorizer(max_features=1000)
+    matrix = vectorizer.fit_transform(docs)
+    fit_s = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as tmp:
+        model_path = os.path.join(tmp, "tfidf_model.json")
+        matrix_path = os.path.join(tmp, "tfidf_matrix.npz")
+        TfidfModel.from_vectorizer(vectorizer).save(model_path)
+        sparse.save_npz(matrix_path, matrix)
+
+        start = time.perf_counter()
+        model = TfidfModel.load(model_path)
+        cached = sparse.load_npz(matrix_path)
+        load_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for q in queries:
+        vectorizer.transform([q])
+    sklearn_q = (time.perf_counter() - start) / QUERIES * 1e6
+    start = time.perf_counter()
+    for q in queries:
+        model.transform_doc(q)
+    model_q = (time.perf_counter() - start) / QUERIES * 1e6
+
+    err = abs(vectorizer.transform(docs[:500]) - model.transform(docs[:500])).max()
+    assert cached.shape == matrix.shape
+    print(f"{n_docs:>8,}{sklearn_import_s + fit_s:>15.3f}{model_import_s + load_s:>16.3f}"
+          f"{sklearn_q:>14.1f}{model_q:>14.1f}{err:>12.1e}")
+
+
+def load_rows():
+    """語彙の大きさごとのモデルの読み込み時間 (JSON の解析は語彙数に比例する)"""
+    print(f"\n{'Terms':>8}{'Model KB':>10}{'eager load ms':>15}{'lazy start ms':>15}{'first query ms':>16}")
+    for n_terms in (1_000, 20_000, 200_000):
+        model = TfidfModel([f"w{k}" for k in range(n_terms)], np.linspace(1, 8, n_terms), {
+            "lowercase": True, "token_pattern": r"(?u)\b\w\w+\b", "norm": "l2", "sublinear_tf": False,
+            "use_idf": True})
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "tfidf_model.json")
+            model.save(path)
+            start = time.perf_counter()
+            TfidfModel.load(path)
+            eager_ms = (time.perf_counter() - start) * 1000
+            start = time.perf_counter()
+            lazy = load_model(path)
+            lazy_ms = (time.perf_counter() - start) * 1000
+            start = time.perf_counter()
+            lazy.transform_doc("w1 w2 w3")
+            first_ms = (time.perf_counter() - start) * 1000
+            print(f"{n_terms:>8,}{os.path.getsize(path) / 1024:>10.0f}{eager_ms:>15.1f}{lazy_ms:>15.2f}{first_ms:>16.1f}")
+
+
+def main():
+    sklearn_import_s = import_seconds("from sklearn.feature_extraction.text import TfidfVectorizer")
+    model_import_s = import_seconds("from tfidf_model import TfidfModel")
+    print(f"import: sklearn TfidfVectorizer {sklearn_import_s:.3f}s, tfidf_model {model_import_s:.3f}s\n")
+    print(f"{'Docs':>8}{'refit start s':>15}{'cached start s':>16}{'sklearn q us':>14}{'model q us':>14}{'max err':>12}")
+    for n_docs in (1_000, 10_000, 50_000):
+        run_case(n_docs, sklearn_import_s, model_import_s)
+    load_rows()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+# ==========================================
+# Script Name: synthetic.py
+# Description:
+#   [EN] Helpers that build synthetic catalogues in the same shape as the
+#        v2 artifacts, so benchmarks can run at 50k+ courses.
+#   [JP] v2 の成果物と同じ形の合成データを作るベンチマーク用ヘルパーです。
+# ==========================================
+
+import json
+import zlib
+import numpy as np
+
+DEPARTMENTS = ["総合科学部", "総合科学部総合科学科", "総合科学部国際共創学科", "文学部", "教育学部",
+               "法学部", "経済学部", "理学部", "工学部", "情報科学部", "生物生産学部", "医学部"]
+TERMS = ["1年次生 前期 1ターム", "2年次生 前期 2ターム", "2年次生 後期 3ターム", "3年次生 後期 4ターム",
+         "2年次生 前期 セメスター(前期)", "3年次生 後期 セメスター(後期)", "4年次生 前期 通年", "2年次生 前期 集中"]
+AREAS = ["総合科学部共通科目", "人間探究領域", "自然探求領域", "社会探究領域", "その他"]
+FIELDS = ["人間科学分野", "自然科学分野", "社会科学分野", "人間文化", "言語コミュニケーション", "生命科学",
+          "数理情報科学", "物性科学", "地域研究", "越境文化", "現代社会システム", "学際科目"]
+DAYS = ["月", "火", "水", "木", "金"]
+
+
+def course_ids(n_courses):
+    return [f"SYN{k:06d}" for k in range(n_courses)]
+
+
+def sparse_vectors(n_courses, vocab_size=500, nnz=30, seed=0):
+    """L2正規化済みの疎ベクトル [[indices], [values]] のリスト"""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for _ in range(n_courses):
+        indices = np.sort(rng.choice(vocab_size, size=nnz, replace=False))
+        values = rng.random(nnz) ** 2
+        values /= np.linalg.norm(values)
+        rows.append([indices.tolist(), np.round(values, 3).tolist()])
+    return rows
+
+
+def topical_vectors(n_courses, vocab_size=500, nnz=30, n_topics=200, topic_words=40, on_topic=0.8, seed=0):
+    """
+    トピック構造のある疎ベクトル (各授業は1つのトピックの語を on_topic の割合で使い、残りはランダム)。
+    sparse_vectors は一様ランダムで近傍の構造が無いので、近似 kNN の再現率はこちらでも測る
+    """
+    rng = np.random.default_rng(seed)
+    topics = [rng.choice(vocab_size, size=topic_words, replace=False) for _ in range(n_topics)]
+    n_on = min(int(nnz * on_topic), topic_words)
+    rows = []
+    for _ in range(n_courses):
+        on = rng.choice(topics[rng.integers(n_topics)], size=n_on, replace=False)
+        off = rng.choice(vocab_size, size=nnz - n_on, replace=False)
+        indices = np.unique(np.concatenate([on, off]))
+        values = rng.random(len(indices)) ** 2
+        values /= np.linalg.norm(values)
+        rows.append([indices.tolist(), np.round(values, 3).tolist()])
+    return rows
+
+
+def vector_data(n_courses, vocab_size=500, nnz=30, seed=0, topical=False):
+    """syllabus_vectors.json と同じ形 {"v", "d", "i", "skills"} (topical=True ならトピック構造あり)"""
+    rows = topical_vectors(n_courses, vocab_size, nnz, seed=seed) if topical \
+        else sparse_vectors(n_courses, vocab_size, nnz, seed)
+    return {
+        "v": {f"w{k}": k for k in range(vocab_size)},
+        "d": rows,
+        "i": course_ids(n_courses),
+        "skills": [[] for _ in range(n_courses)],
+    }
+
+
+def recommendations(n_courses, top_k=5, seed=0):
+    """recommendations.json と同じ形 {ID: [[ID, score], ...]}"""
+    rng = np.random.default_rng(seed)
+    ids = course_ids(n_courses)
+    recs = {}
+    for k, cid in enumerate(ids):
+        targets = rng.choice(n_courses, size=top_k, replace=False)
+        scores = np.sort(rng.uniform(0.05, 0.99, size=top_k))[::-1]
+        recs[cid] = [[ids[t], round(float(s), 3)] for t, s in zip(targets, scores) if t != k]
+    return recs
+
+
+def metadata(n_courses, seed=0):
+    """course_metadata.json と同じ形 {ID: {n, d, t, w, i, a, f}}"""
+    rng = np.random.default_rng(seed)
+    meta = {}
+    for k, cid in enumerate(course_ids(n_courses)):
+        day = DAYS[rng.integers(len(DAYS))]
+        start = int(rng.integers(1, 5)) * 2 - 1
+        term_no = int(rng.integers(1, 5))
+        meta[cid] = {
+            "n": f"合成授業{k}",
+            "d": DEPARTMENTS[rng.integers(len(DEPARTMENTS))],
+            "t": TERMS[rng.integers(len(TERMS))],
+            "w": f"({term_no}T) {day}{start}-{start + 1}:総K{rng.integers(100, 400)}",
+            "i": f"教員 {rng.integers(2000)}",
+            "a": AREAS[rng.integers(len(AREAS))],
+            "f": FIELDS[rng.integers(len(FIELDS))],
+        }
+    return meta
+
+
+def syllabus(source, n_courses, seed=0):
+    """
+    実データ (integrated_arts_courses.json の辞書) の授業を複製・改変して
+    同じ形の合成コーパス {ID: {...}} を n_courses 件作る
+    """
+    rng = np.random.default_rng(seed)
+    originals = [info for info in source.values() if isinstance(info, dict)]
+    corpus = {}
+    for k, cid in enumerate(course_ids(n_courses)):
+        info = dict(originals[rng.integers(len(originals))])
+        info["授業科目名"] = f"{info.get('授業科目名', '')} {k}"
+        # 長さのばらつきを残すため概要の一部を切り詰める
+        goal = str(info.get("授業の目標・概要等", ""))
+        info["授業の目標・概要等"] = goal[:int(len(goal) * rng.uniform(0.3, 1.0))]
+        corpus[cid] = info
+    return corpus
+
+
+def write_syllabus_file(path, n_courses, seed=0, vocab_size=30_000, words_per_course=80):
+    """
+    {講義コード: {...}} の合成シラバスファイル (integrated_arts_courses.json と同じ項目) を
+    1件ずつ書き出す (生成側もメモリに載せない)。本文は Zipf 分布の分かち書き済みの語
+    """
+    rng = np.random.default_rng(seed)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("{")
+        for k, cid in enumerate(course_ids(n_courses)):
+            ranks = np.minimum(rng.zipf(1.3, size=words_per_course), vocab_size)
+            info = {
+                "講義コード": cid,
+                "授業科目名": f"合成授業{k}",
+                "開講部局": DEPARTMENTS[rng.integers(len(DEPARTMENTS))],
+                "開設期": TERMS[rng.integers(len(TERMS))],
+                "曜日・時限・講義室": f"(1T) {DAYS[rng.integers(5)]}1-2:総K{rng.integers(100, 400)}",
+                "担当教員名": f"教員 {rng.integers(2000)}",
+                "使用言語": "J : 日本語",
+                "授業の目標・概要等": " ".join(f"w{r}" for r in ranks),
+                "メッセージ": "統計 データ分析 初心者 歓迎" if k % 7 == 0 else "",
+                "領域": AREAS[rng.integers(len(AREAS))],
+                "分野": FIELDS[rng.integers(len(FIELDS))],
+            }
+            f.write(("," if k else "") + json.dumps(cid) + ":" + json.dumps(info, ensure_ascii=False))
+        f.write("}")
+
+
+class HashingEncoder:
+    """
+    SentenceTransformer の代わりに使うスタブ (encode(list_of_texts) -> ndarray)。
+    文字 bigram をハッシュして dim 次元に数えるだけなので、モデル無しで動き、
+    文字が似ている文ほどベクトルも近くなる。
+    padded_chars = バッチ内最長の長さ x バッチサイズ の合計 (パディング込みの計算量の目安)
+    """
+
+    def __init__(self, dim=768):
+        self.dim = dim
+        self.calls = 0
+        self.texts = 0
+        self.padded_chars = 0
+
+    def encode(self, texts):
+        self.calls += 1
+        self.texts += len(texts)
+        self.padded_chars += len(texts) * max((len(t) for t in texts), default=0)
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            buckets = [zlib.crc32(text[k:k + 2].encode("utf-8")) % self.dim for k in range(len(text) - 1)]
+            if buckets:
+                out[row] = np.bincount(buckets, minlength=self.dim)
+        return out
@@ -1,14 +1,19 @@
 import json
+import os
 import pandas as pd
 from janome.tokenizer import Tokenizer
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+from scipy import sparse
+
+from tfidf_model import TfidfModel, load_model
 
 # ==========================================
 # 設定
 # ==========================================
 JSON_FILE = "all_syllabus_merged.json" # マージ済みのファイル
 TARGET_KEYWORD = "プログラミング"       # 検索したいキーワード（または授業名の一部）
+MODEL_FILE = "tfidf_model.json"        # 学習済みモデルのキャッシュ (語彙・IDF)
+MATRIX_FILE = "tfidf_matrix.npz"       # 全授業のベクトルのキャッシュ
+CACHE_KEY_FILE = "tfidf_cache_key.txt" # キャッシュを作った時の JSON_FILE のサイズと更新時刻
 
 # ==========================================
 # 1. データの読み込みと前処理
@@ -16,11 +21,15 @@ TARGET_KEYWORD = "プログラミング"       # 検索したいキーワード
 print("データを読み込んでいます...")
 
 try:
-    with open(JSON_FILE, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    with open(JSON_FILE, 'rb') as f:
+        raw = f.read()
 except FileNotFoundError:
     print(f"エラー: {JSON_FILE} が見つかりません。")
     exit()
+data = json.loads(raw)
+# 全体をハッシュせず、サイズと更新時刻 (ns) でキャッシュの鮮度を判定する
+source_stat = os.stat(JSON_FILE)
+source_key = f"{source_stat.st_size}:{source_stat.st_mtime_ns}"
 
 # データフレームに変換
 df = pd.DataFrame(data)
@@ -51,16 +60,38 @@ def tokenize(text):
             tokens.append(token.surface)
     return " ".join(tokens)
 
-# 全データのテキストを単語区切りに変換
-df['wakati_text'] = df['combined_text'].apply(tokenize)
+def cache_is_fresh():
+    """キャッシュが同じ JSON_FILE から作られていれば True"""
+    if not all(os.path.exists(p) for p in (MODEL_FILE, MATRIX_FILE, CACHE_KEY_FILE)):
+        return False
+    with open(CACHE_KEY_FILE, 'r', encoding='utf-8') as f:
+        return f.read().strip() == source_key
 
 # ==========================================
 # 3. TF-IDF ベクトル化
 # ==========================================
-print("ベクトル化計算中...")
-# max_features=1000: 上位1000語の重要単語のみ使用（計算軽量化）
-vectorizer = TfidfVectorizer(max_features=1000) 
-tfidf_matrix = vectorizer.fit_transform(df['wakati_text'])
+if cache_is_fresh():
+    # データが変わっていなければ、分かち書きも学習もせずにキャッシュを読むだけ
+    # (モデルの JSON は最初の検索で読む)
+    print("キャッシュ済みの TF-IDF モデルを読み込みます...")
+    model = load_model(MODEL_FILE)
+    tfidf_matrix = sparse.load_npz(MATRIX_FILE)
+else:
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    # 全データのテキストを単語区切りに変換
+    df['wakati_text'] = df['combined_text'].apply(tokenize)
+
+    print("ベクトル化計算中...")
+    # max_features=1000: 上位1000語の重要単語のみ使用（計算軽量化）
+    vectorizer = TfidfVectorizer(max_features=1000)
+    tfidf_matrix = vectorizer.fit_transform(df['wakati_text'])
+
+    model = TfidfModel.from_vectorizer(vectorizer)
+    model.save(MODEL_FILE)
+    sparse.save_npz(MATRIX_FILE, tfidf_matrix)
+    with open(CACHE_KEY_FILE, 'w', encoding='utf-8') as f:
+        f.write(source_key)
 
 # ==========================================
 # 4. 検索・推薦機能
@@ -72,10 +103,10 @@ def search_similar_courses(query_text, top_k=5):
     """
     # クエリ（検索語）も同じように処理
     query_wakati = tokenize(query_text)
-    query_vec = vectorizer.transform([query_wakati])
-    
-    # コサイン類似度を計算（全授業と比較）
-    similarities = cosine_similarity(query_vec, tfidf_matrix).flatten()
+    query_indices, query_values = model.transform_doc(query_wakati)
+
+    # コサイン類似度を計算（全授業と比較。どちらも L2 正規化済みなので内積）
+    similarities = tfidf_matrix[:, query_indices] @ query_values
     
     # 類似度が高い順にインデックスを取得
     related_docs_indices = similarities.argsort()[::-1][:top_k]
@@ -13,8 +13,8 @@ categorize_ias.py
 
 ※キーワードリストは必要に応じて編集してください。
 """
-import json
 import os
+from course import load_courses, dump_courses
 
 INPUT_FILE = "integrated_arts_courses.json"
 OUTPUT_FILE = "integrated_arts_courses.json" # 上書き保存
@@ -54,8 +54,7 @@ def main():
         return
 
     print(f"Loading {INPUT_FILE}...")
-    with open(INPUT_FILE, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    data = load_courses(INPUT_FILE)
 
     updated_count = 0
     
@@ -75,8 +74,7 @@ def main():
     print(f"Categorized {updated_count} courses.")
 
     print(f"Saving to {OUTPUT_FILE}...")
-    with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    dump_courses(data, OUTPUT_FILE)
     
     print("Done! Check 'integrated_arts_courses.json' for the '領域' field.")
 
@@ -0,0 +1,233 @@
+# ==========================================
+# Script Name: course.py
+# Description:
+#   [EN] Compact in-memory model for one syllabus record, shared by the
+#        loaders in v2/ and common/. A record loaded with json.load is a
+#        ~20-key dict with long Japanese keys, its own copies of department /
+#        term / language strings, and several long free-text fields. Course
+#        keeps the short fields in __slots__, interns the categorical ones
+#        (department, campus, term, language, 領域, 分野, ...), and by default
+#        does not keep the long text at all: it remembers where the record
+#        sits in the source file (json_stream.iter_record_spans) and re-reads
+#        it on access. The last record read is cached, so reading several
+#        text fields of the same course costs one read.
+#        Course is a read/write Mapping with the original keys
+#        (course.get("授業の目標・概要等"), course["領域"] = ...), so code
+#        written for the dicts keeps working; to_record() gives the dict back
+#        with the original key order. dump_courses writes {講義コード: {...}}
+#        like json.dump(..., indent=2) and re-points lazy courses at the new
+#        file, so the source file can be overwritten in place.
+#   [JP] シラバス1件分のコンパクトなモデルです。短い項目は __slots__ に持ち、
+#        部局・キャンパス・開設期・使用言語・領域・分野などは sys.intern で共有し、
+#        長い本文は読み込み時には保持せず、ファイル内の位置から必要なときに読み直します。
+#        元のキー (日本語) で dict と同じように読み書きできます。
+#
+# Data Flow:
+#   Input  : integrated_arts_courses.json / subject_details_main_*.json (辞書・配列・JSONL)
+#   Output : {講義コード: Course} / dump_courses で {講義コード: {...}} (indent=2)
+# ==========================================
+
+import json
+import os
+import sys
+from collections.abc import Mapping
+
+from json_stream import iter_record_spans, read_span
+
+# 属性名 -> 元データの項目名 (__slots__ に持つ短い項目)
+FIELDS = {
+    "url": "relative URL",
+    "year": "年度",
+    "department": "開講部局",
+    "code": "講義コード",
+    "category": "科目区分",
+    "name": "授業科目名",
+    "teacher": "担当教員名",
+    "campus": "開講キャンパス",
+    "term": "開設期",
+    "schedule": "曜日・時限・講義室",
+    "credits": "単位",
+    "language": "使用言語",
+    "level": "学習の段階",
+    "area": "領域",
+    "field": "分野",
+}
+
+# 値の種類が少なく、多くの授業で同じ文字列になる項目 (sys.intern で共有する)
+INTERNED = {"year", "department", "category", "teacher", "campus", "term", "schedule", "credits",
+            "language", "level", "area", "field"}
+
+# 属性名 -> 元データの項目名 (長い本文。lazy_text=True なら必要なときにファイルから読む)
+LONG_TEXT_FIELDS = {
+    "target": "対象学生",
+    "goal": "授業の目標・概要等",
+    "advice": "予習・復習への アドバイス",
+    "notes": "履修上の注意 受講条件等",
+    "message": "メッセージ",
+    "other": "その他",
+}
+
+_SLOT_OF = {key: slot for slot, key in FIELDS.items()}
+_LONG_KEYS = frozenset(LONG_TEXT_FIELDS.values())
+_KNOWN_KEYS = frozenset(_SLOT_OF) | _LONG_KEYS
+_MISSING = object()  # 元データに無かった項目
+
+_layouts = {}         # キーの並び (タプル) を授業間で共有する
+_recent = [None, {}]  # 最後に読み直した本文 [(path, offset), {項目名: 本文}]
+
+
+def _layout(keys):
+    keys = tuple(keys)
+    return _layouts.setdefault(keys, keys)
+
+
+class _LongText:
+    """長い本文の属性 (course.goal など)。元データに無ければ空文字"""
+
+    def __init__(self, key):
+        self.key = key
+
+    def __get__(self, course, owner=None):
+        if course is None:
+            return self
+        return course.texts().get(self.key, "")
+
+
+class Course(Mapping):
+    """シラバス1件。元の項目名で読み書きでき (Mapping)、短い項目は属性でも読める"""
+
+    __slots__ = tuple(FIELDS) + ("_layout", "_extra", "_text", "_source", "_offset", "_length")
+
+    @classmethod
+    def from_record(cls, record, source=None, offset=0, length=0):
+        """
+        dict から作る。source (ファイルのパス) と位置を渡すと長い本文は保持せず、
+        アクセスしたときに read_span で読み直す
+        """
+        course = cls.__new__(cls)
+        for set_slot, key, interned in _SETTERS:
+            value = record.get(key, _MISSING)
+            if interned and type(value) is str:
+                value = sys.intern(value)
+            set_slot(course, value)
+        course._layout = _layout(record)
+        course._extra = None
+        if not _KNOWN_KEYS.issuperset(record):
+            course._extra = {k: v for k, v in record.items() if k not in _KNOWN_KEYS}
+        if source is None:
+            course._text = {k: v for k, v in record.items() if k in _LONG_KEYS}
+            course._source = None
+        else:
+            course._text = None
+            course._source = source
+        course._offset = offset
+        course._length = length
+        return course
+
+    def texts(self):
+        """長い本文 {項目名: 本文} (遅延読み込みなら元ファイルから読み直す)"""
+        if self._text is not None:
+            return self._text
+        ref = (self._source, self._offset)
+        if _recent[0] != ref:
+            record = read_span(self._source, self._offset, self._length)
+            _recent[0], _recent[1] = ref, {k: v for k, v in record.items() if k in _LONG_KEYS}
+        return _recent[1]
+
+    def load_text(self):
+        """長い本文をメモリに読み込んで保持する (以後ファイルを読まない)"""
+        self._text = dict(self.texts())
+        self._source = None
+
+    def get(self, key, default=None):
+        slot = _SLOT_OF.get(key)
+        if slot is not None:
+            value = getattr(self, slot)
+            return default if value is _MISSING else value
+        if key in _LONG_KEYS:
+            return self.texts().get(key, default)
+        return self._extra.get(key, default) if self._extra else default
+
+    def __getitem__(self, key):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        if key not in self._layout:
+            self._layout = _layout(self._layout + (key,))
+        slot = _SLOT_OF.get(key)
+        if slot is not None:
+            setattr(self, slot, sys.intern(value) if slot in INTERNED and type(value) is str else value)
+        elif key in _LONG_KEYS:
+            self.load_text()
+            self._text[key] = value
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __contains__(self, key):
+        return key in self._layout
+
+    def __iter__(self):
+        return iter(self._layout)
+
+    def __len__(self):
+        return len(self._layout)
+
+    def to_record(self):
+        """元の形の dict (項目の順番も元のまま)"""
+        return {key: self[key] for key in self._layout}
+
+    def __repr__(self):
+        code = self.code if self.code is not _MISSING else "?"
+        name = self.name if self.name is not _MISSING else ""
+        return f"Course({code!s} {name!s})"
+
+
+for _attr, _key in LONG_TEXT_FIELDS.items():
+    setattr(Course, _attr, _LongText(_key))
+
+# (slot への代入, 項目名, intern するか)。from_record で setattr を使うより速い
+_SETTERS = [(Course.__dict__[slot].__set__, key, slot in INTERNED) for slot, key in FIELDS.items()]
+
+
+def load_courses(path, lazy_text=True):
+    """
+    シラバスファイル (辞書・配列・JSONL) を {キー: Course} で読み込む。
+    lazy_text=True なら長い本文は保持しない (path を書き換えるときは dump_courses を使う)
+    """
+    source = os.path.abspath(path)
+    courses = {}
+    for key, record, offset, length in iter_record_spans(path):
+        if isinstance(record, dict):
+            courses[key] = Course.from_record(record, source if lazy_text else None, offset, length)
+    return courses
+
+
+def dump_courses(courses, path, indent=2):
+    """
+    {キー: Course (または dict)} を json.dump(..., ensure_ascii=False, indent=indent) と同じ形で書き出す。
+    一時ファイルに書いてから置き換え、遅延読み込みの Course は新しいファイルの位置を指すように直す
+    """
+    source = os.path.abspath(path)
+    tmp_file = source + ".tmp"
+    pad = " " * indent
+    moved = []
+    with open(tmp_file, "wb") as f:
+        f.write(b"{")
+        for k, (key, course) in enumerate(courses.items()):
+            record = course.to_record() if isinstance(course, Course) else course
+            f.write(("," if k else "").encode("utf-8"))
+            f.write(f"\n{pad}{json.dumps(key, ensure_ascii=False)}: ".encode("utf-8"))
+            data = json.dumps(record, ensure_ascii=False, indent=indent).replace("\n", "\n" + pad).encode("utf-8")
+            if isinstance(course, Course) and course._source is not None:
+                moved.append((course, f.tell(), len(data)))
+            f.write(data)
+        f.write(b"\n}" if courses else b"}")
+    os.replace(tmp_file, source)
+    for course, offset, length in moved:
+        course._source, course._offset, course._length = source, offset, length
+    _recent[0] = None
@@ -8,8 +8,8 @@ extract_integrated_arts.py
 2. "開講部局" が "総合科学部" のデータをフィルタリング
 3. `integrated_arts_courses.json` に保存
 """
-import json
 import os
+from course import load_courses, dump_courses
 
 INPUT_FILE = "subject_details_main_2025-04-03.json"
 OUTPUT_FILE = "integrated_arts_courses.json"
@@ -20,8 +20,7 @@ def main():
         return
 
     print(f"Loading {INPUT_FILE}...")
-    with open(INPUT_FILE, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    data = load_courses(INPUT_FILE)
 
     extracted = {}
     count = 0
@@ -35,8 +34,7 @@ def main():
     print(f"Found {count} courses.")
 
     print(f"Saving to {OUTPUT_FILE}...")
-    with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
-        json.dump(extracted, f, ensure_ascii=False, indent=2)
+    dump_courses(extracted, OUTPUT_FILE)
     
     print("Done!")
 
@@ -0,0 +1,173 @@
+# ==========================================
+# Script Name: json_stream.py
+# Description:
+#   [EN] Incremental reading of large syllabus files without json.load.
+#        Yields one (key, record) at a time from a top-level JSON object
+#        ({講義コード: {...}, ...}, the format of main.py / merge.py), a
+#        top-level array, or a JSONL file (one record per line). Only the
+#        current read buffer and the current record are held in memory.
+#        iter_record_spans also reports where each record sits in the file
+#        (UTF-8 byte offset and length), so a record can be re-read later
+#        with read_span (course.py uses this for lazily loaded long text).
+#        Also writes JSONL record by record.
+#   [JP] 大きなシラバスファイルを json.load せずに1件ずつ読みます。
+#        トップレベルが辞書 ({講義コード: {...}}) ・配列・JSONL (1行1件) の
+#        どれにも対応し、メモリには読み込みバッファと現在の1件だけを持ちます。
+#
+# Data Flow:
+#   Input  : *.json (辞書 or 配列) / *.jsonl
+#   Output : (key, record) のイテレータ / write_jsonl で *.jsonl
+#          : iter_record_spans は (key, record, バイト位置, バイト長)
+# ==========================================
+
+import json
+
+CHUNK_SIZE = 1 << 16  # 1回に読む文字数
+KEY_FIELD = "講義コード"  # 配列・JSONL の場合にキーとして使う項目
+
+_WHITESPACE = " \t\r\n"
+
+
+class _Reader:
+    """ファイルを少しずつ読み、JSON の値を1つずつ取り出すバッファ"""
+
+    def __init__(self, f, chunk_size, track_bytes=False):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+        # バイト位置の計算用 (buf[mark] がファイルの mark_bytes バイト目)
+        self.track_bytes = track_bytes
+        self.mark = 0
+        self.mark_bytes = 0
+
+    def _fill(self, size):
+        data = self.f.read(size)
+        if not data:
+            self.eof = True
+        if self.track_bytes:
+            self.tell()
+            self.mark = 0
+        # 読み終えた部分は捨てる
+        self.buf = self.buf[self.pos:] + data
+        self.pos = 0
+
+    def tell(self):
+        """現在位置の UTF-8 バイトオフセット (前回の位置からの差分だけエンコードする)"""
+        self.mark_bytes += len(self.buf[self.mark:self.pos].encode("utf-8"))
+        self.mark = self.pos
+        return self.mark_bytes
+
+    def peek(self):
+        """次の空白以外の文字 (ファイルの終わりなら "")"""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if self.eof:
+                return ""
+            self._fill(self.chunk_size)
+
+    def expect(self, chars):
+        ch = self.peek()
+        if ch not in chars:
+            raise ValueError(f"JSON の形式が不正です: {chars!r} の位置に {ch!r}")
+        self.pos += 1
+        return ch
+
+    def value(self):
+        """次の値を1つ読む (バッファの途中で切れていたら読み足して再試行)"""
+        self.peek()
+        size = self.chunk_size
+        while True:
+            try:
+                obj, end = self.decoder.raw_decode(self.buf, self.pos)
+                # 数値などはバッファの末尾で切れていても読めてしまうので、末尾なら読み足す
+                if end < len(self.buf) or self.eof:
+                    self.pos = end
+                    return obj
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._fill(size)
+            size *= 2  # 1件が大きい場合に読み直しが増えすぎないように
+
+
+def _record_key(record, index, key_field):
+    if isinstance(record, dict) and record.get(key_field):
+        return record[key_field]
+    return str(index)
+
+
+def _iter(path, key_field, chunk_size, spans):
+    """(キー, 授業データ, バイト位置, バイト長) を返す (spans=False なら位置は None)"""
+    if path.endswith(".jsonl"):
+        with open(path, "rb") as f:
+            offset = 0
+            for index, line in enumerate(f):
+                if line.strip():
+                    record = json.loads(line)
+                    yield _record_key(record, index, key_field), record, offset, len(line)
+                offset += len(line)
+        return
+
+    # 改行を変換しない (文字位置とバイト位置を対応させるため)
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        reader = _Reader(f, chunk_size, track_bytes=spans)
+        opener = reader.expect("{[")
+        closer = "}" if opener == "{" else "]"
+        if reader.peek() == closer:
+            return
+        index = 0
+        start = end = None
+        while True:
+            if opener == "{":
+                key = reader.value()
+                reader.expect(":")
+            if spans:
+                reader.peek()
+                start = reader.tell()
+            record = reader.value()
+            if spans:
+                end = reader.tell()
+            if opener == "[":
+                key = _record_key(record, index, key_field)
+            yield key, record, start, None if end is None else end - start
+            index += 1
+            if reader.expect("," + closer) == closer:
+                return
+
+
+def iter_records(path, key_field=KEY_FIELD, chunk_size=CHUNK_SIZE):
+    """
+    (キー, 授業データ) を1件ずつ返す。
+    辞書ならそのキー、配列・JSONL なら key_field の値 (無ければ通し番号)。
+    """
+    for key, record, _, _ in _iter(path, key_field, chunk_size, False):
+        yield key, record
+
+
+def iter_record_spans(path, key_field=KEY_FIELD, chunk_size=CHUNK_SIZE):
+    """iter_records と同じ順に (キー, 授業データ, バイト位置, バイト長) を返す (read_span で読み直せる)"""
+    return _iter(path, key_field, chunk_size, True)
+
+
+def read_span(path, offset, length):
+    """iter_record_spans が返した位置の1件だけを読み直す"""
+    with open(path, "rb") as f:
+        f.seek(offset)
+        return json.loads(f.read(length))
+
+
+def write_jsonl(path, records):
+    """records (辞書のイテレータ) を1行1件で書き出す。書いた件数を返す"""
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')))
+            f.write("\n")
+            count += 1
+    return count
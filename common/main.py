@@ -133,8 +133,9 @@ def main():
                 
                 # 3. データ抽出
                 extracted_data = extract_syllabus_info(response.text, url)
-                # 科目コードもデータに追加
+                # 科目コードと取得日時もデータに追加 (merge.py で重複時に新しい方を残すため)
                 extracted_data["code"] = code
+                extracted_data["crawled_at"] = time.strftime("%Y-%m-%dT%H:%M:%S")
                 results.append(extracted_data)
                 
                 # 成功時はサーバーに優しく待機時間を長めに
@@ -12,8 +12,8 @@ Tkinterを使用したGUIツールです。
 """
 import tkinter as tk
 from tkinter import ttk, messagebox
-import json
 import os
+from course import load_courses, dump_courses
 
 FILE_PATH = "integrated_arts_courses.json"
 
@@ -46,15 +46,14 @@ class LabelingApp:
             self.root.destroy()
             return
         
-        with open(FILE_PATH, 'r', encoding='utf-8') as f:
-            self.data = json.load(f)
+        # 本文は表示するときにファイルから読む (course.py)
+        self.data = load_courses(FILE_PATH)
         
         self.course_ids = list(self.data.keys())
         print(f"Loaded {len(self.course_ids)} courses.")
 
     def save_data(self):
-        with open(FILE_PATH, 'w', encoding='utf-8') as f:
-            json.dump(self.data, f, ensure_ascii=False, indent=2)
+        dump_courses(self.data, FILE_PATH)
         print("Progress saved.")
 
     def setup_ui(self):
@@ -1,6 +1,29 @@
+# ==========================================
+# Script Name: merge.py
+# Description:
+#   [EN] Merges the scraper shards (syllabus_*.json, lists of course dicts
+#        from main.py) into one file. Shards are parsed in parallel worker
+#        processes and courses are deduplicated by "code" with a
+#        deterministic policy: the latest crawl wins ("crawled_at" of the
+#        record, else the shard's modification time), ties broken by shard
+#        file name and then position in the shard. The result is streamed
+#        out sorted by code as compact JSON or JSONL.
+#   [JP] スクレイパーの出力 (syllabus_*.json) を1つにまとめます。
+#        各ファイルは並列に読み込み、同じ科目コード ("code") の授業は
+#        「一番新しく取得したもの」を残します (レコードの crawled_at、
+#        無ければファイルの更新日時。同時刻ならファイル名・ファイル内の順で後のもの)。
+#        結果は科目コード順に、コンパクトな JSON か JSONL で書き出します。
+#
+# Data Flow:
+#   Input  : syllabus_*.json (授業データのリスト)
+#   Output : all_syllabus_merged.json (コンパクトな JSON のリスト) または all_syllabus_merged.jsonl
+# ==========================================
+
 import json
 import glob
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor
 
 # ==========================================
 # 設定
@@ -9,57 +32,136 @@ import os
 # 読み込むファイルのパターン
 # "*" はワイルドカードです。「syllabus_」で始まり「.json」で終わる全ファイルを対象にします
 # 例: syllabus_science.json, syllabus_law.json など
-INPUT_PATTERN = "syllabus_*.json" 
+INPUT_PATTERN = "syllabus_*.json"
 
 # 出力するファイル名
 OUTPUT_FILE = "all_syllabus_merged.json"
 
+# 出力形式: "json" (1行のリスト) / "jsonl" (1行1件)
+OUTPUT_FORMAT = "json"
+
+# 並列に読み込むプロセス数 (None = CPU数)
+MAX_WORKERS = None
+
+# 取得日時の書式 (main.py の crawled_at と同じ。文字列のまま比べられる)
+CRAWL_TIME_FORMAT = "%Y-%m-%dT%H:%M:%S"
+
 # ==========================================
 # マージ処理
 # ==========================================
 
+def record_key(record, shard_name, position):
+    """重複判定のキー (科目コード、無ければ URL、どちらも無ければ重複扱いしない)"""
+    return record.get("code") or record.get("url") or f"{shard_name}#{position}"
+
+
+def load_shard(file_path):
+    """
+    (ワーカーで実行) 1ファイルを読み込み、ファイル内で重複を除いた
+    [(キー, 優先度, 授業データ), ...] を返す。優先度が大きいものが新しい。
+    戻り値: (file_path, リスト, エラーメッセージ or None)
+    """
+    shard_name = os.path.basename(file_path)
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except json.JSONDecodeError:
+        return file_path, [], f"{file_path} はJSONとして読み込めませんでした。"
+    except Exception as e:
+        return file_path, [], f"{file_path} の処理中に問題が発生しました: {e}"
+
+    # データがリスト（配列）であることを確認
+    if not isinstance(data, list):
+        return file_path, [], f"{file_path} の中身がリスト形式ではありません。スキップします。"
+
+    shard_time = time.strftime(CRAWL_TIME_FORMAT, time.localtime(os.path.getmtime(file_path)))
+    latest = {}
+    for position, record in enumerate(data):
+        if not isinstance(record, dict):
+            continue
+        key = record_key(record, shard_name, position)
+        priority = (str(record.get("crawled_at") or shard_time), shard_name, position)
+        if key not in latest or priority > latest[key][0]:
+            latest[key] = (priority, record)
+    return file_path, [(key, priority, record) for key, (priority, record) in latest.items()], None
+
+
+def merge_shards(files, max_workers=MAX_WORKERS):
+    """
+    files を並列に読み込み、キーごとに一番新しい授業を残す。
+    戻り値: ({キー: 授業データ}, {"records": 読んだ件数, "duplicates": 捨てた件数, "errors": [...]})
+    """
+    winners = {}  # キー -> (優先度, 授業データ)
+    stats = {"records": 0, "duplicates": 0, "errors": []}
+    # ファイルが1つ・CPU が1つならプロセスを起動しない (受け渡しの分だけ遅くなる)
+    max_workers = max_workers or os.cpu_count() or 1
+    if len(files) <= 1 or max_workers <= 1:
+        results = map(load_shard, files)
+        executor = None
+    else:
+        executor = ProcessPoolExecutor(max_workers=max_workers)
+        results = executor.map(load_shard, files, chunksize=max(1, len(files) // (4 * max_workers)))
+    try:
+        for file_path, records, error in results:
+            if error:
+                stats["errors"].append(error)
+                continue
+            for key, priority, record in records:
+                stats["records"] += 1
+                current = winners.get(key)
+                if current is None:
+                    winners[key] = (priority, record)
+                    continue
+                stats["duplicates"] += 1
+                # 到着順に依らず、優先度で決める
+                if priority > current[0]:
+                    winners[key] = (priority, record)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    return {key: record for key, (_, record) in winners.items()}, stats
+
+
+def write_merged(merged, output_file, output_format=OUTPUT_FORMAT):
+    """キー順に1件ずつ書き出す (一時ファイルに書いてから置き換える)"""
+    tmp_file = output_file + ".tmp"
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        if output_format == "jsonl":
+            for key in sorted(merged):
+                f.write(json.dumps(merged[key], ensure_ascii=False, separators=(',', ':')) + "\n")
+        else:
+            f.write("[")
+            for k, key in enumerate(sorted(merged)):
+                if k:
+                    f.write(",")
+                f.write(json.dumps(merged[key], ensure_ascii=False, separators=(',', ':')))
+            f.write("]")
+    os.replace(tmp_file, output_file)
+
+
 def main():
-    merged_data = []
-    
     # 指定したパターンのファイル一覧を取得
-    files = glob.glob(INPUT_PATTERN)
-    
+    # 出力ファイル自身が読み込み対象に含まれていたらスキップする（無限増殖防止）
+    files = sorted(p for p in glob.glob(INPUT_PATTERN) if os.path.basename(p) != OUTPUT_FILE)
+
     if not files:
         print(f"パターン '{INPUT_PATTERN}' に一致するファイルが見つかりませんでした。")
         return
 
     print(f"マージ対象ファイル: {len(files)} 件")
-
-    for file_path in files:
-        # 出力ファイル自身が読み込み対象に含まれていたらスキップする（無限増殖防止）
-        if os.path.basename(file_path) == OUTPUT_FILE:
-            continue
-            
-        print(f"読み込み中: {file_path}")
-        
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                
-                # データがリスト（配列）であることを確認して追加
-                if isinstance(data, list):
-                    merged_data.extend(data)
-                else:
-                    print(f"警告: {file_path} の中身がリスト形式ではありません。スキップします。")
-                    
-        except json.JSONDecodeError:
-            print(f"エラー: {file_path} はJSONとして読み込めませんでした。")
-        except Exception as e:
-            print(f"エラー: {file_path} の処理中に問題が発生しました: {e}")
+    output_file = OUTPUT_FILE if OUTPUT_FORMAT == "json" else os.path.splitext(OUTPUT_FILE)[0] + ".jsonl"
+    start = time.perf_counter()
+    merged, stats = merge_shards(files)
+    for error in stats["errors"]:
+        print(f"エラー: {error}")
 
     # 保存処理
-    print(f"書き込み中... 総データ数: {len(merged_data)} 件")
+    print(f"書き込み中... 総データ数: {len(merged)} 件 (重複 {stats['duplicates']} 件を除外)")
     try:
-        with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
-            json.dump(merged_data, f, ensure_ascii=False, indent=4)
-        print(f"完了！ '{OUTPUT_FILE}' に保存されました。")
+        write_merged(merged, output_file)
+        print(f"完了！ '{output_file}' に保存されました。({time.perf_counter() - start:.1f}s)")
     except Exception as e:
         print(f"保存エラー: {e}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
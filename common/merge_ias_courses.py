@@ -10,8 +10,8 @@ merge_ias_courses.py
 3. "総合科学部..." で始まる部局のデータを検索
 4. 新しい授業があればリストに追加して保存
 """
-import json
 import os
+from course import load_courses, dump_courses
 
 SOURCE_FILE = "subject_details_main_2025-04-03.json"
 TARGET_FILE = "integrated_arts_courses.json"
@@ -23,14 +23,12 @@ def main():
     
     # Load Source
     print(f"Loading {SOURCE_FILE}...")
-    with open(SOURCE_FILE, 'r', encoding='utf-8') as f:
-        source_data = json.load(f)
+    source_data = load_courses(SOURCE_FILE)
 
     # Load Target (if exists, else empty dict)
     if os.path.exists(TARGET_FILE):
         print(f"Loading {TARGET_FILE}...")
-        with open(TARGET_FILE, 'r', encoding='utf-8') as f:
-            target_data = json.load(f)
+        target_data = load_courses(TARGET_FILE)
     else:
         print(f"Creating new {TARGET_FILE}...")
         target_data = {}
@@ -57,8 +55,7 @@ def main():
 
     if added_count > 0:
         print(f"Saving to {TARGET_FILE}...")
-        with open(TARGET_FILE, 'w', encoding='utf-8') as f:
-            json.dump(target_data, f, ensure_ascii=False, indent=2)
+        dump_courses(target_data, TARGET_FILE)
         print("Done!")
     else:
         print("No new courses found to add.")
@@ -0,0 +1,177 @@
+# ==========================================
+# Script Name: split_departments.py
+# Description:
+#   [EN] Streaming replacement for extract_integrated_arts.py and
+#        merge_ias_courses.py. The whole-university file is parsed once,
+#        incrementally (json_stream.py), and every department is written to
+#        its own JSONL partition (departments/<開講部局>.jsonl + manifest).
+#        Courses of the departments starting with a prefix (総合科学部...)
+#        are then merged into integrated_arts_courses.json by key: only new
+#        courses are appended in place before the closing brace, so existing
+#        (manually categorised) entries are kept and the write is O(added),
+#        not a re-dump of the whole file.
+#   [JP] extract_integrated_arts.py / merge_ias_courses.py を置き換える
+#        ストリーミング版です。全学のファイルを1回だけ少しずつ読み、全部局を
+#        部局ごとの JSONL に分けます。その後「総合科学部」で始まる部局の授業のうち
+#        integrated_arts_courses.json に無いものだけを末尾に追記します
+#        (既存の授業・手作業の分類はそのまま、ファイル全体は書き直しません)。
+#
+# Data Flow:
+#   Input  : subject_details_main_2025-04-03.json (または *.jsonl)
+#   Output : departments/<開講部局>.jsonl (1行1授業。パスに使えない文字を置き換えた場合は _<ハッシュ> 付き)
+#          : departments/manifest.json {開講部局: {"file", "count"}}
+#          : integrated_arts_courses.json (新しい授業を追記)
+#
+# Usage:
+#   python split_departments.py [source] [target] [prefix]
+# ==========================================
+
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+
+from json_stream import KEY_FIELD, iter_records
+
+SOURCE_FILE = "subject_details_main_2025-04-03.json"
+TARGET_FILE = "integrated_arts_courses.json"
+PARTITION_DIR = "departments"
+MANIFEST_NAME = "manifest.json"
+PREFIX = "総合科学部"  # 総合科学部, 総合科学部総合科学科, 総合科学部国際共創学科
+DEPT_FIELD = "開講部局"
+
+# 追加した授業の分類の初期値 (manual_categorize_gui.py で分類するまで)
+NEW_COURSE_DEFAULTS = {"領域": "その他", "分野": ""}
+
+
+def _dump(obj):
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':'))
+
+
+def partition_name(dept, suffix=False):
+    """
+    部局名 -> ファイル名 (パスに使えない文字は _ に置き換える)。
+    置き換えで名前が変わった場合 (または suffix=True) は、元の部局名の短いハッシュを付けて
+    別の部局名と同じファイル名にならないようにする ("A/B" と "A B" など)。
+    """
+    name = re.sub(r'[\\/:*?"<>|\s]+', "_", dept).strip("_")
+    if suffix or not name or name != dept:
+        name = f"{name or '_unknown'}_{hashlib.sha1(dept.encode('utf-8')).hexdigest()[:8]}"
+    return name + ".jsonl"
+
+
+def split_departments(source, out_dir=PARTITION_DIR):
+    """
+    source を1回だけ読み、部局ごとの JSONL に分ける。
+    各行は授業データそのもの (講義コードが無い/キーと違う場合はキーを講義コードとして入れる)。
+    戻り値: {部局: 件数}
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    files, counts, names = {}, {}, {}
+    used = set()  # 大文字小文字を区別しないファイルシステムでも重ならないように casefold で持つ
+    try:
+        for key, info in iter_records(source):
+            if not isinstance(info, dict):
+                continue
+            if info.get(KEY_FIELD) != key:
+                info = dict(info, **{KEY_FIELD: key})
+            dept = str(info.get(DEPT_FIELD, ""))
+            f = files.get(dept)
+            if f is None:
+                name = partition_name(dept)
+                if name.casefold() in used:
+                    name = partition_name(dept, suffix=True)
+                if name.casefold() in used:
+                    raise ValueError(f"部局 {dept!r} のファイル名 {name} が他の部局と重なります")
+                used.add(name.casefold())
+                names[dept] = name
+                f = files[dept] = open(os.path.join(out_dir, name), "w", encoding="utf-8")
+                counts[dept] = 0
+            f.write(_dump(info) + "\n")
+            counts[dept] += 1
+    finally:
+        for f in files.values():
+            f.close()
+
+    manifest = {dept: {"file": names[dept], "count": n} for dept, n in sorted(counts.items())}
+    with open(os.path.join(out_dir, MANIFEST_NAME), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return counts
+
+
+def partition_records(out_dir=PARTITION_DIR, prefix=PREFIX):
+    """部局名が prefix で始まるパーティションだけを読み、(講義コード, 授業データ) を返す"""
+    with open(os.path.join(out_dir, MANIFEST_NAME), "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    for dept, entry in manifest.items():
+        if dept.startswith(prefix):
+            yield from iter_records(os.path.join(out_dir, entry["file"]))
+
+
+def _closing_brace(f):
+    """JSON の辞書ファイルの最後の } の位置"""
+    f.seek(0, os.SEEK_END)
+    size = f.tell()
+    f.seek(max(0, size - 4096))
+    tail = f.read().rstrip()
+    if not tail.endswith(b"}"):
+        raise ValueError("マージ先が JSON の辞書ではありません")
+    return max(0, size - 4096) + len(tail) - 1
+
+
+def merge_into(target, records, defaults=NEW_COURSE_DEFAULTS):
+    """
+    target (JSON の辞書ファイル) に無い講義コードの授業だけを、最後の } の前に追記する。
+    既存の授業は変えない。追加が無ければファイルに触らない。戻り値: 追加した件数
+    """
+    existing = {key for key, _ in iter_records(target)} if os.path.exists(target) else set()
+    empty = not existing
+    added = 0
+    f = None
+    try:
+        for key, info in records:
+            if key in existing:
+                continue
+            if f is None:
+                # 最初の追加があった時点で開く
+                if not os.path.exists(target):
+                    with open(target, "w", encoding="utf-8") as new:
+                        new.write("{}")
+                f = open(target, "r+b")
+                f.seek(_closing_brace(f))
+            info = dict(info)
+            for field, value in defaults.items():
+                info.setdefault(field, value)
+            f.write((("" if empty and added == 0 else ",") + "\n" + _dump(key) + ":" + _dump(info)).encode("utf-8"))
+            existing.add(key)
+            added += 1
+    finally:
+        if f is not None:
+            f.write(b"\n}")
+            f.truncate()
+            f.close()
+    return added
+
+
+def main():
+    source = sys.argv[1] if len(sys.argv) > 1 else SOURCE_FILE
+    target = sys.argv[2] if len(sys.argv) > 2 else TARGET_FILE
+    prefix = sys.argv[3] if len(sys.argv) > 3 else PREFIX
+    if not os.path.exists(source):
+        print(f"Error: {source} が見つかりません。")
+        return
+
+    start = time.perf_counter()
+    print(f"Splitting {source} by {DEPT_FIELD}...")
+    counts = split_departments(source)
+    print(f"{sum(counts.values())} courses in {len(counts)} departments -> '{PARTITION_DIR}/'")
+
+    print(f"Merging '{prefix}*' courses into {target}...")
+    added = merge_into(target, partition_records(PARTITION_DIR, prefix))
+    print(f"Added {added} new courses ({time.perf_counter() - start:.1f}s).")
+
+
+if __name__ == "__main__":
+    main()
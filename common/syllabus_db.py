@@ -0,0 +1,217 @@
+# ==========================================
+# Script Name: syllabus_db.py
+# Description:
+#   [EN] Local SQLite store for syllabus records, so tools can answer simple
+#        questions without re-parsing multi-MB JSON files.
+#        `ingest` streams any of the JSON / JSONL sources (json_stream.py)
+#        into one table with indexed columns for 講義コード, 開講部局,
+#        開設期, 領域 and 分野 (the full record is kept as JSON), plus an FTS5
+#        trigram index over the long text fields. Re-ingesting a file
+#        upserts by 講義コード (later files win). The FTS table uses
+#        detail=none (no positions, ~30% smaller); substring queries go
+#        through LIKE, which the trigram index still answers for terms of
+#        3+ characters (shorter terms scan the FTS table with
+#        instr(lower(...)), so every term ignores ASCII case like LIKE).
+#        Query helpers: get_course (point lookup), find_courses (column
+#        filters), search_text (substring full text), load_courses
+#        (drop-in for json.load of {講義コード: {...}}).
+#   [JP] シラバスのレコードをローカルの SQLite に取り込み、JSON を毎回読み直さずに
+#        検索できるようにします。講義コード・開講部局・開設期・領域・分野に索引を張り、
+#        長い本文には FTS5 (trigram) の全文索引を作ります。
+#
+# Data Flow:
+#   Input  : integrated_arts_courses.json / subject_details_main_*.json /
+#            all_syllabus_merged.json(l) など
+#   Output : ../common_data/syllabus.db
+#
+# Usage:
+#   python syllabus_db.py ingest <file.json|file.jsonl> [...]
+#   python syllabus_db.py get <講義コード>
+#   python syllabus_db.py search <語> [...]
+# ==========================================
+
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+
+from json_stream import KEY_FIELD, iter_records
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+DB_FILE = os.path.join(base_dir, "../common_data/syllabus.db")
+
+# 索引を張る列 -> 元データの項目名
+COLUMNS = {
+    "code": KEY_FIELD,
+    "department": "開講部局",
+    "term": "開設期",
+    "area": "領域",
+    "field": "分野",
+}
+
+# 全文索引に入れる項目 (シラバス詳細 / スクレイパーの出力 のどちらの形にも対応)
+NAME_FIELDS = ["授業科目名", "course_name"]
+TEXT_FIELDS = ["授業の目標・概要等", "メッセージ", "履修上の注意 受講条件等", "予習・復習への アドバイス",
+               "その他", "schedule", "textbooks", "advice"]
+
+BATCH_SIZE = 1000  # 1トランザクションで取り込む件数
+MIN_TRIGRAM = 3    # trigram の索引が使える語の最短の長さ
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS courses (
+    code TEXT NOT NULL UNIQUE,
+    department TEXT,
+    term TEXT,
+    area TEXT,
+    field TEXT,
+    name TEXT,
+    source TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_courses_department ON courses(department);
+CREATE INDEX IF NOT EXISTS idx_courses_term ON courses(term);
+CREATE INDEX IF NOT EXISTS idx_courses_area ON courses(area);
+CREATE INDEX IF NOT EXISTS idx_courses_field ON courses(field);
+CREATE VIRTUAL TABLE IF NOT EXISTS course_text USING fts5(text, tokenize='trigram', detail=none);
+"""
+
+
+def connect(db_path=DB_FILE):
+    conn = sqlite3.connect(db_path)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def _row_values(key, info, source):
+    """courses の1行分の値と、全文索引に入れるテキスト"""
+    code = str(info.get(KEY_FIELD) or info.get("code") or key)
+    values = [code] + [str(info.get(field, "") or "") for field in list(COLUMNS.values())[1:]]
+    name = next((str(info[f]) for f in NAME_FIELDS if info.get(f)), "")
+    text = "\n".join([name] + [str(info[f]) for f in TEXT_FIELDS if info.get(f)])
+    return values + [name, source, json.dumps(info, ensure_ascii=False, separators=(',', ':'))], text
+
+
+def ingest(paths, db_path=DB_FILE):
+    """paths のファイルを順に取り込む (同じ講義コードは後のファイルで上書き)。戻り値: 取り込んだ件数"""
+    conn = connect(db_path)
+    count = 0
+    try:
+        for path in paths:
+            source = os.path.basename(path)
+            records = iter_records(path)
+            while True:
+                with conn:  # BATCH_SIZE 件ごとに1トランザクション
+                    done = True
+                    for key, info in records:
+                        if not isinstance(info, dict):
+                            continue
+                        values, text = _row_values(key, info, source)
+                        rowid = conn.execute(
+                            "INSERT INTO courses (code, department, term, area, field, name, source, data) "
+                            "VALUES (?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT(code) DO UPDATE SET "
+                            "department=excluded.department, term=excluded.term, area=excluded.area, "
+                            "field=excluded.field, name=excluded.name, source=excluded.source, "
+                            "data=excluded.data RETURNING rowid",
+                            values).fetchone()[0]
+                        conn.execute("DELETE FROM course_text WHERE rowid = ?", (rowid,))
+                        conn.execute("INSERT INTO course_text (rowid, text) VALUES (?, ?)", (rowid, text))
+                        count += 1
+                        if count % BATCH_SIZE == 0:
+                            done = False
+                            break
+                if done:
+                    break
+        conn.execute("ANALYZE")
+    finally:
+        conn.close()
+    return count
+
+
+def get_course(conn, code):
+    """講義コード -> 授業データ (無ければ None)"""
+    row = conn.execute("SELECT data FROM courses WHERE code = ?", (code,)).fetchone()
+    return json.loads(row[0]) if row else None
+
+
+def find_courses(conn, department=None, department_prefix=None, term=None, area=None, field=None):
+    """列の条件 (指定したものだけ AND) に合う (講義コード, 授業データ) を講義コード順に返す"""
+    conditions, params = [], []
+    for column, value in (("department", department), ("term", term), ("area", area), ("field", field)):
+        if value is not None:
+            conditions.append(f"{column} = ?")
+            params.append(value)
+    if department_prefix is not None:
+        # 索引が使えるように前方一致を範囲で書く
+        conditions.append("department >= ? AND department < ?")
+        params += [department_prefix, department_prefix + "\U0010ffff"]
+    where = " WHERE " + " AND ".join(conditions) if conditions else ""
+    for code, data in conn.execute(f"SELECT code, data FROM courses{where} ORDER BY code", params):
+        yield code, json.loads(data)
+
+
+def load_courses(db_path=DB_FILE, **filters):
+    """json.load した {講義コード: {...}} の代わり (filters は find_courses と同じ)"""
+    conn = sqlite3.connect(db_path)
+    try:
+        return dict(find_courses(conn, **filters))
+    finally:
+        conn.close()
+
+
+def search_text(conn, query, limit=20):
+    """
+    授業名・本文の部分一致検索 (空白区切りの語をすべて含む授業を講義コード順に)。
+    3文字以上の語は trigram 索引で絞り込まれ、2文字以下の語は全文を走査する。
+    どちらも英字の大文字小文字は区別しない。
+    LIKE の ESCAPE を付けると索引が使われなくなるため、% と _ は語の区切りとして扱う。
+    戻り値: [(講義コード, 授業名), ...]
+    """
+    terms = [t for t in re.split(r"[\s%_]+", query) if t]
+    if not terms:
+        return []
+    # 3文字以上は LIKE (trigram 索引)。短い語を LIKE にすると FTS5 が索引で答えようとして
+    # 何も返さないため、instr で本文を直接調べる (索引で絞った後の候補だけに適用される)。
+    # LIKE と trigram 索引は ASCII の大文字小文字を区別しないので、instr も lower() で揃える
+    conditions, params = [], []
+    for t in sorted(terms, key=len, reverse=True):
+        if len(t) >= MIN_TRIGRAM:
+            conditions.append("course_text.text LIKE ?")
+            params.append(f"%{t}%")
+        else:
+            conditions.append("instr(lower(course_text.text), lower(?)) > 0")
+            params.append(t)
+    conditions = " AND ".join(conditions)
+    # CROSS JOIN で全文索引を外側に固定する (JOIN だと courses を走査して1行ずつ全文索引を引く計画になる)
+    sql = (f"SELECT courses.code, courses.name FROM course_text CROSS JOIN courses ON courses.rowid = course_text.rowid "
+           f"WHERE {conditions} ORDER BY courses.code LIMIT ?")
+    return conn.execute(sql, params + [limit]).fetchall()
+
+
+def main():
+    if len(sys.argv) < 3 or sys.argv[1] not in ("ingest", "get", "search"):
+        print("Usage: python syllabus_db.py ingest <file> [...] | get <講義コード> | search <語> [...]")
+        return
+    command, args = sys.argv[1], sys.argv[2:]
+
+    if command == "ingest":
+        start = time.perf_counter()
+        count = ingest(args)
+        print(f"完了！ {count} 件を '{DB_FILE}' に取り込みました ({time.perf_counter() - start:.1f}s)。")
+        return
+
+    conn = connect()
+    try:
+        if command == "get":
+            course = get_course(conn, args[0])
+            print(json.dumps(course, ensure_ascii=False, indent=2) if course else f"{args[0]} は見つかりません。")
+        else:
+            for code, name in search_text(conn, " ".join(args)):
+                print(f"{code}  {name}")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
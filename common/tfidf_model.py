@@ -0,0 +1,133 @@
+# ==========================================
+# Script Name: tfidf_model.py
+# Description:
+#   [EN] Persisted TF-IDF model (vocabulary, idf weights, tf/normalisation
+#        config) saved from a fitted sklearn TfidfVectorizer, so search
+#        processes can transform queries without refitting or importing
+#        sklearn. load_model() is lazy: the JSON is parsed on the first
+#        attribute access (first query), not at import / startup, and the
+#        parsed model is cached per file until its mtime changes. Parsing
+#        is O(vocabulary) (about 1 ms for 1k terms, see
+#        benchmark/bench_tfidf_model.py); the file is not memory-mapped.
+#        Used by v2/preprocess002.py (save), v2/search_service.py and
+#        common/TFidVectorizer.py (load).
+#   [JP] 学習済みの TF-IDF モデル (語彙・IDF・正規化の設定) を保存/読み込みします。
+#        検索側は再学習せずにクエリをベクトル化できます (sklearn も不要)。
+#
+# Data Flow:
+#   Input  : (保存) 学習済みの TfidfVectorizer
+#   Output : tfidf_model.json
+#            {"v": [語 (列番号順)], "idf": [IDF], "cfg": {lowercase, token_pattern, norm, sublinear_tf, use_idf}}
+# ==========================================
+
+import json
+import math
+import os
+import re
+from collections import Counter
+import numpy as np
+from scipy import sparse
+
+CONFIG_KEYS = ("lowercase", "token_pattern", "norm", "sublinear_tf", "use_idf")
+# TfidfVectorizer の既定値 (sklearn 無しでモデルを作る場合: stream_vectorize.py)
+DEFAULT_CONFIG = {"lowercase": True, "token_pattern": r"(?u)\b\w\w+\b", "norm": "l2",
+                  "sublinear_tf": False, "use_idf": True}
+
+_loaded = {}  # パス -> (更新時刻, TfidfModel)
+
+
+class TfidfModel:
+    def __init__(self, vocabulary, idf, config):
+        self.words = list(vocabulary)
+        self.vocabulary = {w: k for k, w in enumerate(self.words)}
+        self.idf = np.asarray(idf, dtype=np.float64)
+        self.config = dict(config)
+        self._token_re = re.compile(self.config["token_pattern"])
+
+    @classmethod
+    def from_vectorizer(cls, vectorizer):
+        """学習済みの sklearn TfidfVectorizer から作る (単語1つずつの特徴量のみ対応)"""
+        if vectorizer.ngram_range != (1, 1) or vectorizer.analyzer != "word":
+            raise ValueError("TfidfModel は analyzer='word', ngram_range=(1, 1) のみ対応しています")
+        words = [None] * len(vectorizer.vocabulary_)
+        for word, idx in vectorizer.vocabulary_.items():
+            words[idx] = word
+        idf = vectorizer.idf_ if vectorizer.use_idf else np.ones(len(words))
+        return cls(words, idf, {key: getattr(vectorizer, key) for key in CONFIG_KEYS})
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data["v"], data["idf"], data["cfg"])
+
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"v": self.words, "idf": [round(float(x), 6) for x in self.idf], "cfg": self.config},
+                      f, ensure_ascii=False, separators=(',', ':'))
+
+    def analyze(self, doc):
+        """TfidfVectorizer の既定の分割 (小文字化 + token_pattern)"""
+        if self.config["lowercase"]:
+            doc = doc.lower()
+        return self._token_re.findall(doc)
+
+    def transform_counts(self, counts):
+        """{列番号: 出現回数} -> (列番号の配列, 重みの配列) (正規化済み)"""
+        if not counts:
+            return np.zeros(0, dtype=np.int32), np.zeros(0)
+        indices = np.fromiter(sorted(counts), dtype=np.int32, count=len(counts))
+        tf = np.array([counts[i] for i in indices], dtype=np.float64)
+        if self.config["sublinear_tf"]:
+            tf = 1.0 + np.log(tf)
+        values = tf * self.idf[indices]
+        if self.config["norm"] == "l2":
+            values /= math.sqrt(float(values @ values)) or 1.0
+        elif self.config["norm"] == "l1":
+            values /= float(np.abs(values).sum()) or 1.0
+        return indices, values
+
+    def transform_doc(self, doc):
+        """分かち書き済みの文字列1つ -> (列番号, 重み)"""
+        counts = Counter(self.vocabulary[w] for w in self.analyze(doc) if w in self.vocabulary)
+        return self.transform_counts(counts)
+
+    def transform(self, docs):
+        """分かち書き済みの文字列のリスト -> CSR 行列 (TfidfVectorizer.transform と同じ結果)"""
+        indptr, indices, values = [0], [], []
+        for doc in docs:
+            idx, val = self.transform_doc(doc)
+            indices.append(idx)
+            values.append(val)
+            indptr.append(indptr[-1] + len(idx))
+        return sparse.csr_matrix(
+            (np.concatenate(values) if values else np.zeros(0),
+             np.concatenate(indices) if indices else np.zeros(0, dtype=np.int32), indptr),
+            shape=(len(docs), len(self.words)))
+
+
+class LazyTfidfModel:
+    """最初に属性を使ったときに TfidfModel.load する (起動時には読まない)"""
+
+    def __init__(self, path):
+        self._path = path
+        self._model = None
+
+    @property
+    def loaded(self):
+        return self._model is not None
+
+    def __getattr__(self, name):
+        if self._model is None:
+            self._model = TfidfModel.load(self._path)
+        return getattr(self._model, name)
+
+
+def load_model(path):
+    """モデルを返す (読み込みは最初に使うときまで遅らせ、同じファイルは更新されるまで読み直さない)"""
+    mtime = os.path.getmtime(path)
+    cached = _loaded.get(path)
+    if cached is None or cached[0] != mtime:
+        cached = (mtime, LazyTfidfModel(path))
+        _loaded[path] = cached
+    return cached[1]
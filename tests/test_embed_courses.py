@@ -0,0 +1,147 @@
+# ==========================================
+# Script Name: test_embed_courses.py
+# Description:
+#   [EN] Tests for v2/embed_courses.py with a stub encoder (no
+#        sentence-transformers model): length-sorted batching, reuse of
+#        unchanged rows, re-encoding of changed texts, and the shape /
+#        normalisation of the saved .npy + index.
+#   [JP] v2/embed_courses.py のテスト。モデルの代わりにスタブのエンコーダを使い、
+#        バッチ化・変わっていない授業の再利用・変わった授業の再エンコード・
+#        保存したファイルの形と正規化を確かめます。
+#
+# Usage:
+#   python -m pytest -q tests
+# ==========================================
+
+import json
+import os
+import sys
+
+import numpy as np
+import pytest
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(base_dir, "../v2"))
+sys.path.append(os.path.join(base_dir, "../common"))
+
+from embed_courses import course_text, encode_sorted, load_embeddings, update_embeddings
+
+DIM = 8
+
+
+class StubEncoder:
+    """encode(list_of_texts) -> ndarray。呼ばれたバッチを記録し、文字コードから決まったベクトルを返す"""
+
+    def __init__(self, dim=DIM):
+        self.dim = dim
+        self.batches = []
+
+    def encode(self, texts):
+        self.batches.append(list(texts))
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for k, ch in enumerate(text):
+                out[row, (ord(ch) + k) % self.dim] += 1.0
+        return out
+
+    @property
+    def encoded(self):
+        return [text for batch in self.batches for text in batch]
+
+
+def course(name, overview="", message=""):
+    return {"授業科目名": name, "授業の目標・概要等": overview, "メッセージ": message}
+
+
+@pytest.fixture
+def syllabus():
+    return {
+        "A001": course("線形代数", "行列と線形写像の基礎を学ぶ。"),
+        "A002": course("統計学", "記述統計と推測統計。", "電卓を持参すること。"),
+        "A003": course("英語", "Reading and writing."),
+        "A004": course("哲学入門 [再履修]", "問いの立て方を考える長めの概要です。" * 3),
+        "A005": course("体育"),
+    }
+
+
+@pytest.fixture
+def paths(tmp_path):
+    return {"path": str(tmp_path / "emb.npy"), "index_path": str(tmp_path / "emb.json")}
+
+
+def test_encode_sorted_batches_by_length_and_restores_order():
+    texts = ["x" * n for n in (7, 1, 5, 3, 6, 2, 4)]
+    encoder = StubEncoder()
+    result = encode_sorted(encoder, texts, batch_size=3)
+
+    assert [len(batch) for batch in encoder.batches] == [3, 3, 1]
+    lengths = [[len(t) for t in batch] for batch in encoder.batches]
+    assert lengths == [[1, 2, 3], [4, 5, 6], [7]]
+    # 元の順番に戻っている
+    expected = encode_sorted(StubEncoder(), texts, batch_size=len(texts))
+    np.testing.assert_allclose(result, expected)
+    assert result.dtype == np.float32
+    np.testing.assert_allclose(np.linalg.norm(result, axis=1), 1.0, rtol=1e-6)
+
+
+def test_saved_store_shape_and_normalisation(syllabus, paths):
+    stats = update_embeddings(syllabus, StubEncoder(), model_name="stub", batch_size=2, **paths)
+
+    assert stats["total"] == stats["encoded"] == len(syllabus)
+    assert stats["reused"] == 0
+    index, matrix = load_embeddings(**paths)
+    assert index["model"] == "stub"
+    assert index["dim"] == DIM
+    assert index["i"] == list(syllabus)
+    assert len(index["h"]) == len(syllabus)
+    assert matrix.shape == (len(syllabus), DIM)
+    assert matrix.dtype == np.float32
+    np.testing.assert_allclose(np.linalg.norm(matrix, axis=1), 1.0, rtol=1e-6)
+    assert not os.path.exists(paths["path"] + ".tmp.npy")
+
+
+def test_unchanged_texts_are_reused(syllabus, paths):
+    update_embeddings(syllabus, StubEncoder(), model_name="stub", **paths)
+    _, first = load_embeddings(**paths)
+    first = np.array(first)
+
+    encoder = StubEncoder()
+    stats = update_embeddings(syllabus, encoder, model_name="stub", **paths)
+
+    assert encoder.batches == []
+    assert stats["encoded"] == 0
+    assert stats["reused"] == len(syllabus)
+    _, second = load_embeddings(**paths)
+    np.testing.assert_array_equal(second, first)
+
+
+def test_changed_and_new_texts_are_reencoded(syllabus, paths):
+    update_embeddings(syllabus, StubEncoder(), model_name="stub", **paths)
+    _, before = load_embeddings(**paths)
+    before = np.array(before)
+
+    changed = dict(syllabus)
+    changed["A002"] = course("統計学", "ベイズ統計を扱う。")
+    changed["A006"] = course("データサイエンス", "Python で分析する。")
+    encoder = StubEncoder()
+    stats = update_embeddings(changed, encoder, model_name="stub", **paths)
+
+    assert sorted(encoder.encoded) == sorted([course_text(changed["A002"]), course_text(changed["A006"])])
+    assert (stats["total"], stats["encoded"], stats["reused"]) == (6, 2, 4)
+    index, after = load_embeddings(**paths)
+    assert index["i"] == list(changed)
+    for k, cid in enumerate(syllabus):
+        if cid != "A002":
+            np.testing.assert_array_equal(after[k], before[k])
+    assert not np.allclose(after[1], before[1])
+
+
+def test_model_change_reencodes_everything(syllabus, paths):
+    update_embeddings(syllabus, StubEncoder(), model_name="stub", **paths)
+    encoder = StubEncoder()
+    stats = update_embeddings(syllabus, encoder, model_name="stub-v2", **paths)
+
+    assert stats["encoded"] == len(syllabus)
+    assert len(encoder.encoded) == len(syllabus)
+    with open(paths["index_path"], "r", encoding="utf-8") as f:
+        assert json.load(f)["model"] == "stub-v2"
@@ -4,26 +4,35 @@
 #   [EN] Advanced visualization using K-Means clustering and t-SNE projection.
 #        Groups courses into semantic clusters and projects them into 3D space.
 #        Prints top keywords for each cluster to console.
+#        Clustering runs on the sparse CSR matrix (sparse_cluster.py); the
+#        3D coordinates come from projection_map.npz, which preprocess002.py
+#        keeps up to date (projection.py); without it they are computed here.
 #   [JP] K-Meansクラスタリングとt-SNE射影を使用した高度な可視化スクリプト。
 #        授業を意味的なクラスタにグループ化し、3次元空間に射影します。
 #        各クラスタの上位キーワードをコンソールに出力します。
+#        クラスタリングは疎行列のまま行い (sparse_cluster.py)、
+#        3次元座標は preprocess002.py が保存した projection_map.npz (projection.py) から取得します。
 #
 # Data Flow:
 #   Input  : syllabus_vectors.json
 #          : course_metadata.json
+#          : cluster_model.npz (任意: select_k.py で選んだ k のモデル。同じ syllabus_vectors.json から作ったときだけ使う)
+#          : projection_map.npz (t-SNE 座標, preprocess002.py の出力)
 #   Output : (3D Plot Window / 3Dプロットウィンドウ)
 #          : (Console Output / コンソール出力) - Cluster Keywords
 # ==========================================
 
 import json
+import os
 import numpy as np
 import matplotlib.pyplot as plt
 from mpl_toolkits.mplot3d import Axes3D
-from sklearn.cluster import KMeans
-from sklearn.manifold import TSNE
 import sys
 import matplotlib
 
+from projection import ProjectionMap, file_digest, load_projection
+from sparse_cluster import SphericalKMeans, to_csr, top_keywords
+
 # Set Japanese font for Windows
 plt.rcParams['font.family'] = 'MS Gothic'
 
@@ -44,46 +53,50 @@ def main():
         print(f"Error loading files: {e}")
         return
 
-    # 2. Reconstruct Vectors
+    # 2. Reconstruct Vectors (sparse, L2-normalised rows)
     print("Reconstructing vectors...")
     vocab = vector_data["v"]
-    # Reverse vocab for keyword lookup: index -> word
-    # vocab is essentially a list where index matches the vector index, OR a dict word->index.
-    # Checking structure... usually "v" is a dict {word: index}.
-    # Let's handle both just in case, or assume dict based on previous knowledge.
-    # Previous viewing showed "v": vocabulary (likely dict).
+    # "v" is a dict {word: index}; reverse it for keyword lookup: index -> word
     index_to_word = {v: k for k, v in vocab.items()}
-    
-    sparse_vectors = vector_data["d"]
     course_ids = vector_data["i"]
-    vocab_size = len(vocab)
-    
-    num_courses = len(course_ids)
-    dense_matrix = np.zeros((num_courses, vocab_size))
-    
-    for idx, (indices, values) in enumerate(sparse_vectors):
-        for col, val in zip(indices, values):
-            dense_matrix[idx, col] = val
-            
-    # 3. K-Means Clustering
-    k = 12  # Adjustable number of clusters
-    print(f"Applying K-Means Clustering (k={k})...")
-    kmeans = KMeans(n_clusters=k, random_state=42, n_init=10)
-    clusters = kmeans.fit_predict(dense_matrix)
-    
+    sparse_matrix = to_csr(vector_data)
+
+    # 3. K-Means Clustering (spherical k-means on the CSR rows)
+    # Use the model chosen by select_k.py when it was fitted on this syllabus_vectors.json
+    # (preprocess002.py refits TF-IDF every run, so the centres' columns change with the vocabulary)
+    vector_digest = file_digest(vector_path)
+    model_path = os.path.join(base_dir, "cluster_model.npz")
+    model = np.load(model_path) if os.path.exists(model_path) else None
+    if model is not None and ("source" not in model.files or str(model["source"]) != vector_digest):
+        print("cluster_model.npz was fitted on another syllabus_vectors.json; refitting (run select_k.py to update it)")
+        model = None
+    if model is not None and model["ids"].tolist() == course_ids:
+        k = int(model["k"])
+        print(f"Using cluster model from select_k.py (k={k})...")
+        centers = model["centers"]
+        clusters = model["labels"]
+    else:
+        k = 12  # Adjustable number of clusters (run select_k.py to choose it)
+        print(f"Applying K-Means Clustering (k={k})...")
+        kmeans = SphericalKMeans(n_clusters=k, random_state=42)
+        clusters = kmeans.fit_predict(sparse_matrix)
+        centers = kmeans.cluster_centers_
+
     # Analyze Clusters (Top Keywords)
     print("\n--- Cluster Interpretations ---")
-    centers = kmeans.cluster_centers_
+    keywords = top_keywords(centers, index_to_word, n_words=10)
     for i in range(k):
-        # Get indices of top 10 features for this cluster centroid
-        top_features_ind = centers[i].argsort()[-10:][::-1]
-        top_words = [index_to_word.get(ind, f"word_{ind}") for ind in top_features_ind]
-        print(f"Cluster {i}: {', '.join(top_words)}")
+        print(f"Cluster {i}: {', '.join(keywords[i])}")
 
-    # 4. t-SNE Projection (High Dim -> 3D)
-    print("\nApplying t-SNE (3D projection)... this may take a moment.")
-    tsne = TSNE(n_components=3, random_state=42, perplexity=30, learning_rate=200, init='pca')
-    projections = tsne.fit_transform(dense_matrix)
+    # 4. t-SNE Projection (SVD -> Barnes-Hut t-SNE, saved by preprocess002.py)
+    print("\nApplying t-SNE (3D projection)...")
+    projection = load_projection(course_ids, vector_digest)
+    if projection is None:
+        # projection_map.npz が無い・古い: この場で計算する (preprocess002.py を実行すると保存される)
+        print("projection_map.npz does not match syllabus_vectors.json; recomputing (run preprocess002.py to cache it)")
+        projection = ProjectionMap.fit(sparse_matrix, course_ids)
+    projections = projection.coords
+    print(f"Projection: {projection.mode} ({int(projection.placed.sum())} courses placed from neighbours)")
     
     # 5. Visualize
     print("Visualizing...")
@@ -112,9 +125,7 @@ def main():
     # Create cluster labels for legend
     cluster_labels = {}
     for i in range(k):
-        top_features_ind = centers[i].argsort()[-3:][::-1] # Top 3 words
-        top_words = [index_to_word.get(ind, f"word_{ind}") for ind in top_features_ind]
-        cluster_labels[i] = f"{i}: {', '.join(top_words)}"
+        cluster_labels[i] = f"{i}: {', '.join(keywords[i][:3])}"
 
     # Add labels for legend
     handles, _ = scatter.legend_elements()
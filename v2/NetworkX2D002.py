@@ -33,6 +33,9 @@ import matplotlib.pyplot as plt
 from sklearn.metrics.pairwise import cosine_similarity
 import os
 
+# 色分け: "community" (course_metadata.json の "c", communities.py) / "field" (分野)
+color_by = "community"
+
 # Global references for interactivity
 scatters = {}
 legend_map = {}
@@ -83,7 +86,10 @@ def main():
     for idx, cid in enumerate(course_ids):
         info = metadata.get(cid, {})
         title = info.get("n", cid)
-        field = info.get("f", "Unknown")
+        if color_by == "community" and "c" in info:
+            field = f"Community {info['c']:02d}"
+        else:
+            field = info.get("f", "Unknown")
         G.add_node(cid, title=title, field=field, node_type="course")
         
     # Add Similarity Edges
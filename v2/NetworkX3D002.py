@@ -3,10 +3,10 @@
 # Description:
 #   [EN] Visualizes the course similarity network in 3D.
 #        Nodes are courses, edges represent cosine similarity > threshold (0.2).
-#        Colors represent the course field.
+#        Colors represent the detected community (or the course field).
 #   [JP] 授業の類似度ネットワークを3次元で可視化します。
 #        ノードは授業を表し、エッジはコサイン類似度がしきい値（0.2）を超えた場合に結ばれます。
-#        色は授業の分野を表します。
+#        色はコミュニティ (communities.py) または授業の分野を表します。
 #
 # Data Flow:
 #   Input  : syllabus_vectors.json
@@ -23,6 +23,9 @@ from sklearn.metrics.pairwise import cosine_similarity
 import sys
 import os
 
+# 色分け: "community" (course_metadata.json の "c", communities.py) / "field" (分野)
+color_by = "community"
+
 def main():
     # 1. Load Data
     print("Loading data...")
@@ -66,7 +69,10 @@ def main():
     for idx, cid in enumerate(course_ids):
         info = metadata.get(cid, {})
         title = info.get("n", cid)
-        field = info.get("f", "Unknown")
+        if color_by == "community" and "c" in info:
+            field = f"Community {info['c']:02d}"
+        else:
+            field = info.get("f", "Unknown")
         G.add_node(cid, title=title, field=field)
         
     # Add edges
@@ -0,0 +1,78 @@
+// ==========================================
+// Script Name: binary_codec.js
+// Description:
+//   [EN] Browser-side decoder for the binary artifacts written by binary_codec.py.
+//        Layout is documented at the top of binary_codec.py.
+//   [JP] binary_codec.py が書き出すバイナリ成果物のブラウザ側デコーダです。
+//
+// Usage:
+//   const blob = decodeSyllabusBlob(await (await fetch('recommendations.bin')).arrayBuffer());
+//   const recs = recommendationsFromBlob(blob); // recommendations.json と同じ形
+// ==========================================
+
+function decodeSyllabusBlob(buffer) {
+    const view = new DataView(buffer);
+    const magic = String.fromCharCode(view.getUint8(0), view.getUint8(1), view.getUint8(2), view.getUint8(3));
+    if (magic !== "HUSB" || view.getUint8(4) !== 1) throw new Error("Not a syllabus binary blob");
+
+    const kind = view.getUint8(5);
+    const scoreBits = view.getUint8(6);
+    const indexBits = view.getUint8(7);
+    const nRows = view.getUint32(8, true);
+    const nEntries = view.getUint32(12, true);
+    const decoder = new TextDecoder("utf-8");
+    let pos = 16;
+
+    function readLabels(count) {
+        const offsets = new Uint32Array(buffer, pos, count + 1);
+        pos += offsets.byteLength;
+        const bytes = new Uint8Array(buffer, pos, offsets[count]);
+        const labels = new Array(count);
+        for (let k = 0; k < count; k++) labels[k] = decoder.decode(bytes.subarray(offsets[k], offsets[k + 1]));
+        pos += bytes.byteLength;
+        pos += (4 - (pos % 4)) % 4;
+        return labels;
+    }
+
+    const rowLabels = readLabels(nRows);
+    let colLabels = rowLabels;
+    if (kind === 2) {
+        const nCols = view.getUint32(pos, true);
+        pos += 4;
+        colLabels = readLabels(nCols);
+    }
+
+    const rowPtr = new Uint32Array(buffer, pos, nRows + 1);
+    pos += rowPtr.byteLength;
+    const deltas = indexBits === 16 ? new Uint16Array(buffer, pos, nEntries) : new Uint32Array(buffer, pos, nEntries);
+    pos += deltas.byteLength;
+    pos += (4 - (pos % 4)) % 4;
+    const quantised = scoreBits === 8 ? new Uint8Array(buffer, pos, nEntries) : new Uint16Array(buffer, pos, nEntries);
+    const qMax = (1 << scoreBits) - 1;
+
+    // 差分を行ごとに戻す
+    const indices = new Uint32Array(nEntries);
+    const scores = new Float32Array(nEntries);
+    for (let r = 0; r < nRows; r++) {
+        let acc = 0;
+        for (let e = rowPtr[r]; e < rowPtr[r + 1]; e++) {
+            acc += deltas[e];
+            indices[e] = acc;
+            scores[e] = quantised[e] / qMax;
+        }
+    }
+    return { kind, rowLabels, colLabels, rowPtr, indices, scores };
+}
+
+function recommendationsFromBlob(blob) {
+    const recs = {};
+    blob.rowLabels.forEach((id, r) => {
+        const list = [];
+        for (let e = blob.rowPtr[r]; e < blob.rowPtr[r + 1]; e++) {
+            list.push([blob.colLabels[blob.indices[e]], blob.scores[e]]);
+        }
+        list.sort((a, b) => b[1] - a[1]);
+        recs[id] = list;
+    });
+    return recs;
+}
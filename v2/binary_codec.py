@@ -0,0 +1,190 @@
+# ==========================================
+# Script Name: binary_codec.py
+# Description:
+#   [EN] Optional compact binary encoding of the browser-facing artifacts
+#        (recommendations.json and the sparse vectors of syllabus_vectors.json).
+#        Course IDs are interned to integer indices, scores are quantised to
+#        uint8/uint16 and column indices are delta-encoded per row.
+#        The layout is typed-array friendly (every section is 4-byte aligned)
+#        so the browser can decode it with DataView / Uint16Array.
+#        See binary_codec.js for the browser-side decoder.
+#   [JP] ブラウザ向け成果物のコンパクトなバイナリ形式（任意）。
+#        授業IDを整数番号に置き換え、スコアを uint8/uint16 に量子化し、
+#        列番号は行ごとに差分符号化します。
+#
+# Data Flow:
+#   Input  : recommendations.json / syllabus_vectors.json (の中身)
+#   Output : recommendations.bin / syllabus_vectors.bin
+#
+# Layout (little-endian, 各セクションは4バイト境界に揃える):
+#   Header (16 bytes)
+#     magic      : 4 bytes  b"HUSB"
+#     version    : uint8    (=1)
+#     kind       : uint8    1=recommendations, 2=vectors
+#     score_bits : uint8    8 or 16
+#     index_bits : uint8    16 or 32
+#     n_rows     : uint32   行数 (授業数)
+#     n_entries  : uint32   非ゼロ要素数
+#   Row label table  : uint32 offsets[n_rows + 1], UTF-8 bytes (授業ID)
+#   Col label table  : kind=2 のみ。uint32 n_cols, uint32 offsets[n_cols + 1], UTF-8 bytes (語彙)
+#                      kind=1 の列は行と同じ授業ID表を参照する
+#   Row pointers     : uint32[n_rows + 1] (CSR 形式)
+#   Indices          : uint16/uint32[n_entries] 行内で昇順に並べ、先頭以外は直前との差分
+#   Scores           : uint8/uint16[n_entries] 値 = q / (2**score_bits - 1)
+# ==========================================
+
+import struct
+import numpy as np
+
+MAGIC = b"HUSB"
+VERSION = 1
+KIND_RECOMMENDATIONS = 1
+KIND_VECTORS = 2
+HEADER = struct.Struct("<4sBBBBII")
+
+
+def _pad4(buf):
+    """4バイト境界までゼロ埋めする"""
+    rest = len(buf) % 4
+    if rest:
+        buf.extend(b"\x00" * (4 - rest))
+
+
+def _write_labels(buf, labels):
+    encoded = [str(label).encode("utf-8") for label in labels]
+    offsets = np.zeros(len(encoded) + 1, dtype="<u4")
+    offsets[1:] = np.cumsum([len(e) for e in encoded])
+    buf.extend(offsets.tobytes())
+    buf.extend(b"".join(encoded))
+    _pad4(buf)
+
+
+def _read_labels(blob, pos, count):
+    offsets = np.frombuffer(blob, dtype="<u4", count=count + 1, offset=pos)
+    pos += offsets.nbytes
+    raw = bytes(blob[pos:pos + int(offsets[-1])])
+    labels = [raw[offsets[k]:offsets[k + 1]].decode("utf-8") for k in range(count)]
+    pos += len(raw)
+    pos += (-pos) % 4
+    return labels, pos
+
+
+def encode_csr(kind, row_labels, rows, col_labels=None, score_bits=8):
+    """
+    rows: 行ごとの (列番号リスト, 値リスト)。値は 0〜1 の範囲を想定。
+    戻り値: バイナリ (bytes)
+    """
+    if score_bits not in (8, 16):
+        raise ValueError("score_bits must be 8 or 16")
+    n_cols = len(col_labels) if col_labels is not None else len(row_labels)
+    index_bits = 16 if n_cols <= 0xFFFF else 32
+    index_dtype = "<u2" if index_bits == 16 else "<u4"
+    score_dtype = "<u1" if score_bits == 8 else "<u2"
+    q_max = (1 << score_bits) - 1
+
+    row_ptr = np.zeros(len(rows) + 1, dtype="<u4")
+    row_ptr[1:] = np.cumsum([len(indices) for indices, _ in rows])
+    n_entries = int(row_ptr[-1])
+
+    indices_out = np.zeros(n_entries, dtype=np.int64)
+    scores_out = np.zeros(n_entries, dtype=np.float64)
+    for r, (indices, values) in enumerate(rows):
+        if not len(indices):
+            continue
+        start, end = row_ptr[r], row_ptr[r + 1]
+        order = np.argsort(indices, kind="stable")
+        sorted_idx = np.asarray(indices, dtype=np.int64)[order]
+        indices_out[start:end] = np.diff(sorted_idx, prepend=0)
+        scores_out[start:end] = np.asarray(values, dtype=np.float64)[order]
+
+    quantised = np.rint(np.clip(scores_out, 0.0, 1.0) * q_max).astype(score_dtype)
+
+    buf = bytearray(HEADER.pack(MAGIC, VERSION, kind, score_bits, index_bits, len(rows), n_entries))
+    _write_labels(buf, row_labels)
+    if col_labels is not None:
+        buf.extend(struct.pack("<I", len(col_labels)))
+        _write_labels(buf, col_labels)
+    buf.extend(row_ptr.tobytes())
+    buf.extend(indices_out.astype(index_dtype).tobytes())
+    _pad4(buf)
+    buf.extend(quantised.tobytes())
+    _pad4(buf)
+    return bytes(buf)
+
+
+def decode_csr(blob):
+    """
+    encode_csr の逆変換。
+    戻り値: (kind, row_labels, col_labels, row_ptr, indices, scores)
+      indices は差分を戻した絶対番号, scores は float32
+    """
+    magic, version, kind, score_bits, index_bits, n_rows, n_entries = HEADER.unpack_from(blob, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("not a syllabus binary blob (bad magic or version)")
+    pos = HEADER.size
+    row_labels, pos = _read_labels(blob, pos, n_rows)
+    col_labels = None
+    if kind == KIND_VECTORS:
+        (n_cols,) = struct.unpack_from("<I", blob, pos)
+        col_labels, pos = _read_labels(blob, pos + 4, n_cols)
+
+    row_ptr = np.frombuffer(blob, dtype="<u4", count=n_rows + 1, offset=pos)
+    pos += row_ptr.nbytes
+    index_dtype = "<u2" if index_bits == 16 else "<u4"
+    deltas = np.frombuffer(blob, dtype=index_dtype, count=n_entries, offset=pos).astype(np.int64)
+    pos += deltas.size * (index_bits // 8)
+    pos += (-pos) % 4
+    score_dtype = "<u1" if score_bits == 8 else "<u2"
+    quantised = np.frombuffer(blob, dtype=score_dtype, count=n_entries, offset=pos)
+    scores = quantised.astype(np.float32) / np.float32((1 << score_bits) - 1)
+
+    # 行ごとの累積和で差分を戻す: 全体の cumsum から各行先頭の直前値を引く
+    absolute = np.cumsum(deltas)
+    starts = row_ptr[:-1].astype(np.int64)
+    lengths = np.diff(row_ptr).astype(np.int64)
+    base = np.where(starts > 0, absolute[np.maximum(starts - 1, 0)], 0) if n_entries else starts
+    indices = absolute - np.repeat(base, lengths)
+    return kind, row_labels, col_labels, row_ptr, indices, scores
+
+
+def encode_recommendations(recommendations, score_bits=8):
+    """recommendations.json の辞書 {ID: [[ID, score], ...]} をバイナリ化する"""
+    course_ids = list(recommendations.keys())
+    id_to_index = {cid: k for k, cid in enumerate(course_ids)}
+    rows = []
+    for cid in course_ids:
+        pairs = [(id_to_index[rid], score) for rid, score in recommendations[cid] if rid in id_to_index]
+        rows.append(([p[0] for p in pairs], [p[1] for p in pairs]))
+    return encode_csr(KIND_RECOMMENDATIONS, course_ids, rows, score_bits=score_bits)
+
+
+def decode_recommendations(blob):
+    """バイナリから recommendations.json と同じ形の辞書を復元する (スコア降順)"""
+    _, course_ids, _, row_ptr, indices, scores = decode_csr(blob)
+    recommendations = {}
+    for r, cid in enumerate(course_ids):
+        start, end = row_ptr[r], row_ptr[r + 1]
+        pairs = [[course_ids[j], round(float(s), 3)] for j, s in zip(indices[start:end], scores[start:end])]
+        pairs.sort(key=lambda x: x[1], reverse=True)
+        recommendations[cid] = pairs
+    return recommendations
+
+
+def encode_vectors(vector_data, score_bits=16):
+    """syllabus_vectors.json の v/d/i をバイナリ化する (skills は JSON 側に残す)"""
+    vocab = vector_data["v"]
+    col_labels = [None] * len(vocab)
+    for word, idx in vocab.items():
+        col_labels[idx] = word
+    rows = [(indices, values) for indices, values in vector_data["d"]]
+    return encode_csr(KIND_VECTORS, vector_data["i"], rows, col_labels=col_labels, score_bits=score_bits)
+
+
+def decode_vectors(blob):
+    """バイナリから {"v", "d", "i"} を復元する"""
+    _, course_ids, words, row_ptr, indices, scores = decode_csr(blob)
+    sparse_vectors = []
+    for r in range(len(course_ids)):
+        start, end = row_ptr[r], row_ptr[r + 1]
+        sparse_vectors.append([indices[start:end].tolist(), np.round(scores[start:end], 3).tolist()])
+    return {"v": {w: k for k, w in enumerate(words)}, "d": sparse_vectors, "i": course_ids}
@@ -0,0 +1,167 @@
+# ==========================================
+# Script Name: columnar_metadata.py
+# Description:
+#   [EN] Columnar layout of course_metadata.json. The dict-of-dicts repeats
+#        the same department / term / 領域 / 分野 strings in every course and
+#        filters have to visit every object. Here each repeated column is
+#        dictionary-encoded (sorted distinct values + one integer code per
+#        course), so a filter is an integer comparison over a NumPy array
+#        (or a typed array in the browser), "contains" filters are evaluated
+#        once per distinct value, and the filter dropdowns read the
+#        dictionaries directly. Course names are kept as a plain column.
+#        The optional near-duplicate group ("g", only on grouped courses) is
+#        dictionary-encoded too, with "" for courses that have none, so
+#        to_dict() round-trips course_metadata.json.
+#   [JP] course_metadata.json の列指向版です。部局・開設期・領域・分野などの
+#        繰り返し出てくる文字列は「値の一覧 + 授業ごとの整数コード」に置き換え、
+#        絞り込みを NumPy 配列 (ブラウザでは型付き配列) の比較で行えるようにします。
+#
+# Data Flow:
+#   Input  : (preprocess002.py から呼び出し) 授業ID, メタデータ
+#   Output : course_columns.json
+#
+# Layout:
+#   {"ver": 1, "ids": [授業ID, ...],
+#    "dict":  {"d": [部局名 (昇順), ...], "t": [...], "w": [...], "i": [...], "a": [...], "f": [...]},
+#    "codes": {"d": [値の番号, ...], ..., "g": [...]},   (授業ごと、ids と同じ順。"g" は無い授業が "")
+#    "cols":  {"n": [授業名, ...], "c": [コミュニティ番号, ...]}}
+# ==========================================
+
+import json
+import numpy as np
+
+COLUMNS_VERSION = 1
+JSON_SEPARATORS = (',', ':')
+
+# 値の一覧 + 整数コードにする列 / そのまま持つ列 (course_metadata.json のキー)
+CATEGORICAL_COLUMNS = ["d", "t", "w", "i", "a", "f"]
+TEXT_COLUMNS = ["n"]
+INT_COLUMNS = ["c"]
+# 一部の授業にしか無い列 (値の一覧 + 整数コード、無い授業は "")。どの授業にも無ければ書かない
+OPTIONAL_COLUMNS = ["g"]
+
+
+def build_columns(course_ids, metadata_map):
+    """{授業ID: {n, d, t, ...}} を列指向の辞書にする (値の一覧は昇順)"""
+    rows = [metadata_map.get(cid, {}) for cid in course_ids]
+    dictionaries, codes = {}, {}
+    for col in CATEGORICAL_COLUMNS + [col for col in OPTIONAL_COLUMNS if any(col in row for row in rows)]:
+        values = [row.get(col, "") for row in rows]
+        dictionaries[col] = sorted(set(values))
+        number = {v: k for k, v in enumerate(dictionaries[col])}
+        codes[col] = [number[v] for v in values]
+    cols = {col: [row.get(col, "") for row in rows] for col in TEXT_COLUMNS}
+    for col in INT_COLUMNS:
+        if any(col in row for row in rows):
+            cols[col] = [int(row.get(col, -1)) for row in rows]
+    return {"ver": COLUMNS_VERSION, "ids": list(course_ids), "dict": dictionaries, "codes": codes, "cols": cols}
+
+
+def write_columns(path, course_ids, metadata_map):
+    """列指向のメタデータを保存し、書き込んだバイト数を返す"""
+    data = json.dumps(build_columns(course_ids, metadata_map), ensure_ascii=False,
+                      separators=JSON_SEPARATORS).encode("utf-8")
+    with open(path, "wb") as f:
+        f.write(data)
+    return len(data)
+
+
+def _code_dtype(n_values):
+    """値の数に収まる一番小さい符号なし整数型"""
+    for dtype in (np.uint8, np.uint16, np.uint32):
+        if n_values <= np.iinfo(dtype).max + 1:
+            return dtype
+    return np.uint64
+
+
+class ColumnarMetadata:
+    """
+    course_columns.json の読み込み。コード列は NumPy 配列で持ち、
+    絞り込みは真偽値の配列 (mask) を組み合わせて行う。
+    例: meta.filter(d="総合科学部", t="前期") -> 条件に合う行番号の配列
+    """
+
+    def __init__(self, data):
+        self.ids = data["ids"]
+        self.dictionaries = data["dict"]
+        self.codes = {col: np.asarray(codes, dtype=_code_dtype(len(self.dictionaries[col])))
+                      for col, codes in data["codes"].items()}
+        self.columns = {col: (np.asarray(values, dtype=np.int32) if col in INT_COLUMNS else values)
+                        for col, values in data["cols"].items()}
+        self._numbers = {}  # 列 -> {値: 番号} (最初に使うときに作る)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    @classmethod
+    def from_metadata(cls, course_ids, metadata_map):
+        return cls(build_columns(course_ids, metadata_map))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def values(self, col):
+        """列の値の一覧 (昇順。絞り込みのプルダウン用)"""
+        return self.dictionaries[col]
+
+    def code_of(self, col, value):
+        """値の番号 (無ければ -1)"""
+        if col not in self._numbers:
+            self._numbers[col] = {v: k for k, v in enumerate(self.dictionaries[col])}
+        return self._numbers[col].get(value, -1)
+
+    def equals(self, col, value):
+        """列が value と一致する行の mask"""
+        code = self.code_of(col, value)
+        if code < 0:
+            return np.zeros(len(self), dtype=bool)
+        return self.codes[col] == code
+
+    def contains(self, col, text):
+        """列が text を含む行の mask (判定は値の種類ごとに1回だけ)"""
+        hit = np.fromiter((text in v for v in self.dictionaries[col]), dtype=bool,
+                          count=len(self.dictionaries[col]))
+        return hit[self.codes[col]]
+
+    def filter(self, d=None, a=None, f=None, t=None, w=None, kw=None, limit=None):
+        """
+        demo002.html の runFilterSearch と同じ条件 (部局・領域・分野は一致、
+        開設期・曜日時限は部分一致、kw は授業名+教員名の部分一致・大文字小文字を区別しない)。
+        戻り値: 条件に合う行番号の配列 (元の順)
+        """
+        mask = np.ones(len(self), dtype=bool)
+        for col, value in (("d", d), ("a", a), ("f", f)):
+            if value:
+                mask &= self.equals(col, value)
+        for col, value in (("t", t), ("w", w)):
+            if value:
+                mask &= self.contains(col, value)
+        rows = np.flatnonzero(mask)
+        if kw:
+            # 授業名はほぼ一意なので、ほかの条件で絞った行だけ調べる
+            kw = kw.lower()
+            names, teachers = self.columns["n"], self.dictionaries["i"]
+            rows = np.array([r for r, i in zip(rows.tolist(), self.codes["i"][rows].tolist())
+                             if kw in (names[r] + teachers[i]).lower()], dtype=np.int64)
+        return rows[:limit] if limit is not None else rows
+
+    def row(self, k):
+        """k 行目を course_metadata.json と同じ形の辞書で返す"""
+        meta = {col: self.columns[col][k] for col in TEXT_COLUMNS}
+        for col in CATEGORICAL_COLUMNS:
+            meta[col] = self.dictionaries[col][self.codes[col][k]]
+        for col in INT_COLUMNS:
+            if col in self.columns:
+                meta[col] = int(self.columns[col][k])
+        for col in OPTIONAL_COLUMNS:
+            if col in self.codes:
+                value = self.dictionaries[col][self.codes[col][k]]
+                if value:
+                    meta[col] = value
+        return meta
+
+    def to_dict(self):
+        """course_metadata.json と同じ {授業ID: {...}} に戻す"""
+        return {cid: self.row(k) for k, cid in enumerate(self.ids)}
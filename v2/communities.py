@@ -0,0 +1,152 @@
+# ==========================================
+# Script Name: communities.py
+# Description:
+#   [EN] Community detection on a sparse kNN similarity graph.
+#        Builds a symmetric k-nearest-neighbour graph from the TF-IDF rows
+#        (neighbors.py, no N x N matrix) and runs Louvain modularity
+#        optimisation on it (local moving + aggregation, each pass is
+#        O(edges)). The community ID is written into course_metadata.json
+#        as "c" for colouring (NetworkX2D002 / NetworkX3D002) and for
+#        faceted search (search_service.py).
+#   [JP] 疎な kNN 類似度グラフ上でのコミュニティ検出です。
+#        TF-IDF の各授業の上位 k 件の類似授業からグラフを作り、Louvain 法
+#        (モジュラリティ最大化) で授業をまとめます。結果のコミュニティ番号を
+#        course_metadata.json の "c" に書き込みます (色分け・絞り込み検索用)。
+#
+# Data Flow:
+#   Input  : syllabus_vectors.json
+#          : course_metadata.json
+#   Output : course_metadata.json (各授業に "c": コミュニティ番号 を追加)
+#
+# Usage:
+#   python communities.py      # 既存の成果物に "c" を追記 (preprocess002.py も実行時に付与します)
+# ==========================================
+
+import json
+import os
+import numpy as np
+from scipy import sparse
+
+from neighbors import top_k_neighbors
+from sparse_cluster import to_csr
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+vector_file = os.path.join(base_dir, "syllabus_vectors.json")
+metadata_file = os.path.join(base_dir, "course_metadata.json")
+
+GRAPH_NEIGHBORS = 10   # 各授業から張る辺の数
+MIN_SIMILARITY = 0.05  # これ未満の類似度の辺は張らない
+RESOLUTION = 1.0       # 大きいほど小さなコミュニティに分かれる
+
+
+def knn_graph(X, k=GRAPH_NEIGHBORS, min_similarity=MIN_SIMILARITY):
+    """対称な kNN グラフ (CSR, 重み = コサイン類似度, 向きが2つある辺は大きい方)"""
+    indices, sims = top_k_neighbors(X, k)
+    n = X.shape[0]
+    rows = np.repeat(np.arange(n), indices.shape[1])
+    cols, weights = indices.ravel(), sims.ravel()
+    keep = (cols >= 0) & (weights >= min_similarity)
+    graph = sparse.csr_matrix((weights[keep], (rows[keep], cols[keep])), shape=(n, n), dtype=np.float64)
+    return graph.maximum(graph.T).tocsr()
+
+
+def modularity(graph, labels, resolution=RESOLUTION):
+    total = graph.sum()
+    if total == 0:
+        return 0.0
+    degrees = np.asarray(graph.sum(axis=1)).ravel()
+    coo = graph.tocoo()
+    internal = coo.data[labels[coo.row] == labels[coo.col]].sum()
+    community_degree = np.bincount(labels, weights=degrees)
+    return float(internal / total - resolution * np.sum((community_degree / total) ** 2))
+
+
+def _local_moving(graph, resolution, rng):
+    """各ノードを、モジュラリティが最も増える隣のコミュニティへ移す (移動が無くなるまで)"""
+    n = graph.shape[0]
+    indptr, neighbors, weights = graph.indptr, graph.indices, graph.data
+    degrees = np.asarray(graph.sum(axis=1)).ravel()
+    total = degrees.sum()
+    labels = np.arange(n)
+    community_degree = degrees.copy()
+    moved_any = False
+    while True:
+        moved = 0
+        for node in rng.permutation(n):
+            current = labels[node]
+            degree = degrees[node]
+            links = {}
+            for j in range(indptr[node], indptr[node + 1]):
+                other = neighbors[j]
+                if other != node:
+                    links[labels[other]] = links.get(labels[other], 0.0) + weights[j]
+            community_degree[current] -= degree
+            best = current
+            best_gain = links.get(current, 0.0) - resolution * community_degree[current] * degree / total
+            for community, link in links.items():
+                gain = link - resolution * community_degree[community] * degree / total
+                if gain > best_gain:
+                    best, best_gain = community, gain
+            community_degree[best] += degree
+            if best != current:
+                labels[node] = best
+                moved += 1
+        if moved == 0:
+            break
+        moved_any = True
+    return np.unique(labels, return_inverse=True)[1], moved_any
+
+
+def louvain(graph, resolution=RESOLUTION, random_state=42):
+    """
+    Louvain 法。戻り値: 各ノードのコミュニティ番号 (大きいコミュニティから 0, 1, 2, ...)
+    """
+    rng = np.random.default_rng(random_state)
+    n = graph.shape[0]
+    membership = np.arange(n)
+    current = graph.tocsr()
+    while True:
+        labels, moved = _local_moving(current, resolution, rng)
+        if not moved:
+            break
+        membership = labels[membership]
+        # コミュニティを1つのノードにまとめたグラフ (内部の辺は自己ループになる)
+        assign = sparse.csr_matrix((np.ones(len(labels)), (np.arange(len(labels)), labels)))
+        current = (assign.T @ current @ assign).tocsr()
+        if current.shape[0] == 1:
+            break
+    # 番号を大きさの順に振り直す
+    sizes = np.bincount(membership)
+    order = np.argsort(-sizes, kind="stable")
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    return rank[membership]
+
+
+def detect_communities(X, k=GRAPH_NEIGHBORS, resolution=RESOLUTION, random_state=42):
+    """L2正規化済みの CSR 行列 -> (コミュニティ番号の配列, モジュラリティ)"""
+    graph = knn_graph(X, k)
+    labels = louvain(graph, resolution, random_state)
+    return labels, modularity(graph, labels, resolution)
+
+
+def main():
+    with open(vector_file, "r", encoding="utf-8") as f:
+        vector_data = json.load(f)
+    with open(metadata_file, "r", encoding="utf-8") as f:
+        metadata = json.load(f)
+
+    labels, score = detect_communities(to_csr(vector_data))
+    for cid, label in zip(vector_data["i"], labels):
+        if cid in metadata:
+            metadata[cid]["c"] = int(label)
+    with open(metadata_file, "w", encoding="utf-8") as f:
+        json.dump(metadata, f, ensure_ascii=False, separators=(',', ':'))
+
+    sizes = np.bincount(labels)
+    print(f"{len(sizes)} communities (modularity {score:.3f}), sizes: {sizes[:10].tolist()}{' ...' if len(sizes) > 10 else ''}")
+    print(f"'{metadata_file}' に \"c\" を書き込みました。")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+# ==========================================
+# Script Name: diversify.py
+# Description:
+#   [EN] Diversity-aware re-ranking of the "similar courses" lists with
+#        Maximal Marginal Relevance. The plain top-5 by cosine is often
+#        filled by siblings of one course; here each course's top-M
+#        neighbours (neighbors.py, no N x N matrix) are re-ranked greedily by
+#          lambda * sim(course, candidate)
+#            - (1 - lambda) * max sim(candidate, already picked)
+#        with optional caps on picks from the same department / 分野 and
+#        one pick per near-duplicate cluster (near_duplicates.py, the
+#        course's own cluster is never recommended). The neighbour lists
+#        must be collapsed to one course per cluster before they are cut to
+#        M (near_duplicates.collapse_neighbors). Otherwise a list made of
+#        siblings blocks itself and ends after a single pick. All rows of
+#        a chunk are re-ranked together on NumPy arrays [rows, M]; the
+#        candidate x candidate similarities are one batched
+#        [M, terms] x [terms, M] product per chunk over the terms the
+#        candidates actually use.
+#        lambda = 1 with no caps gives the plain top-k.
+#   [JP] おすすめ (似ている授業) の上位 k 件を MMR で選び直します。
+#        各授業の上位 M 件の類似授業 (neighbors.py) の中から、「元の授業との類似度」と
+#        「選んだ授業どうしの類似度」の兼ね合い (lambda) で1件ずつ選び、同じ部局・分野の件数の
+#        上限と、ほぼ同じ授業のまとまり (1つにつき1件) も守ります。N x N の行列は作りません。
+#
+# Data Flow:
+#   Input  : (preprocess002.py から呼び出し) L2正規化済みの TF-IDF 行列, 上位 M 件の類似授業,
+#            部局・分野, ほぼ同じ授業の代表 ID
+#   Output : recommendations.json の中身 {授業ID: [[授業ID, 類似度], ...]}
+# ==========================================
+
+import numpy as np
+
+CANDIDATES = 30     # 選び直す候補の数 (上位 M 件)
+MMR_LAMBDA = 0.7    # 1 に近いほど類似度重視、0 に近いほど多様性重視
+ROW_CHUNK = 256     # 一度に選び直す授業の数
+DENSE_LIMIT = 1 << 24  # 候補どうしの類似度を計算するとき密にする配列の最大要素数 (float32 で 64MB)
+
+
+def category_codes(values):
+    """文字列のリスト -> 整数コードの配列 (同じ値は同じコード)"""
+    _, codes = np.unique(np.asarray(values, dtype=object).astype(str), return_inverse=True)
+    return codes.astype(np.int64)
+
+
+def candidate_similarities(X, indices):
+    """[rows, M] の候補 -> 行ごとの候補どうしのコサイン類似度 [rows, M, M] (足りない候補は 0)"""
+    rows, m = indices.shape
+    flat = np.where(indices >= 0, indices, 0).ravel()
+    C = X[flat]
+    # 候補に出てくる語の列だけを密にして、行ごとに [M, 語数] x [語数, M] を計算する
+    # (密にした配列が DENSE_LIMIT 要素を超えないよう、行を分けて計算する)
+    C = C[:, np.unique(C.indices)]
+    step = max(1, DENSE_LIMIT // max(m * C.shape[1], 1))
+    blocks = np.empty((rows, m, m), dtype=np.float32)
+    for start in range(0, rows, step):
+        stop = min(start + step, rows)
+        dense = C[start * m:stop * m].toarray().astype(np.float32).reshape(stop - start, m, -1)
+        blocks[start:stop] = dense @ dense.transpose(0, 2, 1)
+    valid = indices >= 0
+    return blocks * (valid[:, :, None] & valid[:, None, :])
+
+
+def mmr_rerank(X, indices, sims, top_k=5, lam=MMR_LAMBDA, groups=None, departments=None, fields=None,
+               max_per_department=None, max_per_field=None, row_chunk=ROW_CHUNK):
+    """
+    X: L2正規化済みの CSR 行列 [N, V]。indices / sims: 上位 M 件の候補 [N, M] (類似度の降順。
+       groups を使うときは collapse_neighbors でまとまりごとに1件にしてから M 件にしたもの)
+    groups: 授業ごとのまとまりの番号 (同じ番号 = ほぼ同じ授業)。departments / fields: 整数コード
+    戻り値: (選んだ候補の行番号 int32[N, top_k], 類似度 float32[N, top_k])。足りない分は -1 / 0
+    """
+    X = X.tocsr()
+    n, m = indices.shape
+    picked = np.full((n, top_k), -1, dtype=np.int32)
+    picked_sims = np.zeros((n, top_k), dtype=np.float32)
+    caps = [(codes, cap) for codes, cap in ((departments, max_per_department), (fields, max_per_field))
+            if codes is not None and cap is not None]
+
+    for start in range(0, n, row_chunk):
+        stop = min(start + row_chunk, n)
+        idx = indices[start:stop].astype(np.int64)
+        rel = sims[start:stop].astype(np.float64)
+        r = np.arange(stop - start)
+        blocked = (idx < 0) | (rel <= 0)
+        if groups is not None:
+            cand_groups = np.where(idx >= 0, groups[np.maximum(idx, 0)], -1)
+            blocked |= cand_groups == groups[start:stop, None]
+        cap_codes = [(np.where(idx >= 0, codes[np.maximum(idx, 0)], -1), cap) for codes, cap in caps]
+        pair_sims = candidate_similarities(X, idx) if lam < 1 else None
+        redundancy = np.zeros_like(rel)
+        counts = [np.zeros(idx.shape, dtype=np.int64) for _ in cap_codes]
+
+        for step in range(top_k):
+            score = lam * rel - (1 - lam) * redundancy
+            score[blocked] = -np.inf
+            choice = score.argmax(axis=1)
+            ok = np.isfinite(score[r, choice])
+            if not ok.any():
+                break
+            rows_ok = r[ok]
+            chosen = choice[ok]
+            picked[start + rows_ok, step] = idx[rows_ok, chosen]
+            picked_sims[start + rows_ok, step] = rel[rows_ok, chosen]
+
+            # 選んだ候補・同じまとまりを除き、選んだ候補との類似度と部局・分野の件数を更新
+            blocked[rows_ok, chosen] = True
+            if groups is not None:
+                blocked[rows_ok] |= cand_groups[rows_ok] == cand_groups[rows_ok, chosen][:, None]
+            if pair_sims is not None:
+                redundancy[rows_ok] = np.maximum(redundancy[rows_ok], pair_sims[rows_ok, chosen])
+            for (codes, cap), count in zip(cap_codes, counts):
+                count[rows_ok] += codes[rows_ok] == codes[rows_ok, chosen][:, None]
+                blocked |= count >= cap
+            blocked[~ok] = True
+    return picked, picked_sims
+
+
+def to_recommendations(course_ids, picked, picked_sims):
+    """{授業ID: [[授業ID, 類似度], ...]} (recommendations.json と同じ形)"""
+    recommendations = {}
+    for cid, row, scores in zip(course_ids, picked.tolist(), picked_sims.tolist()):
+        recommendations[cid] = [[course_ids[j], round(s, 3)] for j, s in zip(row, scores) if j >= 0]
+    return recommendations
+
+
+def coverage(picked, n_courses):
+    """一度でもおすすめに出る授業の割合"""
+    return np.unique(picked[picked >= 0]).size / max(n_courses, 1)
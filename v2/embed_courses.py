@@ -0,0 +1,152 @@
+# ==========================================
+# Script Name: embed_courses.py
+# Description:
+#   [EN] Sentence-embedding stage for the real corpus.
+#        Reads integrated_arts_courses.json, encodes course texts on CPU in
+#        length-sorted batches and persists L2-normalised float32 embeddings
+#        in an mmap-able .npy file. Rows are keyed by a per-course text hash,
+#        so a re-run only encodes new or changed courses.
+#        The encoder is pluggable: anything with encode(list_of_texts) -> array.
+#   [JP] 実データ用の文埋め込みステージ。
+#        integrated_arts_courses.json を読み、文の長さ順に並べたバッチで CPU 上で
+#        エンコードし、正規化した float32 ベクトルを mmap 可能な .npy に保存します。
+#        授業ごとのテキストのハッシュで管理し、再実行時は新規・変更分だけを
+#        エンコードします。
+#
+# Data Flow:
+#   Input  : ../common_data/integrated_arts_courses.json
+#   Output : course_embeddings.npy        (float32, 行 = 授業, L2正規化済み)
+#          : course_embeddings.json       {"model", "dim", "i": [ID...], "h": [テキストハッシュ...]}
+# ==========================================
+
+import hashlib
+import json
+import os
+import time
+from collections.abc import Mapping
+import numpy as np
+
+from preprocess002 import load_syllabus_data, normalize_text, clean_course_name, input_file
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+embedding_file = os.path.join(base_dir, "course_embeddings.npy")
+embedding_index_file = os.path.join(base_dir, "course_embeddings.json")
+
+MODEL_NAME = "stsb-xlm-r-multilingual"  # common/sentence-BERT.py と同じモデル
+BATCH_SIZE = 32
+
+
+def course_text(info):
+    """埋め込み対象のテキスト (授業名 + 目標・概要 + メッセージ)"""
+    name = clean_course_name(normalize_text(str(info.get("授業科目名", ""))))
+    return "\n".join(part for part in (
+        name,
+        normalize_text(str(info.get("授業の目標・概要等", ""))),
+        normalize_text(str(info.get("メッセージ", ""))),
+    ) if part)
+
+
+def text_hash(text, model_name):
+    """モデル名 + テキストのハッシュ。どちらかが変われば再エンコード対象になる"""
+    return hashlib.sha1(f"{model_name}\n{text}".encode("utf-8")).hexdigest()[:16]
+
+
+def load_default_encoder(model_name=MODEL_NAME):
+    # sentence-transformers は重いので必要になるまで import しない
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(model_name, device="cpu")
+
+
+def load_embeddings(path=embedding_file, index_path=embedding_index_file):
+    """
+    保存済みの埋め込みを読み込む (行列は mmap で開くのでメモリに全部は載らない)
+    戻り値: (index辞書, 行列) / 無ければ (None, None)
+    """
+    if not (os.path.exists(path) and os.path.exists(index_path)):
+        return None, None
+    with open(index_path, "r", encoding="utf-8") as f:
+        index = json.load(f)
+    return index, np.load(path, mmap_mode="r")
+
+
+def encode_sorted(encoder, texts, batch_size=BATCH_SIZE):
+    """
+    文の長さ順に並べてバッチ化し、パディングの無駄を減らしてエンコードする。
+    戻り値は元の順番に戻した L2 正規化済み float32 行列。
+    """
+    order = sorted(range(len(texts)), key=lambda k: len(texts[k]))
+    result = None
+    for start in range(0, len(order), batch_size):
+        batch_ids = order[start:start + batch_size]
+        vectors = np.asarray(encoder.encode([texts[k] for k in batch_ids]), dtype=np.float32)
+        if result is None:
+            result = np.zeros((len(texts), vectors.shape[1]), dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        result[batch_ids] = vectors / norms
+    return result
+
+
+def update_embeddings(syllabus_data, encoder, model_name=MODEL_NAME,
+                      path=embedding_file, index_path=embedding_index_file, batch_size=BATCH_SIZE):
+    """
+    埋め込みファイルを最新のコーパスに合わせて更新する。
+    戻り値: {"total", "encoded", "reused", "seconds"}
+    """
+    start_time = time.perf_counter()
+    course_ids = []
+    texts = []
+    for code_key, info in syllabus_data.items():
+        if not isinstance(info, Mapping): continue
+        course_ids.append(code_key)
+        texts.append(course_text(info))
+    hashes = [text_hash(text, model_name) for text in texts]
+
+    # 前回の結果のうち、テキストが変わっていない行は再利用する
+    old_index, old_matrix = load_embeddings(path, index_path)
+    old_rows = {}
+    if old_index is not None and old_index.get("model") == model_name:
+        old_rows = {h: row for row, h in enumerate(old_index["h"])}
+    todo = [k for k, h in enumerate(hashes) if h not in old_rows]
+
+    encoded = encode_sorted(encoder, [texts[k] for k in todo], batch_size) if todo else None
+    if encoded is not None:
+        dim = encoded.shape[1]
+    elif old_index is not None:
+        dim = old_index["dim"]
+    else:
+        dim = 0
+
+    # 一時ファイルに書いてから置き換える (途中で落ちても前回の結果が残る)
+    tmp_path = path + ".tmp.npy"
+    matrix = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.float32, shape=(len(course_ids), dim))
+    new_rows = {k: n for n, k in enumerate(todo)}
+    for k, h in enumerate(hashes):
+        matrix[k] = encoded[new_rows[k]] if k in new_rows else old_matrix[old_rows[h]]
+    matrix.flush()
+    del matrix, old_matrix
+    os.replace(tmp_path, path)
+
+    with open(index_path, "w", encoding="utf-8") as f:
+        json.dump({"model": model_name, "dim": dim, "i": course_ids, "h": hashes},
+                  f, ensure_ascii=False, separators=(',', ':'))
+
+    return {
+        "total": len(course_ids),
+        "encoded": len(todo),
+        "reused": len(course_ids) - len(todo),
+        "seconds": time.perf_counter() - start_time,
+    }
+
+
+def main():
+    syllabus_data = load_syllabus_data(input_file)
+    print(f"モデルを読み込み中... ({MODEL_NAME})")
+    encoder = load_default_encoder()
+    stats = update_embeddings(syllabus_data, encoder)
+    print(f"完了！ {stats['total']}件 (新規/変更 {stats['encoded']}件, 再利用 {stats['reused']}件, "
+          f"{stats['seconds']:.1f}秒) '{embedding_file}' を保存しました。")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+# ==========================================
+# Script Name: embedding_store.py
+# Description:
+#   [EN] int8 embedding store for the course embeddings (embed_courses.py).
+#        Vectors are scalar-quantised per dimension (symmetric, scale =
+#        max|x| / 127), which is 4x smaller than float32. Top-k search is a
+#        chunked NumPy matrix-vector product over the int8 codes, and the
+#        shortlist can optionally be re-ranked exactly against the float32
+#        matrix (opened with mmap, so only the shortlisted rows are read).
+#        This replaces the util.cos_sim() scan in common/sentence-BERT.py.
+#   [JP] 授業の埋め込みを int8 に量子化して保持するストアです。
+#        次元ごとのスケールで量子化し (float32 の 1/4)、NumPy で上位 k 件を検索します。
+#        候補だけを float32 の行列 (mmap) で厳密に並べ直すこともできます。
+#
+# Data Flow:
+#   Input  : course_embeddings.npy / course_embeddings.json (embed_courses.py の出力)
+#   Output : course_embeddings_int8.npz  {"codes": int8[N, D], "scales": float32[D], "ids": [ID...]}
+# ==========================================
+
+import os
+import numpy as np
+
+from embed_courses import load_embeddings, embedding_file, embedding_index_file
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+quantized_file = os.path.join(base_dir, "course_embeddings_int8.npz")
+
+# 検索時に float32 へ戻す行数 (一時メモリ = CHUNK_ROWS x D x 4 バイト)
+CHUNK_ROWS = 8192
+
+
+def quantize(matrix):
+    """float32[N, D] -> (int8[N, D], 次元ごとのスケール float32[D])"""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    scales = np.abs(matrix).max(axis=0) / 127.0
+    scales[scales == 0] = 1.0
+    codes = np.clip(np.rint(matrix / scales), -127, 127).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+def dequantize(codes, scales):
+    return codes.astype(np.float32) * scales
+
+
+def _normalize(vectors):
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def _top_k(scores, k):
+    """各行の上位 k 件の列番号 (スコア降順)"""
+    k = min(k, scores.shape[1])
+    part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(scores, part, axis=1), axis=1, kind="stable")
+    return np.take_along_axis(part, order, axis=1)
+
+
+class EmbeddingStore:
+    def __init__(self, ids, codes, scales, full=None):
+        self.ids = list(ids)
+        self.codes = codes
+        self.scales = scales
+        self.full = full  # 厳密な並べ直し用の float32 行列 (mmap 可, 無くてもよい)
+        self.row_of = {cid: row for row, cid in enumerate(self.ids)}
+
+    @classmethod
+    def from_embeddings(cls, path=embedding_file, index_path=embedding_index_file, keep_full=True):
+        """embed_courses.py の出力から作る"""
+        index, matrix = load_embeddings(path, index_path)
+        if index is None:
+            raise FileNotFoundError(f"'{path}' がありません。先に embed_courses.py を実行してください。")
+        codes, scales = quantize(matrix)
+        return cls(index["i"], codes, scales, matrix if keep_full else None)
+
+    @classmethod
+    def load(cls, path=quantized_file, full_path=None):
+        data = np.load(path)
+        full = np.load(full_path, mmap_mode="r") if full_path else None
+        return cls(data["ids"].tolist(), data["codes"], data["scales"], full)
+
+    def save(self, path=quantized_file):
+        np.savez(path, codes=self.codes, scales=self.scales, ids=np.array(self.ids))
+
+    @property
+    def nbytes(self):
+        return self.codes.nbytes + self.scales.nbytes
+
+    def _scores(self, queries):
+        """量子化した行列との内積 [Q, N] (行をまとめて float32 に戻して計算)"""
+        weighted = (queries * self.scales).T  # スケールはクエリ側に掛けておく
+        scores = np.empty((queries.shape[0], self.codes.shape[0]), dtype=np.float32)
+        for start in range(0, self.codes.shape[0], CHUNK_ROWS):
+            block = self.codes[start:start + CHUNK_ROWS].astype(np.float32)
+            scores[:, start:start + CHUNK_ROWS] = (block @ weighted).T
+        return scores
+
+    def search_many(self, queries, top_k=5, rerank=0, exclude=None):
+        """
+        queries: float[Q, D] (正規化は内部で行う)
+        rerank : > 0 なら上位 rerank 件を float32 の行列で厳密に計算し直す (full が必要)
+        exclude: 各クエリで除外する行番号 (自分自身など) のリスト
+        戻り値 : [[(ID, score), ...], ...]
+        """
+        queries = _normalize(queries)
+        scores = self._scores(queries)
+        if exclude is not None:
+            for q, row in enumerate(exclude):
+                if row is not None:
+                    scores[q, row] = -np.inf
+        use_rerank = rerank > top_k and self.full is not None
+        candidates = _top_k(scores, rerank if use_rerank else top_k)
+
+        results = []
+        for q, rows in enumerate(candidates):
+            # 候補数が全件以上だと除外した行 (-inf) も候補に入るので、並べ直す前に外す
+            rows = rows[np.isfinite(scores[q, rows])]
+            if use_rerank:
+                # mmap から候補の行だけを読む (ファイル順に並べてから読む)
+                rows = np.sort(rows)
+                exact = np.asarray(self.full[rows], dtype=np.float32) @ queries[q]
+                order = np.argsort(-exact, kind="stable")[:top_k]
+                hits = [(self.ids[rows[j]], float(exact[j])) for j in order]
+            else:
+                hits = [(self.ids[r], float(scores[q, r])) for r in rows]
+            results.append(hits)
+        return results
+
+    def search(self, query, top_k=5, rerank=0):
+        """1件のクエリベクトルで検索 (util.cos_sim + 並べ替え の代わり)"""
+        return self.search_many(query, top_k, rerank)[0]
+
+    def similar_to(self, course_id, top_k=5, rerank=0):
+        """ある授業に近い授業 (自分自身は除く)"""
+        row = self.row_of[course_id]
+        return self.search_many(dequantize(self.codes[row], self.scales), top_k, rerank, exclude=[row])[0]
+
+
+def main():
+    store = EmbeddingStore.from_embeddings()
+    store.save()
+    full_bytes = len(store.ids) * store.codes.shape[1] * 4
+    print(f"{len(store.ids)}件 x {store.codes.shape[1]}次元: float32 {full_bytes / 1e6:.1f} MB -> "
+          f"int8 {store.nbytes / 1e6:.1f} MB, '{quantized_file}' を保存しました。")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+# ==========================================
+# Script Name: hybrid_search.py
+# Description:
+#   [EN] Hybrid lexical + semantic retrieval.
+#        A cheap TF-IDF pass over the inverted index (search_service.py) picks
+#        candidates, and only those candidates are scored with sentence
+#        embeddings (embedding_store.py). The two rankings are combined with
+#        reciprocal-rank fusion (or the semantic score alone). A latency
+#        budget is checked before each later stage (query encoding, the
+#        semantic scan, the re-rank) against a running estimate of that
+#        stage's cost; a stage that does not fit is skipped and the lexical
+#        results are returned. A full semantic scan is only used when the
+#        lexical pass finds too few candidates (e.g. vague interest / career
+#        queries) and the budget allows it.
+#   [JP] 語彙検索 (TF-IDF) と意味検索 (文埋め込み) を組み合わせた検索です。
+#        転置インデックスで候補を絞り、候補だけを埋め込みの類似度で並べ直して
+#        RRF (Reciprocal Rank Fusion) で統合します。時間予算 (budget_ms) の残りで
+#        クエリの埋め込み・並べ直しが終わらない見込みなら、語彙検索の結果だけを返します。
+#
+# Data Flow:
+#   Input  : syllabus_vectors.json / course_metadata.json (語彙検索)
+#          : course_embeddings.npy / course_embeddings.json (embed_courses.py の出力)
+#   Output : (検索結果 / Console Output)
+#
+# Usage:
+#   python hybrid_search.py        # 対話的に検索 (sentence-transformers が必要)
+# ==========================================
+
+import time
+import numpy as np
+
+from embed_courses import load_default_encoder
+from embedding_store import EmbeddingStore
+from query_cache import MISSING, QueryCache
+from search_service import SyllabusSearch
+
+RRF_K = 60            # RRF の定数 (一般的な既定値)
+CANDIDATES = 100      # 語彙検索で取る候補数
+SEMANTIC_FALLBACK = 200  # 候補が少ないときに意味検索だけで追加する件数
+FUSION_MODES = ("rrf", "semantic", "none")  # search() の fusion (none: 語彙検索だけ)
+# 各段の所要時間の初期見積もり (ms)。検索のたびに実測値で更新する
+STAGE_ESTIMATE_MS = {"encode": 30.0, "semantic_scan": 5.0, "rerank": 2.0}  # encode は warm_up() で実測
+ESTIMATE_DECAY = 0.8  # 見積もりの更新: 見積もり x DECAY + 実測 x (1 - DECAY)
+
+
+class HybridSearch:
+    def __init__(self, lexical=None, store=None, encoder=None, query_cache_size=1024):
+        self.lexical = lexical if lexical is not None else SyllabusSearch()
+        self.store = store if store is not None else EmbeddingStore.from_embeddings()
+        self._encoder = encoder
+        self.embedding_cache = QueryCache(maxsize=query_cache_size)
+        self.stage_ms = dict(STAGE_ESTIMATE_MS)
+        self._warmed_up = False
+        self.last_timing = {}
+
+    @property
+    def encoder(self):
+        # モデルの読み込みは最初の検索まで遅らせる
+        if self._encoder is None:
+            self._encoder = load_default_encoder()
+        return self._encoder
+
+    def warm_up(self):
+        """モデルを読み込み、短いクエリを1回埋め込んで encode の見積もりを実測値にする"""
+        encoder = self.encoder
+        started = time.perf_counter()
+        encoder.encode(["授業"])
+        self.stage_ms["encode"] = (time.perf_counter() - started) * 1000
+        self._warmed_up = True
+
+    def _encode(self, query):
+        vector = np.asarray(self.encoder.encode([query]), dtype=np.float32)[0]
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def embed(self, query):
+        """クエリの埋め込み (正規化済み, キャッシュ付き)"""
+        return self.embedding_cache.get_or_compute(query.strip(), lambda: self._encode(query))
+
+    def _measure(self, stage, started):
+        """段の所要時間を記録し、見積もりを更新する"""
+        elapsed = (time.perf_counter() - started) * 1000
+        self.stage_ms[stage] = ESTIMATE_DECAY * self.stage_ms[stage] + (1 - ESTIMATE_DECAY) * elapsed
+        return elapsed
+
+    def _semantic_scores(self, course_ids, query_vector):
+        """候補の授業だけ類似度を計算する (埋め込みの無い授業は -inf)"""
+        rows = [self.store.row_of.get(cid, -1) for cid in course_ids]
+        present = [k for k, row in enumerate(rows) if row >= 0]
+        scores = np.full(len(course_ids), -np.inf, dtype=np.float32)
+        if present:
+            picked = np.array([rows[k] for k in present])
+            order = np.argsort(picked)  # mmap は行番号順に読む方が速い
+            if self.store.full is not None:
+                vectors = np.asarray(self.store.full[picked[order]], dtype=np.float32)
+            else:
+                vectors = self.store.codes[picked[order]].astype(np.float32) * self.store.scales
+            scores[np.array(present)[order]] = vectors @ query_vector
+        return scores
+
+    def search(self, query, area="", field="", term="", top_k=10, candidates=CANDIDATES,
+               fusion="rrf", budget_ms=None, rrf_k=RRF_K):
+        """
+        fusion   : "rrf" (語彙と意味の順位を統合) / "semantic" (候補を意味の類似度だけで並べる) /
+                   "none" (語彙検索だけ)。それ以外は ValueError
+        budget_ms: 時間予算。残り時間で埋め込み・並べ直しが終わらない見込みなら語彙検索の結果を返す
+                   (last_timing["skipped"] に飛ばした段が入る)
+        戻り値   : [{"id", "score", "lexical", "semantic", n, d, ...}, ...]
+                   lexical / semantic は各段の順位 (1始まり, 対象外なら None)
+        """
+        if fusion not in FUSION_MODES:
+            raise ValueError(f"unknown fusion {fusion!r} (expected one of {', '.join(FUSION_MODES)})")
+        start = time.perf_counter()
+        deadline = start + budget_ms / 1000.0 if budget_ms is not None else None
+
+        def fits(*stages):
+            """見積もりで、残り時間内に stages が終わるか"""
+            if deadline is None:
+                return True
+            return time.perf_counter() + sum(self.stage_ms[s] for s in stages) / 1000.0 <= deadline
+
+        def lexical_only(skipped):
+            timing["skipped"] = skipped
+            timing["total_ms"] = (time.perf_counter() - start) * 1000
+            return [dict(hit, lexical=k + 1, semantic=None) for k, hit in enumerate(lexical_hits[:top_k])]
+
+        lexical_hits = self.lexical.search(query, area, field, term, top_k=candidates)
+        timing = {"lexical_ms": (time.perf_counter() - start) * 1000, "stages": ["lexical"]}
+        self.last_timing = timing
+        if fusion == "none":
+            return lexical_only(None)
+
+        # クエリの埋め込み (SBERT では一番重い段)。キャッシュに無く、並べ直しまで終わらない見込みなら飛ばす
+        key = query.strip()
+        query_vector = self.embedding_cache.get(key)
+        if query_vector is MISSING:
+            if not self._warmed_up:
+                self.warm_up()  # モデルの読み込みは予算に含めない
+            if not fits("encode", "rerank"):
+                return lexical_only("encode")
+            started = time.perf_counter()
+            query_vector = self._encode(query)
+            self.embedding_cache.put(key, query_vector)
+            timing["encode_ms"] = self._measure("encode", started)
+            timing["stages"].append("encode")
+        pool = [hit["id"] for hit in lexical_hits]
+
+        # 語彙検索の候補が足りない (曖昧な興味・将来像のクエリ) ときだけ全件を意味検索する
+        if len(pool) < top_k and fits("semantic_scan", "rerank"):
+            started = time.perf_counter()
+            seen = set(pool)
+            for cid, _ in self.store.search(query_vector, top_k=SEMANTIC_FALLBACK):
+                if cid not in seen and self.lexical.matches(self.lexical.metadata.get(cid, {}), area, field, term):
+                    pool.append(cid)
+                    seen.add(cid)
+            self._measure("semantic_scan", started)
+            timing["stages"].append("semantic_scan")
+
+        if not fits("rerank"):
+            return lexical_only("rerank")
+        started = time.perf_counter()
+        semantic = self._semantic_scores(pool, query_vector)
+        self._measure("rerank", started)
+        timing["stages"].append("rerank")
+        semantic_rank = {}
+        for rank, k in enumerate(np.argsort(-semantic, kind="stable")):
+            if np.isfinite(semantic[k]):
+                semantic_rank[pool[k]] = rank + 1
+        lexical_rank = {hit["id"]: k + 1 for k, hit in enumerate(lexical_hits)}
+
+        if fusion == "rrf":
+            fused = {cid: sum(1.0 / (rrf_k + r[cid]) for r in (lexical_rank, semantic_rank) if cid in r)
+                     for cid in pool}
+        else:
+            fused = {cid: float(semantic[k]) for k, cid in enumerate(pool) if cid in semantic_rank}
+        ranked = sorted(fused, key=lambda cid: -fused[cid])[:top_k]
+        timing["total_ms"] = (time.perf_counter() - start) * 1000
+        return [{"id": cid, "score": fused[cid], "lexical": lexical_rank.get(cid),
+                 "semantic": semantic_rank.get(cid), **self.lexical.metadata.get(cid, {})}
+                for cid in ranked]
+
+
+def main():
+    service = HybridSearch()
+    print(f"{len(service.store.ids)} embeddings loaded. 空行で終了します。")
+    while True:
+        query = input("\n興味・将来の目標> ").strip()
+        if not query:
+            break
+        for hit in service.search(query, top_k=10, budget_ms=200):
+            print(f"{hit['score']:.4f} | lex {hit['lexical'] or '-':>3} | sem {hit['semantic'] or '-':>3} "
+                  f"| {hit['id']} | {hit.get('n', '')}")
+        timing = service.last_timing
+        skipped = f" ({timing['skipped']} skipped: budget)" if timing.get("skipped") else ""
+        print(f"[{' -> '.join(timing['stages'])}]{skipped} {timing['total_ms']:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
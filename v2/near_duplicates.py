@@ -0,0 +1,175 @@
+# ==========================================
+# Script Name: near_duplicates.py
+# Description:
+#   [EN] Near-duplicate course detection with MinHash + LSH. Many courses
+#        are copies of each other (Japanese / English variants, "I" / "II"
+#        or term 1 / term 2 copies with the same syllabus text), which fill
+#        the top-5 recommendations and the search results with siblings.
+#        Each course's tokenised text (the noun base forms used for TF-IDF)
+#        is turned into word 2-gram shingles and a 128-value MinHash
+#        signature; the signatures are cut into 32 bands of 4 rows, courses
+#        sharing a band are candidate pairs (no N x N comparison), and a
+#        candidate is kept if the exact Jaccard similarity of the shingle
+#        sets reaches JACCARD_THRESHOLD. Kept pairs are merged with
+#        union-find into clusters whose canonical ID is the smallest course
+#        ID. Recommendations (collapse_neighbors(), before the MMR re-rank)
+#        and search collapse a cluster to its best-ranked member.
+#   [JP] MinHash + LSH による「ほぼ同じ授業」の検出です。日本語版と英語版、I と II、
+#        ターム違いなどの同じシラバスの授業がおすすめ・検索結果を埋めてしまうため、
+#        形態素解析した語の 2-gram から MinHash を作り、LSH (32 バンド x 4 行) で候補の組だけを
+#        調べ (全組み合わせは比べません)、Jaccard 係数が閾値以上の組をまとめます。
+#        まとまりごとの代表 ID (一番小さい授業ID) を保存し、おすすめ・検索で1件にまとめます。
+#
+# Data Flow:
+#   Input  : (preprocess002.py から呼び出し) 授業ID, 形態素解析済みのテキスト (空白区切り)
+#   Output : duplicates.json, course_metadata.json の "g" (代表 ID, まとまりに入る授業のみ)
+#
+# Layout:
+#   {"ver": 1, "threshold": Jaccard 係数の閾値,
+#    "clusters": {代表 ID: [授業ID, ...], ...}}   (授業ID は昇順、代表 ID が先頭)
+# ==========================================
+
+import json
+import zlib
+from collections import defaultdict
+
+import numpy as np
+
+DUPLICATES_VERSION = 1
+JSON_SEPARATORS = (',', ':')
+
+SHINGLE_SIZE = 2          # 何語続きを1つの単位にするか
+NUM_PERM = 128            # MinHash の値の数 (= BANDS x ROWS)
+BANDS = 32
+ROWS = 4                  # 1バンドの行数 (候補になりやすさの目安: (1 / BANDS) ** (1 / ROWS) = 0.42)
+JACCARD_THRESHOLD = 0.6   # これ以上なら同じ授業とみなす
+MAX_BUCKET_PAIRS = 64     # これより大きいバケツは全組ではなく先頭の授業とだけ比べる
+CHUNK = 1024              # MinHash を一度に計算する授業数
+
+_PRIME = (1 << 31) - 1    # ハッシュ (a * x + b) mod p。a, x < 2^31 なので uint64 で溢れない
+
+
+def shingles(text, size=SHINGLE_SIZE):
+    """空白区切りの語 -> size 語続きのハッシュ (uint32) の集合"""
+    words = text.split()
+    if len(words) < size:
+        return {zlib.crc32(" ".join(words).encode("utf-8"))} if words else set()
+    return {zlib.crc32(" ".join(words[k:k + size]).encode("utf-8")) for k in range(len(words) - size + 1)}
+
+
+def minhash_signatures(shingle_sets, num_perm=NUM_PERM, seed=1, chunk=CHUNK):
+    """
+    shingle の集合のリスト -> MinHash (uint64[N, num_perm])。
+    空の集合の行はすべて _PRIME (どの授業とも同じにならないよう、後で候補から外す)
+    """
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, _PRIME, size=num_perm, dtype=np.uint64)
+    b = rng.integers(0, _PRIME, size=num_perm, dtype=np.uint64)
+    signatures = np.full((len(shingle_sets), num_perm), _PRIME, dtype=np.uint64)
+    for start in range(0, len(shingle_sets), chunk):
+        block = shingle_sets[start:start + chunk]
+        lengths = np.fromiter((len(s) for s in block), dtype=np.int64, count=len(block))
+        if not lengths.sum():
+            continue
+        values = np.fromiter((h for s in block for h in s), dtype=np.uint64, count=lengths.sum()) % _PRIME
+        hashed = (values[:, None] * a + b) % _PRIME  # [shingle の総数, num_perm]
+        rows = np.flatnonzero(lengths)
+        offsets = np.concatenate(([0], np.cumsum(lengths)))[rows]
+        signatures[start + rows] = np.minimum.reduceat(hashed, offsets, axis=0)
+    return signatures
+
+
+def candidate_pairs(signatures, bands=BANDS, rows=ROWS, max_bucket_pairs=MAX_BUCKET_PAIRS):
+    """どれかのバンドの MinHash がすべて同じ授業の組 {(i, j), ...} (i < j)"""
+    valid = np.flatnonzero(signatures[:, 0] != _PRIME)
+    pairs = set()
+    for band in range(bands):
+        part = np.ascontiguousarray(signatures[valid, band * rows:(band + 1) * rows])
+        keys = part.view(np.dtype((np.void, part.dtype.itemsize * rows))).ravel()
+        _, inverse, counts = np.unique(keys, return_inverse=True, return_counts=True)
+        order = np.argsort(inverse, kind="stable")
+        bounds = np.concatenate(([0], np.cumsum(counts)))
+        for g in np.flatnonzero(counts > 1):
+            members = valid[order[bounds[g]:bounds[g + 1]]].tolist()
+            if len(members) > max_bucket_pairs:
+                pairs.update((members[0], m) for m in members[1:])
+            else:
+                pairs.update((members[x], members[y]) for x in range(len(members))
+                             for y in range(x + 1, len(members)))
+    return pairs
+
+
+def jaccard(a, b):
+    return len(a & b) / len(a | b) if a or b else 0.0
+
+
+def find_clusters(course_ids, texts, threshold=JACCARD_THRESHOLD):
+    """{代表 ID: [授業ID, ...]} (2件以上のまとまりだけ)"""
+    shingle_sets = [shingles(text) for text in texts]
+    pairs = candidate_pairs(minhash_signatures(shingle_sets))
+
+    parent = list(range(len(course_ids)))
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for i, j in pairs:
+        if jaccard(shingle_sets[i], shingle_sets[j]) >= threshold:
+            ri, rj = find(i), find(j)
+            if ri != rj:
+                parent[max(ri, rj)] = min(ri, rj)
+
+    groups = defaultdict(list)
+    for k, cid in enumerate(course_ids):
+        groups[find(k)].append(cid)
+    clusters = {}
+    for members in groups.values():
+        if len(members) > 1:
+            members = sorted(members)
+            clusters[members[0]] = members
+    return dict(sorted(clusters.items()))
+
+
+def canonical_map(clusters):
+    """{授業ID: 代表 ID} (まとまりに入る授業のみ)"""
+    return {cid: canon for canon, members in clusters.items() for cid in members}
+
+
+def collapse_neighbors(indices, sims, groups, m, row_chunk=CHUNK):
+    """
+    類似度順の上位の類似授業 (top_k_neighbors の結果 [N, K]) を、まとまりごとに一番上の1件にして
+    先頭から m 件を返す。元の授業自身のまとまりは除く。groups: 授業ごとのまとまりの番号
+    候補を m 件で切ってからまとめると同じまとまりの授業で埋まって足りなくなるので、
+    K は m + 一番大きいまとまりの件数 くらい取っておく
+    戻り値: (indices int32[N, m], sims float32[N, m])。足りない分は -1 / 0
+    """
+    n, k = indices.shape
+    out_idx = np.full((n, m), -1, dtype=np.int32)
+    out_sims = np.zeros((n, m), dtype=np.float32)
+    earlier = np.tri(k, k, -1, dtype=bool)  # [a, b]: b が a より上位
+    for start in range(0, n, row_chunk):
+        stop = min(start + row_chunk, n)
+        idx = indices[start:stop]
+        cand = np.where(idx >= 0, groups[np.maximum(idx, 0)], -1)
+        keep = (idx >= 0) & (cand != groups[start:stop, None])
+        # 同じまとまりの授業がもっと上位にあれば除く
+        same = (cand[:, :, None] == cand[:, None, :]) & keep[:, None, :] & earlier
+        keep &= ~same.any(axis=2)
+        order = np.argsort(~keep, axis=1, kind="stable")[:, :m]
+        kept = np.take_along_axis(keep, order, axis=1)
+        out_idx[start:stop, :order.shape[1]] = np.where(kept, np.take_along_axis(idx, order, axis=1), -1)
+        out_sims[start:stop, :order.shape[1]] = np.where(kept, np.take_along_axis(sims[start:stop], order, axis=1), 0)
+    return out_idx, out_sims
+
+
+def write_duplicates(path, course_ids, texts, threshold=JACCARD_THRESHOLD):
+    """duplicates.json を保存し、(書き込んだバイト数, {代表 ID: [授業ID, ...]}) を返す"""
+    clusters = find_clusters(course_ids, texts, threshold)
+    data = json.dumps({"ver": DUPLICATES_VERSION, "threshold": threshold, "clusters": clusters},
+                      ensure_ascii=False, separators=JSON_SEPARATORS).encode("utf-8")
+    with open(path, "wb") as f:
+        f.write(data)
+    return len(data), clusters
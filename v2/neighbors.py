@@ -0,0 +1,158 @@
+# ==========================================
+# Script Name: neighbors.py
+# Description:
+#   [EN] Top-k cosine neighbours for every course without building the full
+#        N x N similarity matrix. Used by the community, prerequisite and
+#        re-ranking stages.
+#        - Up to EXACT_LIMIT courses: exact blocked brute force. The
+#          similarity is computed tile by tile (row chunk x column block,
+#          densified per tile so the product runs in BLAS) and a running
+#          top-k is kept per row. Memory is O(tile + N x k), but time is
+#          O(N^2 x V), so this path does not scale to a whole university.
+#        - Above it: an approximate IVF index (inverted file). Spherical
+#          k-means (sparse_cluster.py, trained on a sample) cuts the courses
+#          into ~sqrt(N) lists; each course is stored in its nearest list
+#          and compared only with the members of its IVF_PROBES nearest
+#          lists. Time is O(N x probes x N / lists x nnz) = O(N^1.5) with
+#          sqrt(N) lists instead of O(N^2). The 500-term TF-IDF vocabulary
+#          makes every term common at this scale, so a term-postings
+#          candidate scheme would stay quadratic. Recall against the exact
+#          lists is reported by benchmark/bench_communities.py.
+#   [JP] 全授業の上位 k 件の類似授業 (コサイン) を、N x N の類似度行列を作らずに求めます。
+#        EXACT_LIMIT 件までは総当たり (正確。タイルごとに計算して上位 k 件だけ残す。
+#        時間は件数の2乗に比例)。それより多いときは球面 k-means で授業を約 sqrt(N) 個の
+#        リストに分け、近いリストの授業とだけ比べる近似 (IVF) で、時間は N^1.5 に比例します。
+#
+# Data Flow:
+#   Input  : L2正規化済みの CSR 行列 (sparse_cluster.to_csr)
+#   Output : (indices int32[N, k], sims float32[N, k]) 類似度の降順
+# ==========================================
+
+import numpy as np
+
+from sparse_cluster import SphericalKMeans
+
+ROW_CHUNK = 2048     # 1タイルの行数
+COLUMN_BLOCK = 8192  # 1タイルの列数 (2048 x 8192 x 4 バイト = 64MB)
+EXACT_LIMIT = 20000  # この件数までは総当たり (正確)。超えたら IVF (近似)
+IVF_PROBES = 16      # 各授業が調べるリストの数 (多いほど正確で遅い)
+IVF_TRAIN_SIZE = 20000  # リストの中心 (k-means) を学習する標本の件数
+
+
+def _merge_top_k(best_idx, best_sim, new_idx, new_sim, k):
+    """これまでの上位 k 件とタイルの上位 k 件を合わせて上位 k 件を残す"""
+    idx = np.concatenate([best_idx, new_idx], axis=1)
+    sim = np.concatenate([best_sim, new_sim], axis=1)
+    part = np.argpartition(-sim, k - 1, axis=1)[:, :k]
+    return np.take_along_axis(idx, part, axis=1), np.take_along_axis(sim, part, axis=1)
+
+
+def top_k_neighbors(X, k=10, exclude_self=True, row_chunk=ROW_CHUNK, column_block=COLUMN_BLOCK,
+                    exact_limit=EXACT_LIMIT, n_probes=IVF_PROBES):
+    """
+    X: L2正規化済みの CSR 行列 [N, V]
+    戻り値: (indices, sims) どちらも [N, k]。候補が k 件に満たない行は -1 / 0 で埋める
+    N が exact_limit を超えたら IVF の近似 (ivf_top_k_neighbors) を使う
+    """
+    if X.shape[0] > exact_limit:
+        return ivf_top_k_neighbors(X, k, exclude_self, n_probes=n_probes)
+    return exact_top_k_neighbors(X, k, exclude_self, row_chunk, column_block)
+
+
+def exact_top_k_neighbors(X, k=10, exclude_self=True, row_chunk=ROW_CHUNK, column_block=COLUMN_BLOCK):
+    """総当たり (正確)。時間は O(N^2 x V)"""
+    n = X.shape[0]
+    X = X.astype(np.float32).tocsr()
+    k_eff = min(k, n - 1 if exclude_self else n)
+    indices = np.full((n, k), -1, dtype=np.int32)
+    sims = np.zeros((n, k), dtype=np.float32)
+    if k_eff <= 0:
+        return indices, sims
+
+    best_idx = np.full((n, k_eff), -1, dtype=np.int64)
+    best_sim = np.full((n, k_eff), -np.inf, dtype=np.float32)
+    for col_start in range(0, n, column_block):
+        col_stop = min(col_start + column_block, n)
+        columns = X[col_start:col_stop].toarray().T  # [V, 列数]
+        kk = min(k_eff, col_stop - col_start)
+        for row_start in range(0, n, row_chunk):
+            row_stop = min(row_start + row_chunk, n)
+            tile = X[row_start:row_stop].toarray() @ columns
+            if exclude_self:
+                # タイル内の対角 (自分自身) を除く
+                lo, hi = max(row_start, col_start), min(row_stop, col_stop)
+                if lo < hi:
+                    diag = np.arange(lo, hi)
+                    tile[diag - row_start, diag - col_start] = -np.inf
+            part = np.argpartition(-tile, kk - 1, axis=1)[:, :kk]
+            best_idx[row_start:row_stop], best_sim[row_start:row_stop] = _merge_top_k(
+                best_idx[row_start:row_stop], best_sim[row_start:row_stop],
+                part + col_start, np.take_along_axis(tile, part, axis=1), k_eff)
+
+    order = np.argsort(-best_sim, axis=1, kind="stable")
+    indices[:, :k_eff] = np.take_along_axis(best_idx, order, axis=1)
+    sims[:, :k_eff] = np.take_along_axis(best_sim, order, axis=1)
+    return indices, sims
+
+
+def ivf_top_k_neighbors(X, k=10, exclude_self=True, n_lists=None, n_probes=IVF_PROBES,
+                        train_size=IVF_TRAIN_SIZE, random_state=42):
+    """
+    IVF (近似)。授業を n_lists 個のリスト (既定 sqrt(N)) に分け、各授業は近い n_probes 個のリストの
+    授業とだけ比べる。戻り値は top_k_neighbors と同じ
+    """
+    n = X.shape[0]
+    X = X.astype(np.float32).tocsr()
+    k_eff = min(k, n - 1 if exclude_self else n)
+    indices = np.full((n, k), -1, dtype=np.int32)
+    sims = np.zeros((n, k), dtype=np.float32)
+    if k_eff <= 0:
+        return indices, sims
+
+    n_lists = n_lists or max(1, int(round(np.sqrt(n))))
+    n_probes = min(n_probes, n_lists)
+    rng = np.random.default_rng(random_state)
+    train = X if n <= train_size else X[np.sort(rng.choice(n, size=train_size, replace=False))]
+    centers = SphericalKMeans(n_clusters=n_lists, max_iter=20, n_init=1,
+                              random_state=random_state).fit(train).cluster_centers_.astype(np.float32)
+
+    # 各授業の近いリスト n_probes 個 (先頭が一番近いリスト = 格納先)
+    probes = np.empty((n, n_probes), dtype=np.int64)
+    for start in range(0, n, ROW_CHUNK):
+        centroid_sims = np.asarray(X[start:start + ROW_CHUNK] @ centers.T)
+        part = np.argpartition(-centroid_sims, n_probes - 1, axis=1)[:, :n_probes]
+        order = np.argsort(-np.take_along_axis(centroid_sims, part, axis=1), axis=1, kind="stable")
+        probes[start:start + ROW_CHUNK] = np.take_along_axis(part, order, axis=1)
+    home = probes[:, 0]
+    members = np.argsort(home, kind="stable")
+    member_bounds = np.concatenate(([0], np.cumsum(np.bincount(home, minlength=n_lists))))
+    probe_rows = np.repeat(np.arange(n), n_probes)
+    queries = probe_rows[np.argsort(probes.ravel(), kind="stable")]
+    query_bounds = np.concatenate(([0], np.cumsum(np.bincount(probes.ravel(), minlength=n_lists))))
+
+    best_idx = np.full((n, k_eff), -1, dtype=np.int64)
+    best_sim = np.full((n, k_eff), -np.inf, dtype=np.float32)
+    for lst in range(n_lists):
+        cols = members[member_bounds[lst]:member_bounds[lst + 1]]
+        rows = queries[query_bounds[lst]:query_bounds[lst + 1]]
+        if not len(cols) or not len(rows):
+            continue
+        columns = X[cols].toarray().T  # [V, リストの件数]
+        kk = min(k_eff, len(cols))
+        for start in range(0, len(rows), ROW_CHUNK):
+            chunk = rows[start:start + ROW_CHUNK]
+            tile = np.asarray(X[chunk] @ columns)
+            if exclude_self:
+                tile[chunk[:, None] == cols[None, :]] = -np.inf
+            part = np.argpartition(-tile, kk - 1, axis=1)[:, :kk]
+            best_idx[chunk], best_sim[chunk] = _merge_top_k(
+                best_idx[chunk], best_sim[chunk], cols[part], np.take_along_axis(tile, part, axis=1), k_eff)
+
+    order = np.argsort(-best_sim, axis=1, kind="stable")
+    best_idx = np.take_along_axis(best_idx, order, axis=1)
+    best_sim = np.take_along_axis(best_sim, order, axis=1)
+    # 候補が k 件に満たない行 (-inf) は -1 / 0 にする
+    missing = ~np.isfinite(best_sim)
+    best_idx[missing], best_sim[missing] = -1, 0
+    indices[:, :k_eff], sims[:, :k_eff] = best_idx, best_sim
+    return indices, sims
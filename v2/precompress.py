@@ -0,0 +1,178 @@
+# ==========================================
+# Script Name: precompress.py
+# Description:
+#   [EN] Writes content-hashed copies of the browser artifacts with precompressed
+#        .gz / .br siblings and a small manifest (assets.json), so a static file
+#        server can serve them compressed with long cache lifetimes.
+#        Run directly to start a local static server that honours the siblings.
+#   [JP] ブラウザ向け成果物に内容ハッシュ付きファイル名を付け、事前圧縮した
+#        .gz / .br を並べて保存し、対応表 assets.json を書き出します。
+#        直接実行すると、事前圧縮ファイルを返すローカルサーバーが起動します。
+#
+# Data Flow:
+#   Input  : syllabus_vectors.json, course_metadata.json, recommendations.json (など)
+#   Output : <name>.<hash>.json (+ .gz, .br)
+#          : index/**/*.json.gz, *.json.br (ハッシュなし、同名の隣に置く)
+#          : assets.json  {元の名前: {"file", "sha256", "bytes", "gz", "br"}}
+#
+# Usage:
+#   python precompress.py            # v2/ を http://localhost:8000/ で配信
+#   python precompress.py 8080       # ポート指定
+# ==========================================
+
+import gzip
+import hashlib
+import json
+import os
+import sys
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from functools import partial
+
+try:
+    import brotli
+except ImportError:  # brotli は任意 (pip install brotli)
+    brotli = None
+
+HASH_LENGTH = 10
+MANIFEST_NAME = "assets.json"
+# ハッシュ付きファイルは内容が変わると名前も変わるので1年キャッシュしてよい
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+
+
+def _write_siblings(path, data):
+    """path.gz / path.br を書き出し、それぞれのバイト数を返す"""
+    sizes = {}
+    gz_data = gzip.compress(data, compresslevel=9, mtime=0)
+    with open(path + ".gz", "wb") as f:
+        f.write(gz_data)
+    sizes["gz"] = len(gz_data)
+    if brotli is not None:
+        br_data = brotli.compress(data, quality=11)
+        with open(path + ".br", "wb") as f:
+            f.write(br_data)
+        sizes["br"] = len(br_data)
+    return sizes
+
+
+def _remove_stale(out_dir, stem, ext, keep):
+    """同じ成果物の古いハッシュ版を削除する"""
+    for name in os.listdir(out_dir):
+        if name.startswith(stem + ".") and name != keep and (
+                name.endswith(ext) or name.endswith(ext + ".gz") or name.endswith(ext + ".br")):
+            middle = name[len(stem) + 1:].split(".")[0]
+            if len(middle) == HASH_LENGTH:
+                os.remove(os.path.join(out_dir, name))
+
+
+def precompress_artifact(path):
+    """
+    1ファイルをハッシュ付きの名前でコピーし、圧縮版を横に置く。
+    戻り値: assets.json の1エントリ
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    digest = hashlib.sha256(data).hexdigest()
+    out_dir = os.path.dirname(path)
+    stem, ext = os.path.splitext(os.path.basename(path))
+    hashed_name = f"{stem}.{digest[:HASH_LENGTH]}{ext}"
+    hashed_path = os.path.join(out_dir, hashed_name)
+
+    _remove_stale(out_dir, stem, ext, hashed_name)
+    with open(hashed_path, "wb") as f:
+        f.write(data)
+    entry = {"file": hashed_name, "sha256": digest, "bytes": len(data)}
+    entry.update(_write_siblings(hashed_path, data))
+    return entry
+
+
+def precompress_tree(root_dir):
+    """分割インデックスなど名前で参照されるファイル群は、ハッシュなしで .gz/.br だけ置く"""
+    total = 0
+    for dirpath, _, filenames in os.walk(root_dir):
+        for name in filenames:
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(dirpath, name)
+            with open(path, "rb") as f:
+                data = f.read()
+            total += _write_siblings(path, data)["gz"]
+    return total
+
+
+def write_asset_manifest(paths, manifest_path):
+    """各成果物を事前圧縮し、assets.json を書き出す"""
+    manifest = {}
+    for path in paths:
+        if os.path.exists(path):
+            manifest[os.path.basename(path)] = precompress_artifact(path)
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, separators=(',', ':'))
+    return manifest
+
+
+# ==========================================
+# ローカル配信用サーバー
+# ==========================================
+class PrecompressedHandler(SimpleHTTPRequestHandler):
+    """Accept-Encoding に応じて .br / .gz の隣接ファイルを返す静的サーバー"""
+
+    def send_head(self):
+        path = self.translate_path(self.path)
+        accepted = self.headers.get("Accept-Encoding", "")
+        if os.path.isfile(path):
+            for encoding, suffix in (("br", ".br"), ("gzip", ".gz")):
+                if encoding in accepted and os.path.isfile(path + suffix):
+                    return self._send_encoded(path, path + suffix, encoding)
+            # 圧縮版がない・受け付けないときも、圧縮版と同じキャッシュ指定を付ける (end_headers で追加)
+            self._identity_path = path
+        try:
+            return super().send_head()
+        finally:
+            self._identity_path = None
+
+    def end_headers(self):
+        path = getattr(self, "_identity_path", None)
+        if path is not None:
+            if os.path.isfile(path + ".br") or os.path.isfile(path + ".gz"):
+                self.send_header("Vary", "Accept-Encoding")
+            self.send_header("Cache-Control", self._cache_control(path))
+            self._identity_path = None
+        super().end_headers()
+
+    def _send_encoded(self, path, encoded_path, encoding):
+        f = open(encoded_path, "rb")
+        self.send_response(200)
+        self.send_header("Content-Type", self.guess_type(path))
+        self.send_header("Content-Encoding", encoding)
+        self.send_header("Content-Length", str(os.fstat(f.fileno()).st_size))
+        self.send_header("Vary", "Accept-Encoding")
+        self.send_header("Cache-Control", self._cache_control(path))
+        self.end_headers()
+        return f
+
+    def _cache_control(self, path):
+        stem = os.path.splitext(os.path.basename(path))[0]
+        parts = stem.split(".")
+        if len(parts) > 1 and len(parts[-1]) == HASH_LENGTH:
+            return IMMUTABLE_CACHE
+        return "no-cache"
+
+
+def make_server(directory, port=8000, precompressed=True):
+    handler = PrecompressedHandler if precompressed else SimpleHTTPRequestHandler
+    return ThreadingHTTPServer(("", port), partial(handler, directory=directory))
+
+
+def main():
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8000
+    server = make_server(base_dir, port)
+    print(f"Serving {base_dir} at http://localhost:{port}/demo002.html (Ctrl+C で終了)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -10,6 +10,19 @@ preprocess001.py の機能に加え、正規表現による「前提知識（ス
 3. Janomeによる形態素解析とTF-IDFベクトル化
 4. **[NEW] 正規表現によるスキルタグ抽出 (Grade/Welcome ルール適用)**
 5. ベクトルデータとメタデータの保存
+6. ブラウザ検索用の分割インデックス (`index/`) の保存
+7. (任意) バイナリ形式の成果物 (`*.bin`) の保存
+8. 成果物の事前圧縮 (.gz/.br) とハッシュ付きファイル名の対応表 (`assets.json`)
+9. ブラウザのクエリ語 → 語彙番号の対応表 (`query_lookup.json`)
+10. kNN 類似度グラフのコミュニティ番号 (`course_metadata.json` の "c")
+11. 学習済み TF-IDF モデル (`tfidf_model.json`: 語彙・IDF・設定。検索側とブラウザのクエリ重み付け用)
+12. 列指向のメタデータ (`course_columns.json`: 部局・開設期などを値の一覧 + 整数コードに。絞り込み用)
+13. 時間割 (`timetable.json`: ターム・曜日・時限・講義室と、コマのビット列。重なりの判定用)
+14. 分野ごとのロードマップ (`roadmap.json`: 年次・年次をまたぐつながり・配置済みの座標。v3/demo003.html 用)
+15. 前提となる授業の推定 (`prerequisites.json`: 年次・授業名のタグ・類似授業から作り推移簡約した DAG の隣接リスト)
+16. ほぼ同じ授業のまとまり (`duplicates.json` と `course_metadata.json` の "g": MinHash + LSH。おすすめ・検索で1件にまとめる)
+17. おすすめの多様化 (上位 M 件の類似授業を MMR + 部局・分野の上限で選び直す。N x N の類似度行列は作らない)
+18. ClusterViz 用の3次元座標 (`projection_map.npz`: テキストが変わらない授業は前回の座標を使い、新しい授業だけ近傍から配置)
 """
 # ==========================================
 # Script Name: preprocess002.py
@@ -20,22 +33,49 @@ preprocess001.py の機能に加え、正規表現による「前提知識（ス
 # Data Flow:
 #   Input  : reduced_integrated_arts_courses.json (or integrated_arts_courses.json)
 #   Output : syllabus_vectors.json
-#          : course_metadata.json
-#          : recommendations.json
+#          : course_metadata.json (+ "c": コミュニティ番号, communities.py / "g": ほぼ同じ授業の代表 ID, near_duplicates.py)
+#          : recommendations.json (diversify.py: 上位 M 件の類似授業を MMR で選び直す)
+#          : index/ (manifest.json, terms/*.json, meta/*.json)
+#          : query_lookup.json (query_analyzer.py)
+#          : tfidf_model.json (../common/tfidf_model.py)
+#          : course_columns.json (columnar_metadata.py)
+#          : timetable.json (timetable.py)
+#          : duplicates.json (near_duplicates.py)
+#          : prerequisites.json (prerequisites.py)
+#          : roadmap.json (roadmap.py)
+#          : projection_map.npz (projection.py, ClusterViz.py 用)
+#          : syllabus_vectors.bin, recommendations.bin (write_binary = True の場合)
+#          : assets.json + <name>.<hash>.json(.gz/.br) (precompress.py)
 # ==========================================
 
 import json
 import re
 import unicodedata
-import numpy as np
 from janome.tokenizer import Tokenizer
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+from shard_index import write_sharded_index
+from binary_codec import encode_vectors, encode_recommendations
+from precompress import write_asset_manifest, precompress_tree
+from query_analyzer import QueryLexicon
+from communities import detect_communities
+from columnar_metadata import write_columns
+from timetable import write_timetable
+from roadmap import DEFAULT_YEAR, write_roadmaps
+from prerequisites import PREREQ_NEIGHBORS, course_level, write_prerequisites
+from near_duplicates import canonical_map, collapse_neighbors, write_duplicates
+from neighbors import top_k_neighbors
+from diversify import category_codes, coverage, mmr_rerank, to_recommendations
+from projection import file_digest, project
+import os
+import sys
+import time
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "../common"))
+from tfidf_model import TfidfModel
+from course import load_courses
 
 # ==========================================
 # 設定
 # ==========================================
-import os
 base_dir = os.path.dirname(os.path.abspath(__file__))
 # Note: ".." traverses up one level from v2 to root, then into common_data
 input_file = os.path.join(base_dir, "../common_data/integrated_arts_courses.json")
@@ -43,6 +83,34 @@ input_file = os.path.join(base_dir, "../common_data/integrated_arts_courses.json
 output_file = os.path.join(base_dir, "syllabus_vectors.json")
 metadata_file = os.path.join(base_dir, "course_metadata.json")
 recommendation_file = os.path.join(base_dir, "recommendations.json")
+index_dir = os.path.join(base_dir, "index") # 分割インデックス (ブラウザ検索用)
+query_lookup_file = os.path.join(base_dir, "query_lookup.json") # クエリ語 -> 語彙番号
+tfidf_model_file = os.path.join(base_dir, "tfidf_model.json") # 語彙・IDF・設定 (クエリのベクトル化用)
+columns_file = os.path.join(base_dir, "course_columns.json") # 列指向のメタデータ (絞り込み用)
+timetable_file = os.path.join(base_dir, "timetable.json") # 解析済みの時間割 + コマのビット列
+duplicate_file = os.path.join(base_dir, "duplicates.json") # ほぼ同じ授業のまとまり (MinHash + LSH)
+prerequisite_file = os.path.join(base_dir, "prerequisites.json") # 前提となる授業の DAG (隣接リスト)
+roadmap_file = os.path.join(base_dir, "roadmap.json") # 分野ごとのロードマップ (配置済み, v3/demo003.html 用)
+
+# おすすめ (似ている授業) の選び方 (diversify.py 参照)
+recommendation_top_k = 5
+recommendation_candidates = 30  # 上位 M 件の類似授業から選び直す
+mmr_lambda = 0.7                # 1.0 にすると類似度の高い順のまま (多様性を考えない)
+max_per_department = None       # 同じ部局のおすすめの上限 (None: 制限なし)
+max_per_field = 3               # 同じ分野のおすすめの上限
+
+# True にすると JSON に加えてコンパクトなバイナリ版も書き出す (binary_codec.py 参照)
+write_binary = False
+binary_vector_file = os.path.join(base_dir, "syllabus_vectors.bin")
+binary_recommendation_file = os.path.join(base_dir, "recommendations.bin")
+
+# ClusterViz.py 用の3次元座標 (SVD + t-SNE) を計算・更新する (projection.py 参照)
+write_projection = True
+projection_file = os.path.join(base_dir, "projection_map.npz")
+
+# 静的サーバー向けに .gz/.br とハッシュ付きファイル名を書き出す (precompress.py 参照)
+precompress_outputs = True
+asset_manifest_file = os.path.join(base_dir, "assets.json")
 
 # ==========================================
 # スキル抽出用 定義
@@ -65,13 +133,16 @@ WELCOME_PATTERN = r'(文系|初心者|初学者|学部・学科|全学部|誰で
 # ==========================================
 # データの読み込み
 # ==========================================
-try:
-    with open(input_file, 'r', encoding='utf-8') as f:
-        syllabus_data = json.load(f)
-    print(f"データ読み込み完了: {len(syllabus_data)}件")
-except FileNotFoundError:
-    print(f"エラー: 入力ファイル '{input_file}' が見つかりません")
-    exit()
+# ※ モジュール読み込み時には実行しない (search_service.py などから前処理関数を再利用するため)
+def load_syllabus_data(path):
+    """{講義コード: Course} (長い本文は必要なときに読み直す。../common/course.py)"""
+    try:
+        data = load_courses(path)
+        print(f"データ読み込み完了: {len(data)}件")
+        return data
+    except FileNotFoundError:
+        print(f"エラー: 入力ファイル '{path}' が見つかりません")
+        exit()
 
 # ==========================================
 # 前処理関数
@@ -90,14 +161,26 @@ def clean_course_name(name):
     cleaned = re.sub(r'\[.*?\]', '', name)
     return cleaned.strip()
 
-def get_words(text):
+def get_noun_runs(text):
+    """
+    連続する名詞をひとまとまり (run) にして (表層形, 原形) のリストで返す。
+    例: "データ分析を学ぶ" -> [[("データ", "データ"), ("分析", "分析")]]
+    """
     text = normalize_text(text)
-    tokens = t.tokenize(text)
-    words = []
-    for token in tokens:
+    runs = []
+    current = []
+    for token in t.tokenize(text):
         if token.part_of_speech.split(',')[0] in ['名詞']:
-            words.append(token.base_form)
-    return " ".join(words)
+            current.append((token.surface, token.base_form))
+        elif current:
+            runs.append(current)
+            current = []
+    if current:
+        runs.append(current)
+    return runs
+
+def get_words(text):
+    return " ".join(base for run in get_noun_runs(text) for _, base in run)
 
 # ==========================================
 # Patterns for Class Name Tags
@@ -170,63 +253,77 @@ def extract_skills(text, grade_year, info_dict):
 
 def get_grade(term_str):
     """
-    開設期文字列から年次を抽出。見つからない場合はデフォルトで1とする。
+    開設期文字列から年次を抽出。見つからない場合は roadmap.py と同じ DEFAULT_YEAR (4) とする。
     例: "2年次生 前期" -> 2
     """
     if not term_str:
-        return 1
+        return DEFAULT_YEAR
     match = re.search(r'(\d+)年次', term_str)
     if match:
         return int(match.group(1))
-    return 1
+    return DEFAULT_YEAR
+
+def prepare_course(info):
+    """
+    1授業分の前処理。戻り値: (解析用テキスト, スキルのリスト, 表示用メタデータ)
+    (stream_vectorize.py からも使う)
+    """
+    # --- Data Prep ---
+    raw_name = str(info.get("授業科目名", ""))
+    norm_name = normalize_text(raw_name)
+    clean_name = clean_course_name(norm_name)
+
+    # Combined Text for NLP & Skill Extraction
+    target_text = (
+        clean_name + " " +
+        str(info.get("授業の目標・概要等", "")) + " " +
+        str(info.get("メッセージ", "")) + " " +
+        str(info.get("履修上の注意 受講条件等", ""))
+    )
+
+    grade = get_grade(str(info.get("開設期", "")))
+    skills = extract_skills(target_text, grade, info)
+
+    meta = {
+        "n": clean_name,
+        "d": normalize_text(info.get("開講部局", "")),
+        "t": normalize_text(info.get("開設期", "")),
+        "w": normalize_text(info.get("曜日・時限・講義室", "")),
+        "i": normalize_text(info.get("担当教員名", "")),
+        "a": normalize_text(info.get("領域", "")),
+        "f": normalize_text(info.get("分野", ""))
+    }
+    return target_text, skills, meta
 
 # ==========================================
 # メイン処理
 # ==========================================
 def main():
+    syllabus_data = load_syllabus_data(input_file)
+
     print("形態素解析とスキル抽出を実行中...")
     corpus = []
     course_ids = []
     all_skills_data = [] # List of lists
 
     metadata_map = {}
+    lexicon = QueryLexicon() # 表層形 -> 原形 の対応 (クエリ解析用)
 
     for code_key, info in syllabus_data.items():
-        if not isinstance(info, dict): continue
+        target_text, skills, meta = prepare_course(info)
 
-        # --- Data Prep ---
-        raw_name = str(info.get("授業科目名", ""))
-        norm_name = normalize_text(raw_name)
-        clean_name = clean_course_name(norm_name)
-        
-        # Combined Text for NLP & Skill Extraction
-        target_text = (
-            clean_name + " " +
-            str(info.get("授業の目標・概要等", "")) + " " +
-            str(info.get("メッセージ", "")) + " " +
-            str(info.get("履修上の注意 受講条件等", ""))
-        )
-        
         # --- 1. TF-IDF Prep ---
-        words = get_words(target_text)
+        noun_runs = get_noun_runs(target_text)
+        lexicon.add_runs(noun_runs)
+        words = " ".join(base for run in noun_runs for _, base in run)
         corpus.append(words)
         course_ids.append(code_key)
 
         # --- 2. Skill Extraction ---
-        grade = get_grade(str(info.get("開設期", "")))
-        skills = extract_skills(target_text, grade, info)
         all_skills_data.append(skills)
 
         # --- 3. Metadata Prep ---
-        metadata_map[code_key] = {
-            "n": clean_name,
-            "d": normalize_text(info.get("開講部局", "")),
-            "t": normalize_text(info.get("開設期", "")),
-            "w": normalize_text(info.get("曜日・時限・講義室", "")),
-            "i": normalize_text(info.get("担当教員名", "")),
-            "a": normalize_text(info.get("領域", "")),
-            "f": normalize_text(info.get("分野", ""))
-        }
+        metadata_map[code_key] = meta
 
     # ==========================================
     # ベクトル化 (TF-IDF)
@@ -246,6 +343,26 @@ def main():
 
     vocabulary = {k: int(v) for k, v in vectorizer.vocabulary_.items()}
 
+    # ==========================================
+    # コミュニティ検出 (kNN 類似度グラフ + Louvain 法)
+    # ==========================================
+    print("コミュニティを検出中...")
+    community_labels, community_score = detect_communities(X)
+    for code_key, label in zip(course_ids, community_labels):
+        metadata_map[code_key]["c"] = int(label)
+    print(f"{community_labels.max() + 1} communities (modularity {community_score:.3f})")
+
+    # ==========================================
+    # ほぼ同じ授業 (日英版・I/II・ターム違い) のまとまり (MinHash + LSH)
+    # ==========================================
+    print("ほぼ同じ授業を検出中...")
+    duplicate_bytes, duplicate_clusters = write_duplicates(duplicate_file, course_ids, corpus)
+    canonical = canonical_map(duplicate_clusters)
+    for code_key, canon in canonical.items():
+        metadata_map[code_key]["g"] = canon
+    print(f"完了！ '{duplicate_file}' を保存しました ({len(duplicate_clusters)} clusters, "
+          f"{len(canonical)} courses, {duplicate_bytes} bytes)。")
+
     # ==========================================
     # 保存 1: ベクトルデータ (検索用) + Skills
     # ==========================================
@@ -268,30 +385,107 @@ def main():
         json.dump(metadata_map, f, ensure_ascii=False, separators=(',', ':'))
     print(f"完了！ '{metadata_file}' を保存しました。")
 
+    # 同じ内容の列指向版 (部局・開設期などは値の一覧 + 整数コード)
+    columns_bytes = write_columns(columns_file, course_ids, metadata_map)
+    print(f"完了！ '{columns_file}' を保存しました ({columns_bytes} bytes)。")
+
+    # 曜日・時限・講義室 / 開設期 の解析結果 (ブラウザで毎回正規表現で解析しないため)
+    credits = {code_key: syllabus_data[code_key].get("単位", "") for code_key in course_ids}
+    timetable_bytes = write_timetable(timetable_file, course_ids, metadata_map, credits)
+    print(f"完了！ '{timetable_file}' を保存しました ({timetable_bytes} bytes)。")
+
+    # 前提となる授業 (年次・授業名のタグ・上位 k 件の類似授業から推定し、推移簡約した DAG)
+    # 上位 M 件の類似授業 (N x N の行列は作らない。前提の推定とおすすめで共用)
+    print("類似度を計算中...")
+    # おすすめ用には、ほぼ同じ授業をまとめても M 件残るよう一番大きいまとまりの件数だけ多めに取る
+    largest_cluster = max((len(members) for members in duplicate_clusters.values()), default=1)
+    neighbor_indices, neighbor_sims = top_k_neighbors(
+        X, max(recommendation_candidates + largest_cluster, PREREQ_NEIGHBORS))
+    levels = [course_level(get_grade(str(syllabus_data[code_key].get("開設期", ""))), skills)
+              for code_key, skills in zip(course_ids, all_skills_data)]
+    prerequisite_bytes, prerequisites = write_prerequisites(
+        prerequisite_file, course_ids, levels, X,
+        neighbors=(neighbor_indices[:, :PREREQ_NEIGHBORS], neighbor_sims[:, :PREREQ_NEIGHBORS]))
+    print(f"完了！ '{prerequisite_file}' を保存しました ({prerequisites['edges']} edges, {prerequisite_bytes} bytes)。")
+
+    # 分野ごとのロードマップ (年次・年次をまたぐつながり・座標を前処理で計算)
+    roadmap_bytes = write_roadmaps(roadmap_file, course_ids, metadata_map, X, prerequisites["p"])
+    print(f"完了！ '{roadmap_file}' を保存しました ({roadmap_bytes} bytes)。")
+
+    # ==========================================
+    # 保存 2b: 分割インデックス (クエリに必要な分だけ取得する用)
+    # ==========================================
+    index_bytes = write_sharded_index(index_dir, vocabulary, sparse_vectors, course_ids, metadata_map)
+    print(f"完了！ '{index_dir}' に分割インデックスを保存しました ({index_bytes} bytes)。")
+
+    # ==========================================
+    # 保存 2c: クエリ語 -> 語彙番号 の対応表 (ブラウザのクエリ解析用)
+    # ==========================================
+    with open(query_lookup_file, "w", encoding="utf-8") as f:
+        json.dump(lexicon.to_table(vocabulary), f, ensure_ascii=False, separators=(',', ':'))
+    print(f"完了！ '{query_lookup_file}' を保存しました。")
+
+    # ==========================================
+    # 保存 2d: 学習済み TF-IDF モデル (検索時に再学習しないため)
+    # ==========================================
+    tfidf_model = TfidfModel.from_vectorizer(vectorizer)
+    tfidf_model.save(tfidf_model_file)
+    print(f"完了！ '{tfidf_model_file}' を保存しました。")
+
+    # ==========================================
+    # 保存 2e: ClusterViz 用の3次元座標 (テキストが変わらない授業は前回の位置をそのまま使う)
+    # ==========================================
+    if write_projection:
+        start = time.perf_counter()
+        projection = project(course_ids, corpus, X, tfidf_model, path=projection_file,
+                             source=file_digest(output_file))
+        print(f"完了！ '{projection_file}' を保存しました ({projection.mode}, "
+              f"近傍から配置 {int(projection.placed.sum())} 件, {time.perf_counter() - start:.2f} s)。")
+
     # ==========================================
     # 保存 3: 類似授業
     # ==========================================
-    print("類似度を計算中...")
-    sim_matrix = cosine_similarity(X, X)
-    recommendations = {}
-    top_k = 5
-
-    for i in range(len(course_ids)):
-        scores = sim_matrix[i]
-        scores[i] = -1
-        top_indices = scores.argsort()[::-1][:top_k]
-        # スコアが0より大きいものだけ選ぶ (全く関係ないものはおすすめしない)
-        filtered_indices = [idx for idx in top_indices if scores[idx] > 0]
-        
-        # IDとスコア(パーセンテージ用に保持)のリストに変換
-        # [ [id, score], [id, score], ... ]
-        recommended_data = [[course_ids[idx], round(scores[idx], 3)] for idx in filtered_indices]
-        
-        recommendations[course_ids[i]] = recommended_data
+    print("おすすめを選び直し中 (MMR)...")
+    start = time.perf_counter()
+    groups = category_codes([canonical.get(code_key, code_key) for code_key in course_ids])
+    departments = category_codes([metadata_map[code_key]["d"] for code_key in course_ids])
+    fields = category_codes([metadata_map[code_key]["f"] for code_key in course_ids])
+    # 候補を M 件で切る前に、まとまりごとに1件にする (自分のまとまりは除く)
+    candidate_indices, candidate_sims = collapse_neighbors(neighbor_indices, neighbor_sims, groups,
+                                                           recommendation_candidates)
+    picked, picked_sims = mmr_rerank(X, candidate_indices, candidate_sims, recommendation_top_k,
+                                     mmr_lambda, groups, departments, fields,
+                                     max_per_department, max_per_field)
+    # [ [id, score], [id, score], ... ] (スコアは元の授業との類似度、パーセンテージ表示用)
+    recommendations = to_recommendations(course_ids, picked, picked_sims)
+    print(f"{(time.perf_counter() - start) * 1000:.0f} ms, "
+          f"おすすめに出る授業 {coverage(picked, len(course_ids)):.1%}")
 
     with open(recommendation_file, "w", encoding="utf-8") as f:
         json.dump(recommendations, f, ensure_ascii=False, separators=(',', ':'))
     print(f"完了！ '{recommendation_file}' を保存しました。")
 
+    # ==========================================
+    # 保存 4: バイナリ版 (任意)
+    # ==========================================
+    if write_binary:
+        with open(binary_vector_file, "wb") as f:
+            f.write(encode_vectors(output_vector_data))
+        with open(binary_recommendation_file, "wb") as f:
+            f.write(encode_recommendations(recommendations))
+        print(f"完了！ '{binary_vector_file}', '{binary_recommendation_file}' を保存しました。")
+
+    # ==========================================
+    # 保存 5: 事前圧縮 + ハッシュ付きファイル名
+    # ==========================================
+    if precompress_outputs:
+        artifacts = [output_file, metadata_file, recommendation_file, query_lookup_file, tfidf_model_file,
+                     columns_file, timetable_file, duplicate_file, prerequisite_file, roadmap_file]
+        if write_binary:
+            artifacts += [binary_vector_file, binary_recommendation_file]
+        write_asset_manifest(artifacts, asset_manifest_file)
+        precompress_tree(index_dir)
+        print(f"完了！ '{asset_manifest_file}' (事前圧縮ファイルの対応表) を保存しました。")
+
 if __name__ == "__main__":
     main()
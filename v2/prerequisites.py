@@ -0,0 +1,223 @@
+# ==========================================
+# Script Name: prerequisites.py
+# Description:
+#   [EN] Infers likely prerequisite edges between courses and keeps them as
+#        a compact DAG. Candidate pairs are the sparse top-k neighbour lists
+#        of neighbors.py (no N x N matrix), so the cost is O(N x k). Each
+#        course gets a level from its year (get_grade) and its name tags
+#        (tag_intro < untagged < tag_advanced within a year; a name with
+#        both tags counts as intro); a similar pair becomes an edge from
+#        the lower to the higher level, equal levels give no edge, so the
+#        graph is acyclic by construction. Each course
+#        keeps its MAX_PREREQUISITES most similar parents, then transitive
+#        reduction drops u -> v whenever v is already reachable from u
+#        through another parent. The result is saved as a cached adjacency
+#        list (parents with similarity + children) for the visualizers and
+#        roadmap.py.
+#   [JP] 授業の間の「前提となる授業」の関係を推定し、推移簡約した DAG として保存します。
+#        候補は neighbors.py の上位 k 件の類似授業だけ (N x N の行列は作りません)。
+#        年次 (get_grade) と授業名のタグ (入門・基礎 < なし < 特論・応用) で授業の段階を決め、
+#        似ている2授業の段階の低い方から高い方へ辺を張ります。同じ段階の間には張らないので
+#        閉路はできません。他の経路でたどれる辺は除きます (推移簡約)。
+#
+# Data Flow:
+#   Input  : (preprocess002.py から呼び出し) 授業ID, 年次, スキルタグ, TF-IDF 行列
+#          : (単体で実行する場合) syllabus_vectors.json, course_metadata.json
+#   Output : prerequisites.json
+#
+# Layout:
+#   {"ver": 1, "edges": 辺の数,
+#    "p": {授業ID: [[前提の授業ID, 類似度], ...]},   (類似度の降順)
+#    "s": {授業ID: [次の授業ID, ...]}}
+#
+# Usage:
+#   python prerequisites.py               # 既存の成果物から prerequisites.json を作る
+#   python prerequisites.py <講義コード>  # その授業の前提・次の授業を表示
+# ==========================================
+
+import json
+import os
+import sys
+from collections import defaultdict
+
+import numpy as np
+
+from neighbors import top_k_neighbors
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+vector_file = os.path.join(base_dir, "syllabus_vectors.json")
+metadata_file = os.path.join(base_dir, "course_metadata.json")
+prerequisite_file = os.path.join(base_dir, "prerequisites.json")
+
+PREREQUISITES_VERSION = 1
+JSON_SEPARATORS = (',', ':')
+
+PREREQ_NEIGHBORS = 10         # 候補にする類似授業の数 (各授業の上位 k 件)
+MIN_PREREQ_SIMILARITY = 0.15  # これ未満の類似度では辺を張らない
+MAX_PREREQUISITES = 3         # 1授業あたりの前提の授業の最大数 (推移簡約の前)
+
+# 授業名のタグ -> 年次の中での段階 (タグなしは 1)
+TAG_LEVELS = {"tag_intro": 0, "tag_advanced": 2}
+LEVELS_PER_YEAR = 3
+
+
+def course_level(grade, skills=()):
+    """
+    年次とタグ -> 段階 (例: 2年次の「〜概論」 -> 6, 2年次の「〜特論」 -> 8)
+    両方のタグがある授業 (「応用言語学入門」など) は低い方 (入門) にする。
+    skills は set から作ったリストで順番が実行ごとに変わるため、最初に見つかったタグは使わない
+    """
+    tag = min((TAG_LEVELS[skill] for skill in skills if skill in TAG_LEVELS), default=1)
+    return grade * LEVELS_PER_YEAR + tag
+
+
+def candidate_edges(indices, sims, levels, min_similarity=MIN_PREREQ_SIMILARITY):
+    """
+    上位 k 件の類似授業 -> 段階の低い方から高い方への辺 (前提, 授業, 類似度) の配列。
+    どちらの上位 k 件に入っていても候補にする (同じ組は1本にまとめる)
+    """
+    n, k = indices.shape
+    rows = np.repeat(np.arange(n), k)
+    cols, weights = indices.ravel().astype(np.int64), sims.ravel()
+    keep = (cols >= 0) & (weights >= min_similarity)
+    rows, cols, weights = rows[keep], cols[keep], weights[keep]
+    levels = np.asarray(levels)
+    keep = levels[rows] != levels[cols]
+    rows, cols, weights = rows[keep], cols[keep], weights[keep]
+    low = levels[rows] < levels[cols]
+    parent = np.where(low, rows, cols)
+    child = np.where(low, cols, rows)
+    pairs = np.unique(np.stack([parent, child], axis=1), axis=0, return_index=True)[1]
+    return parent[pairs], child[pairs], weights[pairs]
+
+
+def transitive_reduction(parents, levels):
+    """
+    parents: {授業: [(前提, 類似度), ...]} (DAG)。
+    ほかの前提からたどれる前提を除いた parents を返す。
+    たどるのは段階が一番低い前提より高い授業だけ (それ以下の授業からは前提に届かない)
+    """
+    reduced = {}
+    for child, edges in parents.items():
+        direct = {p for p, _ in edges}
+        floor = min(levels[p] for p in direct)
+        reachable = set()
+        stack = list(direct)
+        seen = set(direct)
+        while stack:
+            node = stack.pop()
+            for p, _ in parents.get(node, ()):
+                reachable.add(p)
+                if p not in seen and levels[p] > floor:
+                    seen.add(p)
+                    stack.append(p)
+        kept = [(p, s) for p, s in edges if p not in reachable]
+        if kept:
+            reduced[child] = kept
+    return reduced
+
+
+def build_prerequisites(course_ids, levels, X, k=PREREQ_NEIGHBORS, min_similarity=MIN_PREREQ_SIMILARITY,
+                        max_prerequisites=MAX_PREREQUISITES, neighbors=None):
+    """
+    levels: course_level() の値 (course_ids と同じ順)。X: L2正規化済みの CSR 行列。
+    neighbors: 計算済みの top_k_neighbors(X, k) の結果 (なければここで計算する)
+    """
+    indices, sims = neighbors if neighbors is not None else top_k_neighbors(X, k)
+    parent, child, weight = candidate_edges(indices, sims, levels, min_similarity)
+
+    parents = defaultdict(list)
+    for p, c, w in zip(parent.tolist(), child.tolist(), weight.tolist()):
+        parents[c].append((p, w))
+    for c in parents:
+        parents[c] = sorted(parents[c], key=lambda e: -e[1])[:max_prerequisites]
+    reduced = transitive_reduction(parents, levels)
+
+    p_lists, s_lists = {}, defaultdict(list)
+    edges = 0
+    for c in sorted(reduced):
+        p_lists[course_ids[c]] = [[course_ids[p], round(w, 3)] for p, w in reduced[c]]
+        for p, _ in reduced[c]:
+            s_lists[course_ids[p]].append(course_ids[c])
+        edges += len(reduced[c])
+    return {"ver": PREREQUISITES_VERSION, "edges": edges, "p": p_lists, "s": dict(s_lists)}
+
+
+def write_prerequisites(path, course_ids, levels, X, **kwargs):
+    """prerequisites.json を保存し、(書き込んだバイト数, 内容) を返す"""
+    data = build_prerequisites(course_ids, levels, X, **kwargs)
+    encoded = json.dumps(data, ensure_ascii=False, separators=JSON_SEPARATORS).encode("utf-8")
+    with open(path, "wb") as f:
+        f.write(encoded)
+    return len(encoded), data
+
+
+class PrerequisiteGraph:
+    """
+    prerequisites.json の読み込みとたどり方。
+    例: graph.ancestors("ANM04001") -> その授業の前に取るとよい授業 (近い順)
+    """
+
+    def __init__(self, data):
+        self.parent_lists = data.get("p", {})
+        self.child_lists = data.get("s", {})
+
+    @classmethod
+    def load(cls, path=prerequisite_file):
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def parents(self, cid):
+        return [p for p, _ in self.parent_lists.get(cid, [])]
+
+    def children(self, cid):
+        return list(self.child_lists.get(cid, []))
+
+    def _walk(self, cid, step):
+        order, seen, frontier = [], {cid}, [cid]
+        while frontier:
+            following = []
+            for node in frontier:
+                for other in step(node):
+                    if other not in seen:
+                        seen.add(other)
+                        order.append(other)
+                        following.append(other)
+            frontier = following
+        return order
+
+    def ancestors(self, cid):
+        return self._walk(cid, self.parents)
+
+    def descendants(self, cid):
+        return self._walk(cid, self.children)
+
+
+def main():
+    if len(sys.argv) > 1:
+        graph = PrerequisiteGraph.load()
+        with open(metadata_file, "r", encoding="utf-8") as f:
+            metadata = json.load(f)
+        name = lambda cid: metadata.get(cid, {}).get("n", "")
+        for cid in sys.argv[1:]:
+            print(f"{cid} {name(cid)}")
+            print("  前提:", ", ".join(f"{p} {name(p)}" for p in graph.ancestors(cid)) or "-")
+            print("  次:  ", ", ".join(f"{c} {name(c)}" for c in graph.descendants(cid)) or "-")
+        return
+
+    from preprocess002 import get_grade
+    from sparse_cluster import to_csr
+    with open(vector_file, "r", encoding="utf-8") as f:
+        vector_data = json.load(f)
+    with open(metadata_file, "r", encoding="utf-8") as f:
+        metadata = json.load(f)
+    course_ids = vector_data["i"]
+    skills = vector_data.get("skills") or [[] for _ in course_ids]
+    levels = [course_level(get_grade(metadata.get(cid, {}).get("t", "")), s) for cid, s in zip(course_ids, skills)]
+    size, data = write_prerequisites(prerequisite_file, course_ids, levels, to_csr(vector_data))
+    print(f"{data['edges']} edges for {len(data['p'])} courses")
+    print(f"'{prerequisite_file}' を保存しました ({size} bytes)。")
+
+
+if __name__ == "__main__":
+    main()
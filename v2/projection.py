@@ -0,0 +1,218 @@
+# ==========================================
+# Script Name: projection.py
+# Description:
+#   [EN] 3D projection stage for ClusterViz.py, run by preprocess002.py.
+#        Reduces the sparse TF-IDF rows with TruncatedSVD (no dense N x V
+#        copy), then runs Barnes-Hut t-SNE on the reduced matrix. Rows are
+#        keyed by course ID + a hash of the tokenised source text, because
+#        preprocess002.py refits the TF-IDF (vocabulary and IDF) on every
+#        run and the row vectors of unchanged courses change with it. The
+#        map keeps the TF-IDF model it was fitted with (tfidf_model.py);
+#        when only a few courses are new or changed, their text is
+#        vectorised with that saved model, projected with the saved SVD
+#        components and placed into the existing map from their nearest
+#        neighbours, instead of recomputing the whole layout.
+#        ClusterViz.py only loads the map (load_projection) and recomputes
+#        it in memory if it does not belong to the current
+#        syllabus_vectors.json.
+#   [JP] ClusterViz.py 用の3次元射影ステージです (preprocess002.py から実行)。
+#        TruncatedSVD で次元を落としてから Barnes-Hut t-SNE を行い、座標をディスクに保存します。
+#        TF-IDF は毎回学習し直すので、行は「授業ID + 形態素解析済みテキストのハッシュ」で識別します。
+#        新規・変更された授業が少なければ、地図と一緒に保存した TF-IDF モデルと SVD の基底で
+#        ベクトル化し、SVD 空間の近傍から位置を決めて既存の地図に追加します (全体は再計算しない)。
+#
+# Data Flow:
+#   Input  : (preprocess002.py から呼び出し) 授業ID, 形態素解析済みのテキスト, TF-IDF 行列, TfidfModel
+#   Output : projection_map.npz
+#            {"hash", "source" (syllabus_vectors.json の sha256), "ids", "keys" (テキストのハッシュ),
+#             "coords" [N,3], "components" (SVD の基底), "reduced" [N, svd次元],
+#             "placed" (近傍から配置した行), "mode", "words" / "idf" / "cfg" (地図を作ったときの TF-IDF)}
+# ==========================================
+
+import hashlib
+import json
+import os
+import sys
+import numpy as np
+from sklearn.decomposition import TruncatedSVD
+from sklearn.manifold import TSNE
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(base_dir, "../common"))
+from tfidf_model import TfidfModel
+
+projection_file = os.path.join(base_dir, "projection_map.npz")
+
+SVD_COMPONENTS = 50
+NEIGHBORS = 10
+# Barnes-Hut の近似を粗めに (既定 0.5)、反復は 500 回 (既定 1000)。
+# 実データでは既定値と見た目の品質 (trustworthiness) がほぼ変わらず約3倍速い
+TSNE_ANGLE = 0.8
+TSNE_ITER = 500
+# 近傍から配置した授業 (前回の全体計算以降の累計) がこの割合を超えたら全体を計算し直す
+MAX_NEW_FRACTION = 0.2
+
+
+def text_key(text):
+    """形態素解析済みテキストのハッシュ (TF-IDF を学習し直しても変わらない)"""
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+
+
+def file_digest(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def input_hash(ids, keys, params):
+    digest = hashlib.sha256(repr(sorted(params.items())).encode("utf-8"))
+    for cid, key in zip(ids, keys):
+        digest.update(f"{cid}:{key}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _normalize(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class ProjectionMap:
+    def __init__(self, ids, keys, coords, components, reduced, placed=None, input_digest="", mode="full",
+                 model=None, source=""):
+        self.ids = list(ids)
+        self.keys = list(keys)
+        self.coords = coords
+        self.components = components
+        self.reduced = reduced
+        self.placed = placed if placed is not None else np.zeros(len(self.ids), dtype=bool)
+        self.hash = input_digest
+        self.mode = mode
+        self.model = model  # components の列に対応する TF-IDF モデル (None なら追加配置はできない)
+        self.source = source
+
+    @classmethod
+    def fit(cls, X, ids, keys=None, model=None, n_components=3, svd_components=SVD_COMPONENTS, perplexity=30,
+            random_state=42):
+        """X: model で作った TF-IDF 行列。keys: 行ごとのテキストのハッシュ"""
+        svd_components = min(svd_components, X.shape[1] - 1, X.shape[0] - 1)
+        svd = TruncatedSVD(n_components=svd_components, random_state=random_state)
+        reduced = svd.fit_transform(X)
+        tsne = TSNE(n_components=n_components, method="barnes_hut", angle=TSNE_ANGLE, max_iter=TSNE_ITER,
+                    init="pca", learning_rate=200, perplexity=min(perplexity, (X.shape[0] - 1) / 3),
+                    random_state=random_state)
+        coords = tsne.fit_transform(reduced)
+        keys = keys if keys is not None else [""] * len(ids)
+        return cls(ids, keys, coords, svd.components_, _normalize(reduced), model=model)
+
+    def reduce(self, X):
+        """新しい行を保存済みの SVD 基底で射影する"""
+        return _normalize(np.asarray(X @ self.components.T))
+
+    def place(self, X_new, k=NEIGHBORS, chunk=1024):
+        """
+        地図に無い授業の座標を、SVD 空間で近い既存の授業の座標の加重平均で決める
+        (X_new は地図を作ったときの TF-IDF モデルでベクトル化した行。重み = コサイン類似度,
+        類似度 0 以下の近傍は使わない)
+        """
+        reduced_new = self.reduce(X_new)
+        k = min(k, len(self.ids))
+        coords = np.zeros((reduced_new.shape[0], self.coords.shape[1]))
+        for start in range(0, reduced_new.shape[0], chunk):
+            sims = reduced_new[start:start + chunk] @ self.reduced.T
+            nearest = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+            weights = np.clip(np.take_along_axis(sims, nearest, axis=1), 0, None)
+            weights[weights.sum(axis=1) == 0] = 1.0  # 似た授業が無ければ単純平均
+            weights /= weights.sum(axis=1, keepdims=True)
+            coords[start:start + chunk] = np.einsum("nk,nkd->nd", weights, self.coords[nearest])
+        return coords, reduced_new
+
+    def update(self, ids, texts, X, model, max_new_fraction=MAX_NEW_FRACTION, **fit_params):
+        """
+        現在の入力 (授業ID, テキスト, 今回の TF-IDF 行列とモデル) に合わせた地図を返す。
+        新しい授業のテキストは地図を作ったときのモデル (self.model) でベクトル化する。
+        戻り値の mode: "cached" (変更なし) / "incremental" (追加分だけ配置) / "full" (再計算)
+        """
+        keys = [text_key(text) for text in texts]
+        known = {(cid, key): row for row, (cid, key) in enumerate(zip(self.ids, self.keys))}
+        old_rows = [known.get((cid, key)) for cid, key in zip(ids, keys)]
+        new_rows = [k for k, row in enumerate(old_rows) if row is None]
+
+        kept = [k for k, row in enumerate(old_rows) if row is not None]
+        kept_old = [old_rows[k] for k in kept]
+
+        if not new_rows and len(ids) == len(self.ids):
+            return ProjectionMap(ids, keys, self.coords[kept_old], self.components, self.reduced[kept_old],
+                                 self.placed[kept_old], mode="cached", model=self.model)
+        if self.model is None or len(new_rows) + int(self.placed[kept_old].sum()) > max_new_fraction * len(ids):
+            return ProjectionMap.fit(X, ids, keys, model, **fit_params)
+
+        coords = np.zeros((len(ids), self.coords.shape[1]))
+        reduced = np.zeros((len(ids), self.reduced.shape[1]))
+        placed = np.zeros(len(ids), dtype=bool)
+        coords[kept], reduced[kept], placed[kept] = self.coords[kept_old], self.reduced[kept_old], self.placed[kept_old]
+        if new_rows:
+            coords[new_rows], reduced[new_rows] = self.place(self.model.transform([texts[k] for k in new_rows]))
+            placed[new_rows] = True
+        return ProjectionMap(ids, keys, coords, self.components, reduced, placed, mode="incremental",
+                             model=self.model)
+
+    def save(self, path=projection_file):
+        model = {}
+        if self.model is not None:
+            model = {"words": np.array(self.model.words), "idf": self.model.idf,
+                     "cfg": json.dumps(self.model.config, ensure_ascii=False)}
+        np.savez(path, hash=self.hash, source=self.source, ids=np.array(self.ids), keys=np.array(self.keys),
+                 coords=self.coords, components=self.components, reduced=self.reduced, placed=self.placed,
+                 mode=self.mode, **model)
+
+    @classmethod
+    def load(cls, path=projection_file):
+        data = np.load(path)
+        model = None
+        if "words" in data.files:
+            model = TfidfModel(data["words"].tolist(), data["idf"], json.loads(str(data["cfg"])))
+        source = str(data["source"]) if "source" in data.files else ""
+        return cls(data["ids"].tolist(), data["keys"].tolist(), data["coords"], data["components"],
+                   data["reduced"], data["placed"], str(data["hash"]), str(data["mode"]), model, source)
+
+
+def project(ids, texts, X, model, path=projection_file, source="", n_components=3, svd_components=SVD_COMPONENTS,
+            max_new_fraction=MAX_NEW_FRACTION):
+    """
+    preprocess002.py から呼ぶ。授業ID・形態素解析済みテキスト・今回の TF-IDF 行列とモデル -> ProjectionMap
+    (coords は ids の順)。source: 地図が対応する syllabus_vectors.json の sha256 (ClusterViz の照合用)
+    テキストのハッシュが保存済みの地図と同じならそのまま読み込む
+    """
+    keys = [text_key(text) for text in texts]
+    params = {"n_components": n_components, "svd_components": svd_components}
+    digest = input_hash(ids, keys, params)
+
+    previous = ProjectionMap.load(path) if os.path.exists(path) else None
+    if previous is not None and previous.hash == digest:
+        previous.mode = "cached"
+        result = previous
+    elif previous is not None and previous.coords.shape[1] == n_components \
+            and previous.components.shape[0] == min(svd_components, X.shape[1] - 1, X.shape[0] - 1):
+        result = previous.update(ids, texts, X, model, max_new_fraction,
+                                 n_components=n_components, svd_components=svd_components)
+    else:
+        result = ProjectionMap.fit(X, ids, keys, model, n_components=n_components, svd_components=svd_components)
+    if result.hash != digest or result.source != source:
+        result.hash = digest
+        result.source = source
+        result.save(path)
+    return result
+
+
+def load_projection(ids, source, path=projection_file):
+    """
+    ClusterViz.py 用: preprocess002.py が今の syllabus_vectors.json (sha256 = source) と一緒に
+    保存した地図を返す。無い・古い場合は None
+    """
+    if not os.path.exists(path):
+        return None
+    projection = ProjectionMap.load(path)
+    if projection.source != source or projection.ids != list(ids):
+        return None
+    projection.mode = "cached"
+    return projection
@@ -0,0 +1,128 @@
+# ==========================================
+# Script Name: query_analyzer.py
+# Description:
+#   [EN] Query-time tokenisation consistent with the index.
+#        The index is built from Janome noun base forms (preprocess002.get_words),
+#        but the browser splits queries with Intl.Segmenter, so surface forms,
+#        compounds ("心理学" -> 心理 + 学) and full-width text miss the vocabulary.
+#        QueryLexicon collects surface-form -> base-form pairs while preprocessing
+#        and emits query_lookup.json (surface form -> vocabulary indices) for
+#        the client. QueryAnalyzer is the Python-side equivalent.
+#   [JP] 索引と一致するクエリ解析。索引は Janome の名詞の原形で作られていますが、
+#        ブラウザは Intl.Segmenter で分割するため、表層形・複合語・全角文字が
+#        語彙に当たりません。前処理中に 表層形 -> 原形 を集め、
+#        クエリ語 -> 語彙番号 の対応表 (query_lookup.json) を書き出します。
+#
+# Data Flow:
+#   Input  : (preprocess002.py から) 名詞の連なり [(表層形, 原形), ...]
+#   Output : query_lookup.json  {"t": {クエリ語: [語彙番号, ...]}}
+#            キーは NFKC 正規化済み。英字は小文字のキーも持つ。語彙そのものの語は載せない。
+#            クライアントは query.normalize('NFKC') してから 語彙 (v) -> 対応表 (t) の順に引く。
+# ==========================================
+
+import json
+import os
+import re
+import unicodedata
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+LOOKUP_FILE = os.path.join(base_dir, "query_lookup.json")
+VECTOR_FILE = os.path.join(base_dir, "syllabus_vectors.json")
+
+# 連続する名詞を何語までつなげて複合語のキーにするか
+MAX_COMPOUND = 3
+
+# TfidfVectorizer の既定の分割 (小文字化 + 2文字以上の単語) と同じ
+TOKEN_PATTERN = re.compile(r"(?u)\b\w\w+\b")
+
+
+def index_terms(base_form):
+    """原形を TfidfVectorizer と同じ規則で語彙の語に分ける"""
+    return TOKEN_PATTERN.findall(base_form.lower())
+
+
+def key_variants(surface):
+    """対応表のキー候補 (NFKC 正規化と英字の小文字化)"""
+    normalized = unicodedata.normalize("NFKC", surface).strip()
+    variants = {normalized}
+    if normalized.lower() != normalized:
+        variants.add(normalized.lower())
+    return variants
+
+
+class QueryLexicon:
+    """前処理中に 表層形 -> 原形 の組を集め、最後に語彙番号の対応表へ変換する"""
+
+    def __init__(self):
+        self.forms = {}  # キー -> {原形のタプル, ...}
+
+    def _add(self, surface, bases):
+        for key in key_variants(surface):
+            if key:
+                self.forms.setdefault(key, set()).add(bases)
+
+    def add_runs(self, noun_runs):
+        """preprocess002.get_noun_runs() の結果を1文書分追加する"""
+        for run in noun_runs:
+            for surface, base in run:
+                self._add(surface, (base,))
+                self._add(base, (base,))
+            # 複合語: Intl.Segmenter が1語として返す可能性がある連なり
+            for size in range(2, MAX_COMPOUND + 1):
+                for start in range(len(run) - size + 1):
+                    window = run[start:start + size]
+                    self._add("".join(s for s, _ in window), tuple(b for _, b in window))
+
+    def to_table(self, vocabulary):
+        """{"t": {キー: [語彙番号, ...]}} を返す (語彙に1つも当たらないキーは除く)"""
+        table = {}
+        for key, base_sets in self.forms.items():
+            if key in vocabulary:
+                # キー自体が語彙にある語はクライアントが語彙 (v) を直接引くので載せない
+                continue
+            indices = sorted({vocabulary[w] for bases in base_sets for b in bases
+                              for w in index_terms(b) if w in vocabulary})
+            if indices:
+                table[key] = indices
+        return {"t": dict(sorted(table.items()))}
+
+
+class QueryAnalyzer:
+    """
+    Python 側のクエリ解析。preprocess002 と同じ正規化・形態素解析で原形を語彙に引き、
+    当たらなかった語は対応表 (query_lookup.json) で補う。
+    """
+
+    def __init__(self, lookup_path=LOOKUP_FILE, vector_path=VECTOR_FILE, vocabulary=None):
+        with open(lookup_path, "r", encoding="utf-8") as f:
+            self.table = json.load(f)["t"]
+        if vocabulary is None:
+            with open(vector_path, "r", encoding="utf-8") as f:
+                vocabulary = json.load(f)["v"]
+        self.vocab = vocabulary
+
+    def lookup(self, segment):
+        """クライアントと同じ引き方 (NFKC -> 小文字 の順に、語彙 -> 対応表 で試す)"""
+        key = unicodedata.normalize("NFKC", segment).strip()
+        for candidate in (key, key.lower()):
+            if candidate in self.vocab:
+                return [self.vocab[candidate]]
+            if candidate in self.table:
+                return self.table[candidate]
+        return []
+
+    def analyze(self, query):
+        """クエリ文字列 -> 語彙番号のリスト (重複なし、出現順)"""
+        # 循環 import を避けるためここで読み込む (preprocess002 は本モジュールを import する)
+        from preprocess002 import get_noun_runs
+
+        indices = []
+        for run in get_noun_runs(query):
+            for surface, base in run:
+                hits = [self.vocab[w] for w in index_terms(base) if w in self.vocab]
+                if not hits:
+                    hits = self.lookup(surface)
+                for idx in hits:
+                    if idx not in indices:
+                        indices.append(idx)
+        return indices
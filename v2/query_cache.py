@@ -0,0 +1,95 @@
+# ==========================================
+# Script Name: query_cache.py
+# Description:
+#   [EN] Small thread-safe LRU cache with optional TTL and hit-rate metrics.
+#        Used by search_service.py for query results and query tokenisation.
+#        Entries are tied to a "version" (the content hash of the vector
+#        artifact); changing the version drops every entry.
+#   [JP] TTL付きLRUキャッシュ（スレッドセーフ、ヒット率の計測付き）。
+#        search_service.py の検索結果とクエリの形態素解析結果に使います。
+#        ベクトルデータの内容ハッシュが変わると全エントリを破棄します。
+# ==========================================
+
+import threading
+import time
+from collections import OrderedDict
+
+MISSING = object()
+
+
+class QueryCache:
+    def __init__(self, maxsize=256, ttl=None, clock=time.monotonic):
+        """
+        maxsize: 保持する最大件数 (超えたら最も古く使われたものから削除)
+        ttl    : 有効期間 (秒)。None なら期限なし
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self.version = None
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key, default=MISSING):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at is None or expires_at > self.clock():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        expires_at = None if self.ttl is None else self.clock() + self.ttl
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, key, compute):
+        value = self.get(key)
+        if value is MISSING:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+
+    def set_version(self, version):
+        """データの版 (内容ハッシュ) を設定する。変わっていればキャッシュを破棄"""
+        if version != self.version:
+            if self.version is not None:
+                self.clear()
+            self.version = version
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self):
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hit_rate, 4),
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
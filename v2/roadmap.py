@@ -0,0 +1,193 @@
+# ==========================================
+# Script Name: roadmap.py
+# Description:
+#   [EN] Precomputes the 分野 roadmaps shown in v3/demo003.html. The demo used
+#        to scan every course on each field selection, bucket them by year
+#        with includes("1年") and lay out a Mermaid graph in the browser,
+#        which was slow for large fields. Here, once per preprocessing run
+#        and for every 分野:
+#          - year buckets (same rule as the demo: "n年" in 開設期, else 4),
+#            ordered by term inside a year;
+#          - representative inter-year links: the course's prerequisites in
+#            the same 分野 and an earlier year (prerequisites.py), or without
+#            them (per course) its most similar course (TF-IDF cosine) in
+#            the nearest earlier non-empty year, if the similarity is high
+#            enough;
+#          - a layered layout (one column per year, rows ordered by the
+#            position of the linked course in the previous column to keep
+#            links short), so the browser only draws boxes and curves.
+#        The general-education courses the demo injected for 情報 fields
+#        are added here as well.
+#   [JP] 分野ごとのロードマップ (年次ごとの授業・年次をまたぐ代表的なつながり・
+#        配置済みの座標) を前処理で計算して roadmap.json に保存します。
+#        つながりは前提となる授業 (prerequisites.py)、ない授業は前の年次の授業の中で一番似ている授業
+#        (TF-IDF のコサイン類似度) です。
+#        ブラウザは座標どおりに SVG を描くだけなので、大きな分野でもすぐ表示できます。
+#
+# Data Flow:
+#   Input  : (preprocess002.py から呼び出し) 授業ID, メタデータ ("t": 開設期, "f": 分野), TF-IDF 行列,
+#            前提となる授業 (prerequisites.json の "p", 任意)
+#   Output : roadmap.json
+#
+# Layout:
+#   {"ver": 1, "box": [ノードの幅, 高さ], "years": 4,
+#    "fields": {分野: {"w": 全体の幅, "h": 全体の高さ,
+#                      "nodes": [[授業ID, 授業名, 年次, x, y, 種類 (0: 授業, 1: 教養教育)], ...],
+#                      "links": [[つながり元のノード番号, つながり先のノード番号, 類似度], ...]}}}
+#   x, y はノードの左上 (年次の見出しの分を含む)
+# ==========================================
+
+import json
+import re
+import unicodedata
+from collections import defaultdict
+
+import numpy as np
+
+from timetable import parse_term
+
+ROADMAP_VERSION = 1
+JSON_SEPARATORS = (',', ':')
+
+N_YEARS = 4
+DEFAULT_YEAR = 4              # 開設期に年次がない授業 (デモと同じ。preprocess002.get_grade も同じ値)
+MIN_LINK_SIMILARITY = 0.1     # これ未満の類似度ではつながりを張らない
+ROW_CHUNK = 2048              # 類似度を一度に計算する授業数
+
+# 配置 (ピクセル)
+NODE_WIDTH = 170
+NODE_HEIGHT = 36
+COLUMN_GAP = 60
+ROW_GAP = 10
+HEADER_HEIGHT = 30
+MARGIN = 10
+
+# 情報系の分野に加える教養教育の授業 (デモの generateRoadmap から移動)
+GENERAL_EDUCATION = [
+    {"id": "GEN_CALC1", "n": "微積分学 I", "t": "1年次生 前期"},
+    {"id": "GEN_LINALG1", "n": "線形代数学 I", "t": "1年次生 前期"},
+    {"id": "GEN_PROG1", "n": "プログラミング入門", "t": "1年次生 後期"},
+    {"id": "GEN_ALGO1", "n": "アルゴリズム基礎", "t": "1年次生 後期"},
+    {"id": "A1000001", "n": "教養ゼミ", "t": "1年次生 前期"},
+]
+
+_YEAR = re.compile(r"([1-4])年")
+
+
+def year_of(term_str):
+    """開設期 -> 年次 (例: "2年次生 前期 1ターム" -> 2, 年次がなければ 4)"""
+    match = _YEAR.search(unicodedata.normalize("NFKC", term_str or ""))
+    return int(match.group(1)) if match else DEFAULT_YEAR
+
+
+def term_order(term_str):
+    """年次の中での並び順 (最初のターム、タームがなければ最後)"""
+    mask = parse_term(term_str)
+    return (mask & -mask).bit_length() if mask else 5
+
+
+def needs_general_education(field):
+    return field == "数理情報科学" or "情報" in field
+
+
+def best_links(X, sources, targets, min_similarity=MIN_LINK_SIMILARITY, row_chunk=ROW_CHUNK):
+    """
+    targets の各授業について、sources の中で一番似ている授業を探す (X の行番号)。
+    戻り値: [(targets の位置, sources の位置, 類似度), ...]
+    """
+    if not sources or not targets:
+        return []
+    S = X[sources].T.tocsc()
+    links = []
+    for start in range(0, len(targets), row_chunk):
+        sims = (X[targets[start:start + row_chunk]] @ S).toarray()
+        best = sims.argmax(axis=1)
+        scores = sims[np.arange(len(best)), best]
+        for k in np.flatnonzero(scores >= min_similarity):
+            links.append((start + int(k), int(best[k]), float(scores[k])))
+    return links
+
+
+def build_field(X, rows, general=(), prerequisites=None):
+    """
+    1分野分のロードマップ。rows: [(X の行番号, 授業ID, 授業名, 開設期), ...]
+    general: 加える教養教育の授業 (X の行はない)
+    prerequisites: prerequisites.json の "p" ({授業ID: [[前提の授業ID, 類似度], ...]})。
+                   あれば類似度の代わりにこの辺 (同じ分野で前の年次のもの) をつながりにする。
+                   前提の授業がない授業は、類似度のつながりのまま
+    """
+    columns = [[] for _ in range(N_YEARS)]
+    for row, cid, name, term in rows:
+        columns[year_of(term) - 1].append({"row": row, "id": cid, "n": name, "t": term, "k": 0})
+    for course in general:
+        columns[year_of(course["t"]) - 1].append({"row": None, "id": course["id"], "n": course["n"],
+                                                  "t": course["t"], "k": 1})
+
+    # 年次ごとに、前の (空でない) 年次の一番似ている授業とつなぐ
+    parent = {}
+    previous = None
+    for y, column in enumerate(columns):
+        if not column:
+            continue
+        if previous is not None:
+            sources = [c for c in columns[previous] if c["row"] is not None]
+            targets = [c for c in column if c["row"] is not None]
+            for t, s, score in best_links(X, [c["row"] for c in sources], [c["row"] for c in targets]):
+                parent[id(targets[t])] = [(sources[s], score)]
+        previous = y
+    # 前提の授業 (同じ分野で前の年次) がある授業はそちらに置き換える。ない授業は類似度のまま
+    if prerequisites is not None:
+        by_id = {c["id"]: (y, c) for y, column in enumerate(columns) for c in column}
+        for y, column in enumerate(columns):
+            for course in column:
+                links = [(by_id[p][1], score) for p, score in prerequisites.get(course["id"], [])
+                         if p in by_id and by_id[p][0] < y]
+                if links:
+                    parent[id(course)] = links
+
+    # 配置: 1列目はターム・名前順、以降はつながり元の行の位置順 (つながりがない授業は後ろ)
+    nodes, links, index = [], [], {}
+    height = HEADER_HEIGHT
+    for y, column in enumerate(columns):
+        def key(course):
+            link = parent.get(id(course))
+            return (index[id(link[0][0])] if link else len(nodes) + len(column), term_order(course["t"]), course["n"])
+        column.sort(key=key)
+        x = MARGIN + y * (NODE_WIDTH + COLUMN_GAP)
+        for r, course in enumerate(column):
+            top = HEADER_HEIGHT + r * (NODE_HEIGHT + ROW_GAP)
+            index[id(course)] = len(nodes)
+            nodes.append([course["id"], course["n"], y + 1, x, top, course["k"]])
+            height = max(height, top + NODE_HEIGHT)
+        for course in column:
+            for source, score in parent.get(id(course), ()):
+                links.append([index[id(source)], index[id(course)], round(score, 3)])
+    width = MARGIN * 2 + N_YEARS * NODE_WIDTH + (N_YEARS - 1) * COLUMN_GAP
+    return {"w": width, "h": height + MARGIN, "nodes": nodes, "links": links}
+
+
+def build_roadmaps(course_ids, metadata_map, X, prerequisites=None):
+    """
+    {分野: ロードマップ}。X は course_ids と同じ順の L2 正規化済み TF-IDF 行列 (CSR)。
+    prerequisites: prerequisites.py の "p" (あればつながりに使う)
+    """
+    X = X.tocsr()
+    by_field = defaultdict(list)
+    for row, cid in enumerate(course_ids):
+        meta = metadata_map.get(cid, {})
+        if meta.get("f"):
+            by_field[meta["f"]].append((row, cid, meta.get("n", ""), meta.get("t", "")))
+    fields = {}
+    for field in sorted(by_field):
+        general = GENERAL_EDUCATION if needs_general_education(field) else ()
+        fields[field] = build_field(X, by_field[field], general, prerequisites)
+    return {"ver": ROADMAP_VERSION, "box": [NODE_WIDTH, NODE_HEIGHT], "years": N_YEARS, "fields": fields}
+
+
+def write_roadmaps(path, course_ids, metadata_map, X, prerequisites=None):
+    """roadmap.json を保存し、書き込んだバイト数を返す"""
+    data = json.dumps(build_roadmaps(course_ids, metadata_map, X, prerequisites), ensure_ascii=False,
+                      separators=JSON_SEPARATORS).encode("utf-8")
+    with open(path, "wb") as f:
+        f.write(data)
+    return len(data)
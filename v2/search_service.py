@@ -0,0 +1,210 @@
+# ==========================================
+# Script Name: search_service.py
+# Description:
+#   [EN] Python search service over the v2 artifacts (same scoring as
+#        performSparseVectorSearch() in demo002.html), with an LRU/TTL result
+#        cache keyed by the normalised query tokens plus filters, a cache for
+#        Janome query tokenisation, and automatic invalidation when the
+#        content hash of syllabus_vectors.json or course_metadata.json
+#        changes (a metadata-only change reloads just the metadata). Query
+#        terms are weighted by the idf of the saved TF-IDF model
+#        (tfidf_model.json), which is only read on the first query.
+#   [JP] v2 の成果物を使う Python 版の検索サービスです (demo002.html と同じ採点)。
+#        正規化したクエリ語 + 絞り込み条件をキーにした検索結果キャッシュ、
+#        クエリの形態素解析キャッシュを持ち、ベクトルデータ・メタデータの内容ハッシュが
+#        変わると自動で破棄します。クエリ語は tfidf_model.json の IDF で重み付けします
+#        (モデルは最初の検索のときに読みます)。
+#
+# Data Flow:
+#   Input  : syllabus_vectors.json
+#          : course_metadata.json
+#          : tfidf_model.json (任意: 無ければクエリ語の重みは全て 1)
+#   Output : (検索結果 / Console Output)
+#
+# Usage:
+#   python search_service.py        # 対話的に検索し、キャッシュのヒット率を表示
+# ==========================================
+
+import hashlib
+import json
+import os
+import sys
+import numpy as np
+
+from preprocess002 import get_words
+from query_analyzer import index_terms
+from query_cache import MISSING, QueryCache
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(base_dir, "../common"))
+from tfidf_model import load_model
+
+VECTOR_FILE = os.path.join(base_dir, "syllabus_vectors.json")
+METADATA_FILE = os.path.join(base_dir, "course_metadata.json")
+MODEL_FILE = os.path.join(base_dir, "tfidf_model.json")
+
+
+class SyllabusSearch:
+    def __init__(self, vector_path=VECTOR_FILE, metadata_path=METADATA_FILE,
+                 cache_size=512, cache_ttl=600.0, token_cache_size=2048, model_path=MODEL_FILE):
+        self.vector_path = vector_path
+        self.metadata_path = metadata_path
+        self.model_path = model_path
+        self.result_cache = QueryCache(maxsize=cache_size, ttl=cache_ttl)
+        # 形態素解析の結果はデータが変わっても同じなので期限なし
+        self.token_cache = QueryCache(maxsize=token_cache_size)
+        self._stat = None
+        self._vector_hash = None
+        self.reload_if_changed()
+
+    # ------------------------------------------
+    # データの読み込みと変更検知
+    # ------------------------------------------
+    def reload_if_changed(self):
+        """
+        ファイルの更新を検知し、内容ハッシュが変わっていれば読み直す。
+        キャッシュのバージョンはベクトルデータとメタデータ両方のハッシュ (メタデータだけ変わっても
+        絞り込みの結果が変わるため)。メタデータだけが変わった場合はメタデータだけ読み直す
+        """
+        stat_key = tuple((st.st_mtime_ns, st.st_size)
+                         for st in (os.stat(self.vector_path), os.stat(self.metadata_path)))
+        if stat_key == self._stat:
+            return False
+        self._stat = stat_key
+
+        with open(self.vector_path, "rb") as f:
+            raw = f.read()
+        with open(self.metadata_path, "rb") as f:
+            metadata_raw = f.read()
+        vector_hash = hashlib.sha256(raw).hexdigest()
+        version = f"{vector_hash}:{hashlib.sha256(metadata_raw).hexdigest()}"
+        if version == self.result_cache.version:
+            return False
+
+        if vector_hash != self._vector_hash:
+            self._load(json.loads(raw))
+            self._vector_hash = vector_hash
+        self.metadata = json.loads(metadata_raw)
+        self.result_cache.set_version(version)
+        return True
+
+    @property
+    def idf(self):
+        """
+        クエリ語の重み (IDF)。モデルの語彙が違う (古い) 場合・無い場合は None。
+        モデル (load_model は遅延読み込み) は最初の検索のときに読む
+        """
+        if self._idf is MISSING:  # まだ確かめていない (None は「モデルを使わない」)
+            self._idf = None
+            if self.model_path and os.path.exists(self.model_path):
+                model = load_model(self.model_path)
+                if model.vocabulary == self.vocab:
+                    self._idf = model.idf
+        return self._idf
+
+    def _load(self, vector_data):
+        self.vocab = vector_data["v"]
+        self.course_ids = vector_data["i"]
+        self._idf = MISSING
+
+        # 転置インデックス: 語彙番号 -> (行番号の配列, 重みの配列)
+        rows_per_term = {}
+        norms = np.zeros(len(self.course_ids))
+        for row, (indices, values) in enumerate(vector_data["d"]):
+            norms[row] = np.sqrt(sum(v * v for v in values))
+            for col, val in zip(indices, values):
+                rows_per_term.setdefault(col, ([], []))
+                rows_per_term[col][0].append(row)
+                rows_per_term[col][1].append(val)
+        self.postings = {col: (np.array(r, dtype=np.int32), np.array(w))
+                         for col, (r, w) in rows_per_term.items()}
+        norms[norms == 0] = 1.0
+        self.norms = norms
+
+    # ------------------------------------------
+    # 検索
+    # ------------------------------------------
+    def tokenize(self, query):
+        """クエリを索引と同じ方法 (名詞の原形 + TfidfVectorizer の分割) で語に分ける (キャッシュ付き)"""
+        return self.token_cache.get_or_compute(
+            query.strip(), lambda: tuple(w for base in get_words(query).split() for w in index_terms(base)))
+
+    def query_key(self, query, area="", field="", term="", top_k=20, community=None, collapse=False):
+        """語順・重複を無視した正規化済みクエリ語 + 絞り込み条件"""
+        tokens = tuple(sorted(set(self.tokenize(query))))
+        return (tokens, area or "", field or "", term or "", top_k, community, bool(collapse))
+
+    def matches(self, meta, area="", field="", term="", community=None):
+        """授業のメタデータが絞り込み条件 (search() と同じ) を満たすか"""
+        if community is not None and meta.get("c") != community:
+            return False
+        if area and meta.get("a") != area:
+            return False
+        if field and meta.get("f") != field:
+            return False
+        if term and term not in meta.get("t", ""):
+            return False
+        return True
+
+    def _score(self, tokens, area, field, term, top_k, community=None, collapse=False):
+        indices = [self.vocab[w] for w in tokens if w in self.vocab]
+        if not indices:
+            return ()
+        idf = self.idf
+        query_weights = idf[indices] if idf is not None else np.ones(len(indices))
+        scores = np.zeros(len(self.course_ids))
+        for col, q in zip(indices, query_weights):
+            rows, weights = self.postings.get(col, ((), ()))
+            scores[rows] += q * weights
+        scores /= np.sqrt(query_weights @ query_weights) * self.norms
+
+        hits = []
+        seen = set()  # collapse: 出したまとまりの代表 ID
+        for row in np.argsort(-scores, kind="stable"):
+            if scores[row] <= 0:
+                break
+            cid = self.course_ids[row]
+            meta = self.metadata.get(cid, {})
+            if self.matches(meta, area, field, term, community):
+                if collapse:
+                    group = meta.get("g", cid)
+                    if group in seen:
+                        continue
+                    seen.add(group)
+                hits.append((cid, float(scores[row])))
+                if len(hits) >= top_k:
+                    break
+        return tuple(hits)
+
+    def search(self, query, area="", field="", term="", top_k=20, community=None, collapse=False):
+        """
+        戻り値: [{"id", "score", n, d, t, w, i, a, f, c}, ...] (スコア降順)
+        area / field は完全一致、term は開設期の部分一致 (demo002.html の絞り込みと同じ)
+        community はコミュニティ番号 (course_metadata.json の "c", communities.py) の完全一致
+        collapse=True にすると、ほぼ同じ授業 ("g", near_duplicates.py) は一番スコアの高い1件だけ返す
+        """
+        self.reload_if_changed()
+        key = self.query_key(query, area, field, term, top_k, community, collapse)
+        hits = self.result_cache.get_or_compute(key, lambda: self._score(*key))
+        return [{"id": cid, "score": score, **self.metadata.get(cid, {})} for cid, score in hits]
+
+    def cache_stats(self):
+        return {"results": self.result_cache.stats(), "tokens": self.token_cache.stats()}
+
+
+def main():
+    service = SyllabusSearch()
+    print(f"{len(service.course_ids)} courses loaded. 空行で終了します。")
+    while True:
+        query = input("\n検索語> ").strip()
+        if not query:
+            break
+        for hit in service.search(query, top_k=10, collapse=True):
+            print(f"{hit['score']:.3f} | {hit['id']} | {hit.get('n', '')}")
+        stats = service.cache_stats()
+        print(f"[cache] results hit rate {stats['results']['hit_rate']:.1%}, "
+              f"tokens hit rate {stats['tokens']['hit_rate']:.1%}")
+
+
+if __name__ == "__main__":
+    main()
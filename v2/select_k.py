@@ -0,0 +1,182 @@
+# ==========================================
+# Script Name: select_k.py
+# Description:
+#   [EN] Chooses the number of clusters for ClusterViz.py.
+#        Evaluates a range of k in a process pool. The L2-normalised CSR
+#        matrix is placed once in shared memory and every worker maps it
+#        (no pickled copies). Each k is scored on the sparse data with
+#        inertia (elbow), sampled cosine silhouette and stability (mean
+#        adjusted Rand index between runs on random subsamples). Writes a
+#        report and the chosen model.
+#   [JP] ClusterViz.py のクラスタ数 k を選びます。
+#        複数の k をプロセスプールで並列に評価します。正規化済みの疎行列は
+#        共有メモリに1つだけ置き、各プロセスはそれを参照します (コピーしない)。
+#        評価指標: inertia (エルボー)、標本シルエット係数 (コサイン)、
+#        安定性 (部分標本で繰り返したときの ARI の平均)。
+#
+# Data Flow:
+#   Input  : syllabus_vectors.json
+#   Output : cluster_selection.json  {"chosen_k", "elbow_k", "results": [{k, inertia, silhouette, stability, seconds}]}
+#          : cluster_model.npz       {"k", "centers", "labels", "ids", "source"} (ClusterViz.py が読み込む。
+#                                    source は syllabus_vectors.json の sha256)
+#
+# Usage:
+#   python select_k.py                # k = 4..20
+#   python select_k.py 6 30 2         # k = 6..30 を 2 刻み
+# ==========================================
+
+import json
+import os
+import sys
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from scipy import sparse
+from sklearn.metrics import adjusted_rand_score, silhouette_score
+
+from projection import file_digest
+from sparse_cluster import SphericalKMeans, to_csr
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+vector_file = os.path.join(base_dir, "syllabus_vectors.json")
+report_file = os.path.join(base_dir, "cluster_selection.json")
+model_file = os.path.join(base_dir, "cluster_model.npz")
+
+SILHOUETTE_SAMPLE = 2000  # シルエット係数を計算する標本数 (O(標本数^2))
+STABILITY_RUNS = 3        # 安定性を見るための部分標本での繰り返し回数
+STABILITY_FRACTION = 0.8  # 部分標本の割合
+MIN_STABILITY_RATIO = 0.8  # 安定性が最大値のこの割合未満の k は選ばない
+
+_shared = {}  # ワーカー内: 共有メモリと行列
+
+
+class SharedCSR:
+    """CSR 行列の3つの配列を共有メモリに置く (親プロセスで作り、最後に unlink する)"""
+
+    def __init__(self, matrix):
+        self.shape = matrix.shape
+        self.blocks = []
+        self.spec = {"shape": matrix.shape}
+        for name in ("data", "indices", "indptr"):
+            array = getattr(matrix, name)
+            block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[:] = array
+            self.blocks.append(block)
+            self.spec[name] = (block.name, array.shape, array.dtype.str)
+
+    def close(self):
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+
+
+def attach(spec):
+    """共有メモリ上の配列から CSR 行列を作る (データはコピーしない)"""
+    arrays = {}
+    for name in ("data", "indices", "indptr"):
+        block_name, shape, dtype = spec[name]
+        block = shared_memory.SharedMemory(name=block_name)
+        _shared.setdefault("blocks", []).append(block)  # 参照を残さないと解放される
+        arrays[name] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+    matrix = sparse.csr_matrix(spec["shape"])
+    matrix.data, matrix.indices, matrix.indptr = arrays["data"], arrays["indices"], arrays["indptr"]
+    return matrix
+
+
+def _init_worker(spec):
+    _shared["X"] = attach(spec)
+
+
+def evaluate_k(k, random_state=42):
+    """1つの k を評価する (ワーカーで実行)"""
+    X = _shared["X"]
+    start = time.perf_counter()
+    model = SphericalKMeans(n_clusters=k, random_state=random_state).fit(X)
+
+    rng = np.random.default_rng(random_state)
+    sample = rng.choice(X.shape[0], size=min(SILHOUETTE_SAMPLE, X.shape[0]), replace=False)
+    labels = model.labels_[sample]
+    silhouette = float(silhouette_score(X[sample], labels, metric="cosine")) if len(set(labels)) > 1 else -1.0
+
+    # 安定性: 部分標本でクラスタリングし直し、全データに割り当てたラベル同士の ARI
+    runs = []
+    for seed in range(STABILITY_RUNS):
+        rows = rng.choice(X.shape[0], size=int(X.shape[0] * STABILITY_FRACTION), replace=False)
+        sub = SphericalKMeans(n_clusters=k, n_init=1, random_state=random_state + 1 + seed).fit(X[rows])
+        runs.append(sub.predict(X))
+    pairs = [adjusted_rand_score(runs[a], runs[b]) for a in range(len(runs)) for b in range(a + 1, len(runs))]
+
+    return {
+        "k": k,
+        "inertia": float(model.inertia_),
+        "silhouette": silhouette,
+        "stability": float(np.mean(pairs)) if pairs else 1.0,
+        "seconds": time.perf_counter() - start,
+        "centers": model.cluster_centers_,
+        "labels": model.labels_,
+    }
+
+
+def elbow(ks, inertias):
+    """エルボー: 両端を結ぶ直線から最も離れた点 (kneedle 法)"""
+    if len(ks) < 3:
+        return ks[0]
+    x = (np.array(ks) - ks[0]) / (ks[-1] - ks[0])
+    y = (np.array(inertias) - inertias[-1]) / max(inertias[0] - inertias[-1], 1e-12)
+    return ks[int(np.argmax(1 - x - y))]
+
+
+def choose_k(results):
+    """安定性が十分 (最大値の MIN_STABILITY_RATIO 倍以上) な k のうちシルエット係数が最大のもの"""
+    threshold = MIN_STABILITY_RATIO * max(r["stability"] for r in results)
+    stable = [r for r in results if r["stability"] >= threshold]
+    return max(stable, key=lambda r: r["silhouette"])["k"]
+
+
+def select_k(X, ks, max_workers=None):
+    shared = SharedCSR(X)
+    try:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                                 initargs=(shared.spec,)) as pool:
+            results = list(pool.map(evaluate_k, ks))
+    finally:
+        shared.close()
+    return results
+
+
+def main():
+    args = [int(a) for a in sys.argv[1:4]]
+    k_min, k_max, step = (args + [4, 20, 1][len(args):])[:3]
+    ks = list(range(k_min, k_max + 1, step))
+
+    print("Loading data...")
+    with open(vector_file, "r", encoding="utf-8") as f:
+        vector_data = json.load(f)
+    X = to_csr(vector_data)
+
+    print(f"Evaluating k = {ks[0]}..{ks[-1]} ({len(ks)} values) in parallel...")
+    start = time.perf_counter()
+    results = select_k(X, ks)
+    chosen = choose_k(results)
+    elbow_k = elbow([r["k"] for r in results], [r["inertia"] for r in results])
+    print(f"Done in {time.perf_counter() - start:.1f}s\n")
+
+    print(f"{'k':>4}{'inertia':>11}{'silhouette':>12}{'stability':>11}{'sec':>7}")
+    for r in results:
+        mark = " <- chosen" if r["k"] == chosen else (" <- elbow" if r["k"] == elbow_k else "")
+        print(f"{r['k']:>4}{r['inertia']:>11.1f}{r['silhouette']:>12.4f}{r['stability']:>11.3f}{r['seconds']:>7.1f}{mark}")
+
+    best = next(r for r in results if r["k"] == chosen)
+    with open(report_file, "w", encoding="utf-8") as f:
+        json.dump({"chosen_k": chosen, "elbow_k": elbow_k,
+                   "results": [{key: r[key] for key in ("k", "inertia", "silhouette", "stability", "seconds")}
+                               for r in results]}, f, ensure_ascii=False, indent=2)
+    # 中心は語彙の列に対応するので、TF-IDF を学習し直したら使えない (ClusterViz.py は source で確かめる)
+    np.savez(model_file, k=chosen, centers=best["centers"], labels=best["labels"], ids=np.array(vector_data["i"]),
+             source=file_digest(vector_file))
+    print(f"\nChosen k = {chosen} (elbow k = {elbow_k}). '{report_file}' と '{model_file}' を保存しました。")
+
+
+if __name__ == "__main__":
+    main()
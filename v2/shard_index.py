@@ -0,0 +1,122 @@
+# ==========================================
+# Script Name: shard_index.py
+# Description:
+#   [EN] Writes a sharded static search index for the browser demos.
+#        Instead of one big syllabus_vectors.json / course_metadata.json,
+#        the browser fetches a small manifest, then only the posting shards
+#        of the query terms and the metadata shards of the hit departments.
+#   [JP] ブラウザ検索用の分割（シャード）静的インデックスを書き出します。
+#        マニフェストだけを先に取得し、クエリ語のポスティングと
+#        ヒットした部局のメタデータだけを後から取得できます。
+#
+# Data Flow:
+#   Input  : (preprocess002.py から呼び出し) 語彙, 疎ベクトル, ID, メタデータ
+#   Output : index/manifest.json
+#          : index/terms/<語彙番号>.json   (1語 = 1ファイル)
+#          : index/meta/<部局番号>.json    (1部局 = 1ファイル)
+#
+# Layout:
+#   manifest.json    : {"ver": 1, "n": 授業数, "v": {語: 語彙番号}, "dp": [部局名, ...]}
+#   terms/<k>.json   : [[授業ID, ...], [TF-IDF重み, ...], [部局番号, ...]]
+#   meta/<k>.json    : {授業ID: course_metadata.json と同じ形式}
+# ==========================================
+
+import json
+import os
+
+INDEX_VERSION = 1
+JSON_SEPARATORS = (',', ':')
+
+
+def _dump(obj, path):
+    """コンパクトJSONで保存し、書き込んだバイト数を返す"""
+    data = json.dumps(obj, ensure_ascii=False, separators=JSON_SEPARATORS).encode("utf-8")
+    with open(path, "wb") as f:
+        f.write(data)
+    return len(data)
+
+
+def build_postings(vocabulary, sparse_vectors, course_ids, course_depts):
+    """
+    行ごとの疎ベクトル [[indices], [values]] を語ごとのポスティングに転置する。
+    戻り値: {語彙番号: [[ID...], [重み...], [部局番号...]]}
+    """
+    postings = {idx: [[], [], []] for idx in vocabulary.values()}
+    for row, (indices, values) in enumerate(sparse_vectors):
+        cid = course_ids[row]
+        dept_no = course_depts[row]
+        for col, val in zip(indices, values):
+            posting = postings[col]
+            posting[0].append(cid)
+            posting[1].append(val)
+            posting[2].append(dept_no)
+    return postings
+
+
+def write_sharded_index(index_dir, vocabulary, sparse_vectors, course_ids, metadata_map):
+    """
+    分割インデックスを index_dir に書き出す。
+    戻り値: 書き込んだ合計バイト数
+    """
+    terms_dir = os.path.join(index_dir, "terms")
+    meta_dir = os.path.join(index_dir, "meta")
+    os.makedirs(terms_dir, exist_ok=True)
+    os.makedirs(meta_dir, exist_ok=True)
+
+    # 部局ごとにメタデータを分割 (部局名が空の授業は "" としてまとめる)
+    dept_names = sorted({metadata_map.get(cid, {}).get("d", "") for cid in course_ids})
+    dept_no = {name: k for k, name in enumerate(dept_names)}
+    dept_shards = [{} for _ in dept_names]
+    course_depts = []
+    for cid in course_ids:
+        meta = metadata_map.get(cid, {})
+        k = dept_no[meta.get("d", "")]
+        dept_shards[k][cid] = meta
+        course_depts.append(k)
+
+    total = 0
+    postings = build_postings(vocabulary, sparse_vectors, course_ids, course_depts)
+    for idx, posting in postings.items():
+        total += _dump(posting, os.path.join(terms_dir, f"{idx}.json"))
+
+    for k, shard in enumerate(dept_shards):
+        total += _dump(shard, os.path.join(meta_dir, f"{k}.json"))
+
+    manifest = {
+        "ver": INDEX_VERSION,
+        "n": len(course_ids),
+        "v": vocabulary,
+        "dp": dept_names,
+    }
+    total += _dump(manifest, os.path.join(index_dir, "manifest.json"))
+    return total
+
+
+def query_download_bytes(index_dir, query_terms, top_n=20):
+    """
+    1クエリでブラウザが取得するバイト数を見積もる。
+    manifest + クエリ語のポスティング + 上位 top_n 件の部局メタデータ
+    """
+    manifest_path = os.path.join(index_dir, "manifest.json")
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    vocab = manifest["v"]
+
+    total = os.path.getsize(manifest_path)
+    scores = {}
+    course_dept = {}
+    for term in query_terms:
+        if term not in vocab:
+            continue
+        path = os.path.join(index_dir, "terms", f"{vocab[term]}.json")
+        total += os.path.getsize(path)
+        with open(path, "r", encoding="utf-8") as f:
+            ids, weights, depts = json.load(f)
+        for cid, w, k in zip(ids, weights, depts):
+            scores[cid] = scores.get(cid, 0.0) + w
+            course_dept[cid] = k
+
+    top = sorted(scores, key=scores.get, reverse=True)[:top_n]
+    for k in {course_dept[cid] for cid in top}:
+        total += os.path.getsize(os.path.join(index_dir, "meta", f"{k}.json"))
+    return total
@@ -0,0 +1,148 @@
+# ==========================================
+# Script Name: sparse_cluster.py
+# Description:
+#   [EN] Clustering that works directly on the sparse TF-IDF rows.
+#        Builds a CSR matrix from syllabus_vectors.json (no dense N x V copy),
+#        runs spherical k-means (cosine) on the L2-normalised rows - full
+#        batch for small corpora, mini-batch for large ones - and extracts
+#        the top keywords of every centroid in one vectorised step.
+#   [JP] TF-IDF の疎行列 (CSR) のままクラスタリングします。
+#        行を L2 正規化して球面 k-means (コサイン距離) を行い、件数が多いときは
+#        ミニバッチで更新します。各クラスタの上位キーワードもまとめて求めます。
+#
+# Data Flow:
+#   Input  : syllabus_vectors.json {"v": 語彙, "d": [[indices],[values]], "i": IDs}
+#   Output : (ClusterViz.py などから利用) ラベル・中心・キーワード
+# ==========================================
+
+import numpy as np
+from scipy import sparse
+
+# この件数以下なら全件で中心を更新する (それ以上はミニバッチ)
+FULL_BATCH_LIMIT = 20000
+
+
+def to_csr(vector_data, normalize=True):
+    """syllabus_vectors.json の "d" を scipy の CSR 行列にする"""
+    rows = vector_data["d"]
+    lengths = np.fromiter((len(indices) for indices, _ in rows), dtype=np.int64, count=len(rows))
+    indptr = np.concatenate(([0], np.cumsum(lengths)))
+    indices = np.fromiter((c for idx, _ in rows for c in idx), dtype=np.int32, count=indptr[-1])
+    values = np.fromiter((v for _, val in rows for v in val), dtype=np.float64, count=indptr[-1])
+    matrix = sparse.csr_matrix((values, indices, indptr), shape=(len(rows), len(vector_data["v"])))
+    return normalize_rows(matrix) if normalize else matrix
+
+
+def normalize_rows(matrix):
+    """CSR の各行を L2 正規化する (全て 0 の行はそのまま)"""
+    matrix = matrix.tocsr(copy=True)
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    matrix.data /= np.repeat(norms, np.diff(matrix.indptr))
+    return matrix
+
+
+def _normalize_dense(centers):
+    norms = np.linalg.norm(centers, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return centers / norms
+
+
+class SphericalKMeans:
+    """
+    L2 正規化済みの疎行列に対する球面 k-means。
+    類似度 = 内積 (コサイン)、inertia_ = Σ (1 - 所属クラスタ中心とのコサイン)
+    """
+
+    def __init__(self, n_clusters=12, max_iter=100, batch_size=2048, n_init=3,
+                 tol=1e-4, random_state=42, full_batch_limit=FULL_BATCH_LIMIT):
+        self.n_clusters = n_clusters
+        self.max_iter = max_iter
+        self.batch_size = batch_size
+        self.n_init = n_init
+        self.tol = tol
+        self.random_state = random_state
+        self.full_batch_limit = full_batch_limit
+
+    def _init_centers(self, X, rng):
+        """k-means++ (コサイン距離) で初期中心を選ぶ。大きい場合は標本から選ぶ"""
+        sample = X
+        if X.shape[0] > 10 * self.batch_size:
+            sample = X[rng.choice(X.shape[0], size=10 * self.batch_size, replace=False)]
+        first = rng.integers(sample.shape[0])
+        centers = [sample[first].toarray().ravel()]
+        closest = 1.0 - sample @ centers[0]
+        for _ in range(1, self.n_clusters):
+            weights = np.clip(closest, 0, None)
+            total = weights.sum()
+            pick = rng.choice(sample.shape[0], p=weights / total) if total > 0 else rng.integers(sample.shape[0])
+            centers.append(sample[pick].toarray().ravel())
+            closest = np.minimum(closest, 1.0 - sample @ centers[-1])
+        return _normalize_dense(np.array(centers))
+
+    def _assign(self, X, centers):
+        similarity = np.asarray(X @ centers.T)
+        labels = similarity.argmax(axis=1)
+        return labels, float(np.sum(1.0 - similarity[np.arange(X.shape[0]), labels]))
+
+    def _sum_by_label(self, X, labels):
+        """クラスタごとの行の合計 (疎行列の積で一度に計算する)"""
+        onehot = sparse.csr_matrix((np.ones(X.shape[0]), (labels, np.arange(X.shape[0]))),
+                                   shape=(self.n_clusters, X.shape[0]))
+        return np.asarray((onehot @ X).todense()), np.bincount(labels, minlength=self.n_clusters)
+
+    def _fit_full(self, X, centers):
+        previous = np.inf
+        for _ in range(self.max_iter):
+            labels, inertia = self._assign(X, centers)
+            sums, counts = self._sum_by_label(X, labels)
+            # 空になったクラスタは前の中心を残す
+            centers = np.where(counts[:, None] > 0, _normalize_dense(sums), centers)
+            if previous - inertia <= self.tol * max(previous, 1e-12):
+                break
+            previous = inertia
+        return centers
+
+    def _fit_minibatch(self, X, centers, rng):
+        counts = np.zeros(self.n_clusters)
+        for _ in range(self.max_iter):
+            batch = X[rng.choice(X.shape[0], size=self.batch_size, replace=False)]
+            labels, _ = self._assign(batch, centers)
+            sums, batch_counts = self._sum_by_label(batch, labels)
+            counts += batch_counts
+            # 中心ごとの学習率 = このバッチの件数 / これまでの件数 (Sculley 2010)
+            rate = np.divide(batch_counts, counts, out=np.zeros_like(counts), where=counts > 0)[:, None]
+            batch_means = sums / np.maximum(batch_counts, 1)[:, None]
+            centers = _normalize_dense((1 - rate) * centers + rate * batch_means)
+        return centers
+
+    def fit(self, X):
+        X = sparse.csr_matrix(X)
+        rng = np.random.default_rng(self.random_state)
+        best = None
+        for _ in range(self.n_init):
+            centers = self._init_centers(X, rng)
+            if X.shape[0] <= self.full_batch_limit:
+                centers = self._fit_full(X, centers)
+            else:
+                centers = self._fit_minibatch(X, centers, rng)
+            labels, inertia = self._assign(X, centers)
+            if best is None or inertia < best[2]:
+                best = (centers, labels, inertia)
+        self.cluster_centers_, self.labels_, self.inertia_ = best
+        return self
+
+    def fit_predict(self, X):
+        return self.fit(X).labels_
+
+    def predict(self, X):
+        return self._assign(sparse.csr_matrix(X), self.cluster_centers_)[0]
+
+
+def top_keywords(centers, index_to_word, n_words=10):
+    """各中心の重みが大きい語を n_words 語ずつ (argpartition でまとめて取り出す)"""
+    n_words = min(n_words, centers.shape[1])
+    part = np.argpartition(-centers, n_words - 1, axis=1)[:, :n_words]
+    order = np.argsort(-np.take_along_axis(centers, part, axis=1), axis=1, kind="stable")
+    top = np.take_along_axis(part, order, axis=1)
+    return [[index_to_word.get(int(ind), f"word_{ind}") for ind in row] for row in top]
@@ -0,0 +1,252 @@
+# ==========================================
+# Script Name: stream_vectorize.py
+# Description:
+#   [EN] Out-of-core version of the vectorisation in preprocess002.py for the
+#        whole-university dataset (subject_details_main_*.json), where
+#        json.load + corpus + metadata_map + skills no longer fit together.
+#        Records are streamed one at a time (common/json_stream.py, JSON or
+#        JSONL) and tokenised in chunks.
+#          Pass 1: per-course prep (preprocess002.prepare_course), term
+#                  counts spooled to a temp file, metadata written straight
+#                  to course_metadata.json; document / total term
+#                  frequencies are counted in memory.
+#          Pass 2: vocabulary (max_features by total frequency, as
+#                  TfidfVectorizer) + IDF, then each spooled row is weighted
+#                  and written to syllabus_vectors.json.
+#        When the frequency tables exceed MAX_TERMS distinct terms they are
+#        written to disk as a run sorted by term and cleared. The runs are
+#        merged at the end (heapq.merge, counts summed per term), and the
+#        top max_features terms are picked with a heap while the merge
+#        streams by. Counts stay exact. Peak memory is
+#        O(MAX_TERMS + max_features + one chunk) whatever the number of
+#        courses or distinct terms; disk holds the runs.
+#        Without a spill the output matches TfidfVectorizer up to the
+#        3-decimal rounding. After a spill, terms tied at the max_features
+#        cut-off are chosen in term order; TfidfVectorizer's unstable
+#        argsort may pick other tied terms.
+#        Graph stages (recommendations, communities, query_lookup) are not
+#        run here; they need the whole matrix (preprocess002.py).
+#   [JP] 全学のデータ向けに、preprocess002.py のベクトル化をメモリに載せきらずに
+#        行います。授業を1件ずつ読み (JSON / JSONL)、まとめて形態素解析し、
+#        1回目で語の出現数だけを数え (各授業の語数は一時ファイルへ)、
+#        2回目で語彙と IDF を決めて各行を書き出します。語の種類が MAX_TERMS を
+#        超えたら、語の出現数を語順に並べてディスクに書き出し (出現数は捨てません)、
+#        最後にまとめて合算して上位の語を選ぶので、メモリは授業数・語の種類に依存しません。
+#
+# Data Flow:
+#   Input  : 授業データ (*.json: {講義コード: {...}} / 配列, *.jsonl: 1行1件)
+#   Output : <out_dir>/syllabus_vectors.json ({"v","d","i","skills"}, preprocess002.py と同じ形)
+#          : <out_dir>/course_metadata.json
+#          : <out_dir>/tfidf_model.json
+#
+# Usage:
+#   python stream_vectorize.py [input.json|input.jsonl] [out_dir]
+# ==========================================
+
+import heapq
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+from itertools import groupby, islice
+from operator import itemgetter
+import numpy as np
+
+from preprocess002 import get_words, prepare_course, input_file
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(base_dir, "../common"))
+from json_stream import iter_records
+from tfidf_model import DEFAULT_CONFIG, TfidfModel
+
+default_out_dir = os.path.join(base_dir, "stream_output")
+
+MAX_FEATURES = 500  # preprocess002.py の TfidfVectorizer(max_features=500) と同じ
+CHUNK_SIZE = 1000   # まとめて処理・書き出しする授業数
+MAX_TERMS = 200_000  # メモリ上で数える語の種類の上限 (超えたらディスクに書き出す)
+
+
+def _dump(obj):
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':'))
+
+
+def _select_vocabulary(total_counts, max_features):
+    """
+    総出現数の上位 max_features 語 (語の辞書順に番号を振る)。
+    同数の語の選び方も TfidfVectorizer と同じになるよう、辞書順の配列に同じ argsort を使う
+    """
+    terms = sorted(total_counts)
+    if max_features and len(terms) > max_features:
+        tfs = np.array([total_counts[w] for w in terms], dtype=np.int64)
+        keep = np.sort((-tfs).argsort()[:max_features])
+        terms = [terms[k] for k in keep]
+    return {w: k for k, w in enumerate(terms)}
+
+
+def _spill(doc_freq, total_counts, run_dir, n_runs):
+    """これまでの出現数を語順に 語\t総出現数\t文書頻度 でディスクに書き出し、表を空にする"""
+    path = os.path.join(run_dir, f"run{n_runs:05d}.tsv")
+    with open(path, "w", encoding="utf-8") as f:
+        f.writelines(f"{w}\t{total_counts[w]}\t{doc_freq[w]}\n" for w in sorted(total_counts))
+    doc_freq.clear()
+    total_counts.clear()
+    return path
+
+
+def _read_run(path):
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            word, tf, df = line.rstrip("\n").split("\t")
+            yield word, int(tf), int(df)
+
+
+def _merge_runs(paths):
+    """書き出した出現数を語順にマージし、同じ語を合算して (語, 総出現数, 文書頻度) を返す"""
+    merged = heapq.merge(*(_read_run(p) for p in paths), key=itemgetter(0))
+    for word, rows in groupby(merged, key=itemgetter(0)):
+        tf = df = 0
+        for _, row_tf, row_df in rows:
+            tf += row_tf
+            df += row_df
+        yield word, tf, df
+
+
+def _select_from_runs(paths, max_features):
+    """
+    マージしながら総出現数の上位 max_features 語をヒープで選ぶ (同数なら語順が先の語)。
+    戻り値: (vocabulary, 選んだ語の文書頻度, 語の種類)
+    """
+    heap = []
+    n_terms = 0
+    for order, (word, tf, df) in enumerate(_merge_runs(paths)):
+        n_terms += 1
+        item = (tf, -order, word, df)
+        if not max_features or len(heap) < max_features:
+            heapq.heappush(heap, item)
+        elif item > heap[0]:
+            heapq.heapreplace(heap, item)
+    chosen = sorted((word, df) for _, _, word, df in heap)
+    return {w: k for k, (w, _) in enumerate(chosen)}, dict(chosen), n_terms
+
+
+def _copy_lines(src, out):
+    """1行1値の一時ファイルを JSON 配列の中身としてカンマ区切りで書き出す"""
+    with open(src, "r", encoding="utf-8") as f:
+        for k, line in enumerate(f):
+            if k:
+                out.write(",")
+            out.write(line.rstrip("\n"))
+
+
+def stream_vectorize(path, out_dir=default_out_dir, max_features=MAX_FEATURES,
+                     chunk_size=CHUNK_SIZE, tokenize=get_words, max_terms=MAX_TERMS):
+    """
+    path の授業データをストリーミングでベクトル化し、out_dir に書き出す。
+    tokenize: 解析用テキスト -> 空白区切りの語 (既定は preprocess002.get_words)
+    max_terms: メモリ上で数える語の種類の上限 (超えたら出現数をディスクに書き出す)
+    戻り値: {"courses", "terms" (語の種類), "spills" (ディスクに書き出した回数), "vocabulary", "seconds"}
+    """
+    start = time.perf_counter()
+    os.makedirs(out_dir, exist_ok=True)
+    vector_file = os.path.join(out_dir, "syllabus_vectors.json")
+    metadata_file = os.path.join(out_dir, "course_metadata.json")
+    model_file = os.path.join(out_dir, "tfidf_model.json")
+    analyze = TfidfModel([], [], DEFAULT_CONFIG).analyze
+
+    with tempfile.TemporaryDirectory(dir=out_dir) as tmp:
+        counts_spool = os.path.join(tmp, "counts.jsonl")
+        ids_spool = os.path.join(tmp, "ids.jsonl")
+        skills_spool = os.path.join(tmp, "skills.jsonl")
+        metadata_tmp = metadata_file + ".tmp"
+
+        # ==========================================
+        # 1回目: 語の出現数を数える (行ごとの語数は一時ファイルへ)
+        # ==========================================
+        doc_freq = Counter()
+        total_counts = Counter()
+        n_courses = 0
+        runs = []
+        records = ((key, info) for key, info in iter_records(path) if isinstance(info, dict))
+        with open(counts_spool, "w", encoding="utf-8") as counts_f, \
+                open(ids_spool, "w", encoding="utf-8") as ids_f, \
+                open(skills_spool, "w", encoding="utf-8") as skills_f, \
+                open(metadata_tmp, "w", encoding="utf-8") as meta_f:
+            meta_f.write("{")
+            while True:
+                chunk = list(islice(records, chunk_size))
+                if not chunk:
+                    break
+                counts_lines, ids_lines, skills_lines, meta_parts = [], [], [], []
+                for code_key, info in chunk:
+                    target_text, skills, meta = prepare_course(info)
+                    counts = Counter(analyze(tokenize(target_text)))
+                    doc_freq.update(counts.keys())
+                    total_counts.update(counts)
+                    counts_lines.append(_dump(counts) + "\n")
+                    ids_lines.append(_dump(code_key) + "\n")
+                    skills_lines.append(_dump(skills) + "\n")
+                    meta_parts.append(("," if n_courses else "") + _dump(code_key) + ":" + _dump(meta))
+                    n_courses += 1
+                counts_f.writelines(counts_lines)
+                ids_f.writelines(ids_lines)
+                skills_f.writelines(skills_lines)
+                meta_f.writelines(meta_parts)
+                if max_terms and len(total_counts) > max_terms:
+                    runs.append(_spill(doc_freq, total_counts, tmp, len(runs)))
+            meta_f.write("}")
+        os.replace(metadata_tmp, metadata_file)
+
+        # ==========================================
+        # 語彙と IDF (TfidfVectorizer の smooth_idf と同じ式)
+        # ==========================================
+        if runs:
+            if total_counts:
+                runs.append(_spill(doc_freq, total_counts, tmp, len(runs)))
+            vocabulary, doc_freq, n_terms = _select_from_runs(runs, max_features)
+        else:
+            vocabulary = _select_vocabulary(total_counts, max_features)
+            n_terms = len(doc_freq)
+        words = sorted(vocabulary, key=vocabulary.get)
+        idf = [math.log((1 + n_courses) / (1 + doc_freq[w])) + 1 for w in words]
+        model = TfidfModel(words, idf, DEFAULT_CONFIG)
+        model.save(model_file)
+        del doc_freq, total_counts
+
+        # ==========================================
+        # 2回目: 一時ファイルの各行を重み付けして書き出す
+        # ==========================================
+        vector_tmp = vector_file + ".tmp"
+        with open(vector_tmp, "w", encoding="utf-8") as out, \
+                open(counts_spool, "r", encoding="utf-8") as counts_f:
+            out.write('{"v":' + _dump(vocabulary) + ',"d":[')
+            for k, line in enumerate(counts_f):
+                counts = {vocabulary[w]: c for w, c in json.loads(line).items() if w in vocabulary}
+                indices, values = model.transform_counts(counts)
+                if k:
+                    out.write(",")
+                out.write(_dump([indices.tolist(), [round(float(v), 3) for v in values]]))
+            out.write('],"i":[')
+            _copy_lines(ids_spool, out)
+            out.write('],"skills":[')
+            _copy_lines(skills_spool, out)
+            out.write("]}")
+        os.replace(vector_tmp, vector_file)
+
+    return {"courses": n_courses, "terms": n_terms, "spills": len(runs), "vocabulary": len(vocabulary),
+            "seconds": time.perf_counter() - start}
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else input_file
+    out_dir = sys.argv[2] if len(sys.argv) > 2 else default_out_dir
+    stats = stream_vectorize(path, out_dir)
+    print(f"{stats['courses']} courses, {stats['terms']} distinct terms -> vocabulary {stats['vocabulary']} "
+          f"({stats['seconds']:.1f}s)")
+    print(f"完了！ '{out_dir}' に syllabus_vectors.json / course_metadata.json / tfidf_model.json を保存しました。")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+# ==========================================
+# Script Name: timetable.py
+# Description:
+#   [EN] Parses 曜日・時限・講義室 (e.g. "(2T) 月7-8：総K307",
+#        "(3T) 木3-4,金5-6：総K210") and 開設期 once into structured fields
+#        (term mask, day / period ranges, rooms, intensive flag), plus a
+#        bitset of the occupied slots: 4 terms x 5 days x 12 periods = 240
+#        bits, so two courses overlap iff (a & b) != 0. The demo previously
+#        re-parsed the strings with regexes every time the grid rendered.
+#        The term comes from the "(1T)" / "(前)" / "(通)" prefix of the
+#        schedule, or from 開設期 when the schedule has none. Intensive
+#        courses (集中) have no weekly slots and never conflict.
+#        Timetable loads timetable.json into an (n, 4) uint64 array (one
+#        word per term) and checks many candidates against a student's
+#        schedule in one vectorised AND. 単位 (credits) is carried along for
+#        timetable_solver.py.
+#   [JP] 「曜日・時限・講義室」と「開設期」を一度だけ解析し、ターム・曜日・時限・講義室と、
+#        授業が使うコマのビット列 (4ターム x 5曜日 x 12時限) を作ります。
+#        時間割の重なりはビット列の AND 1回で判定できます。
+#
+# Data Flow:
+#   Input  : (preprocess002.py から呼び出し) 授業ID, メタデータ ("w": 曜日・時限・講義室, "t": 開設期), 単位
+#   Output : timetable.json
+#
+# Layout:
+#   {"ver": 1, "days": "月火水木金", "periods": 12, "terms": 4,
+#    "c": {授業ID: {"tm": ターム (bit k = 第k+1ターム), "s": [[曜日番号, 開始時限, 終了時限], ...],
+#                   "r": [講義室, ...], "x": 集中なら 1, "u": 単位, "b": コマのビット列 (16進)}}}
+#   ビット番号 = ターム番号 * 60 + 曜日番号 * 12 + (時限 - 1)   (いずれも 0 始まり)
+# ==========================================
+
+import json
+import re
+import unicodedata
+import numpy as np
+
+TIMETABLE_VERSION = 1
+JSON_SEPARATORS = (',', ':')
+
+DAYS = "月火水木金"
+N_PERIODS = 12
+N_TERMS = 4
+SLOTS_PER_TERM = len(DAYS) * N_PERIODS  # 60 (uint64 1語に収まる)
+ALL_TERMS = (1 << N_TERMS) - 1
+TERM_WORD_MASK = (1 << SLOTS_PER_TERM) - 1
+
+# 曜日・時限の前の (...) -> ターム
+SCHEDULE_TERMS = {"1T": 0b0001, "2T": 0b0010, "3T": 0b0100, "4T": 0b1000,
+                  "前": 0b0011, "後": 0b1100, "通": ALL_TERMS}
+
+_PREFIX = re.compile(r"^\s*\(([^)]*)\)\s*")
+_SLOT = re.compile(rf"([{DAYS}])(\d+)(?:-(\d+))?")
+_NUMBER = re.compile(r"\d+(?:\.\d+)?")
+
+
+def parse_term(term_str):
+    """開設期 -> ターム (例: "2年次生 前期 1ターム" -> 0b0001, "前期" -> 0b0011, "通年" -> 0b1111)"""
+    text = unicodedata.normalize("NFKC", term_str or "")
+    mask = 0
+    for k in range(N_TERMS):
+        if f"{k + 1}ターム" in text:
+            mask |= 1 << k
+    if mask:
+        return mask
+    if "通年" in text:
+        return ALL_TERMS
+    if "前期" in text:
+        mask |= SCHEDULE_TERMS["前"]
+    if "後期" in text:
+        mask |= SCHEDULE_TERMS["後"]
+    return mask
+
+
+def parse_schedule(schedule_str, term_str=""):
+    """
+    曜日・時限・講義室 (+ 開設期) を解析する。
+    戻り値: {"tm": ターム, "s": [[曜日番号, 開始, 終了], ...], "r": [講義室, ...], "x": 集中なら 1}
+    """
+    text = unicodedata.normalize("NFKC", schedule_str or "")
+    term_mask = None
+    match = _PREFIX.match(text)
+    if match:
+        term_mask = SCHEDULE_TERMS.get(match.group(1))
+        text = text[match.end():]
+    if term_mask is None:
+        term_mask = parse_term(term_str)
+
+    # "月1-4,木5:総K206,総K207" -> 曜日・時限の部分と講義室の部分
+    slot_part, _, room_part = text.partition(":")
+    slots = []
+    for day, start, end in _SLOT.findall(slot_part):
+        start = int(start)
+        end = int(end) if end else start
+        if 1 <= start <= end <= N_PERIODS:
+            slots.append([DAYS.index(day), start, end])
+    rooms = [room.strip() for room in room_part.split(",") if room.strip()]
+    intensive = int("集中" in slot_part)
+    return {"tm": term_mask, "s": slots, "r": rooms, "x": intensive}
+
+
+def parse_credits(credit_str):
+    """単位 ("2.0", "１" など) -> float (読めなければ 0)"""
+    match = _NUMBER.search(unicodedata.normalize("NFKC", str(credit_str or "")))
+    return float(match.group()) if match else 0.0
+
+
+def slot_bits(term_mask, slots):
+    """ターム x 曜日・時限の範囲 -> コマのビット列 (Python の int, 240 ビット)"""
+    week = 0
+    for day, start, end in slots:
+        week |= ((1 << (end - start + 1)) - 1) << (day * N_PERIODS + start - 1)
+    bits = 0
+    for k in range(N_TERMS):
+        if term_mask >> k & 1:
+            bits |= week << (k * SLOTS_PER_TERM)
+    return bits
+
+
+def bits_to_words(bits):
+    """240 ビットの int -> ターム別の uint64 4語"""
+    return [(bits >> (k * SLOTS_PER_TERM)) & TERM_WORD_MASK for k in range(N_TERMS)]
+
+
+def build_timetable(course_ids, metadata_map, credits=None):
+    """{授業ID: 解析結果 + "u": 単位 + "b": ビット列 (16進)}。credits は {授業ID: 単位の文字列}"""
+    credits = credits or {}
+    courses = {}
+    for cid in course_ids:
+        meta = metadata_map.get(cid, {})
+        entry = parse_schedule(meta.get("w", ""), meta.get("t", ""))
+        entry["u"] = parse_credits(credits.get(cid))
+        entry["b"] = format(slot_bits(entry["tm"], entry["s"]), "x")
+        courses[cid] = entry
+    return {"ver": TIMETABLE_VERSION, "days": DAYS, "periods": N_PERIODS, "terms": N_TERMS, "c": courses}
+
+
+def write_timetable(path, course_ids, metadata_map, credits=None):
+    """timetable.json を保存し、書き込んだバイト数を返す"""
+    data = json.dumps(build_timetable(course_ids, metadata_map, credits), ensure_ascii=False,
+                      separators=JSON_SEPARATORS).encode("utf-8")
+    with open(path, "wb") as f:
+        f.write(data)
+    return len(data)
+
+
+class Timetable:
+    """
+    timetable.json の読み込みと重なりの判定。
+    ビット列は (授業数, 4) の uint64 配列 (1語 = 1ターム分の 5曜日 x 12時限) で持つ。
+    例: tt.conflicts(候補のIDリスト, 履修中のIDリスト) -> 重なる候補は True
+    """
+
+    def __init__(self, data):
+        self.ids = list(data["c"])
+        self.index = {cid: k for k, cid in enumerate(self.ids)}
+        self.entries = data["c"]
+        self.words = np.array([bits_to_words(int(e["b"], 16)) for e in self.entries.values()],
+                              dtype=np.uint64).reshape(len(self.ids), N_TERMS)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    @classmethod
+    def from_metadata(cls, course_ids, metadata_map, credits=None):
+        return cls(build_timetable(course_ids, metadata_map, credits))
+
+    def bits(self, cid):
+        """1授業のビット列 (Python の int)"""
+        return int(self.entries[cid]["b"], 16)
+
+    def schedule_words(self, schedule_ids):
+        """履修中の授業のビット列の OR (uint64 4語)"""
+        rows = [self.index[cid] for cid in schedule_ids if cid in self.index]
+        return np.bitwise_or.reduce(self.words[rows], axis=0) if rows else np.zeros(N_TERMS, dtype=np.uint64)
+
+    def conflict(self, a, b):
+        """2つの授業が同じコマを使うか"""
+        return self.bits(a) & self.bits(b) != 0
+
+    def conflicts(self, candidate_ids, schedule_ids):
+        """候補ごとに、履修中の授業と重なるかどうか (bool 配列)"""
+        rows = np.fromiter((self.index[cid] for cid in candidate_ids), dtype=np.int64)
+        return (self.words[rows] & self.schedule_words(schedule_ids)).any(axis=1)
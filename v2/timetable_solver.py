@@ -0,0 +1,225 @@
+# ==========================================
+# Script Name: timetable_solver.py
+# Description:
+#   [EN] Builds conflict-free timetables instead of adding courses one at a
+#        time with toggleCourse(). Input: the courses a student wants,
+#        constraints (allowed terms, max periods per day, required / max
+#        credits from 単位) and, for each wanted course, its most similar
+#        courses from recommendations.json as alternatives. Each wanted
+#        course is a choice between itself (score 1), one of its
+#        alternatives (score = similarity) or nothing. A depth-first
+#        branch-and-bound search over these choices keeps the top-N
+#        schedules by total score:
+#          - conflicts are one AND with the 240-bit slot bitset of the
+#            partial schedule (timetable.py), periods per day are popcounts
+#            of its 12-bit day fields;
+#          - a branch is cut when its score plus the best remaining score
+#            cannot beat the N-th schedule found so far, or when the
+#            remaining courses cannot reach the required credits.
+#        A latency budget stops the search early and returns the best
+#        schedules found so far (flagged incomplete).
+#   [JP] 履修したい授業・条件 (ターム・1日の最大コマ数・必要単位数) と、
+#        recommendations.json の似ている授業 (代わりの候補) から、重ならない時間割を
+#        分枝限定法で探し、スコアの高い順に上位 N 件を返します。重なりの判定は
+#        コマのビット列の AND、1日のコマ数はビット数で数えます。時間予算を超えたら
+#        それまでに見つかったものを返します。
+#
+# Data Flow:
+#   Input  : timetable.json (timetable.py) / recommendations.json
+#   Output : (時間割の候補 / Console Output)
+#
+# Usage:
+#   python timetable_solver.py <講義コード> [...]
+# ==========================================
+
+import heapq
+import json
+import os
+import sys
+import time
+
+from timetable import ALL_TERMS, N_PERIODS, N_TERMS, DAYS, Timetable
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+timetable_file = os.path.join(base_dir, "timetable.json")
+recommendation_file = os.path.join(base_dir, "recommendations.json")
+
+# ==========================================
+# 設定 (コマンドラインから使うときの既定値)
+# ==========================================
+ALTERNATIVES = 3            # 1授業あたりの代わりの候補数 (recommendations.json の上位)
+MIN_SIMILARITY = 0.1        # これより似ていない授業は代わりにしない
+REQUIRED_CREDITS = 0        # 必要な単位数
+MAX_PERIODS_PER_DAY = 8     # 1日 (ターム・曜日ごと) の最大コマ数
+TOP_N = 5
+BUDGET_MS = 200
+CHECK_EVERY = 256           # 何ノードごとに時間予算を確認するか
+
+DAY_FIELDS = [((1 << N_PERIODS) - 1) << (field * N_PERIODS) for field in range(N_TERMS * len(DAYS))]
+
+
+def max_periods_per_day(bits):
+    """ビット列の中で一番多くコマを使っている日 (ターム・曜日) のコマ数"""
+    return max((bits & field).bit_count() for field in DAY_FIELDS)
+
+
+class TimetableSolver:
+    def __init__(self, timetable, recommendations=None):
+        self.timetable = timetable
+        self.recommendations = recommendations or {}
+        self._bits = {}
+        self.last_stats = {}
+
+    @classmethod
+    def load(cls, timetable_path=timetable_file, recommendation_path=recommendation_file):
+        recommendations = None
+        if os.path.exists(recommendation_path):
+            with open(recommendation_path, "r", encoding="utf-8") as f:
+                recommendations = json.load(f)
+        return cls(Timetable.load(timetable_path), recommendations)
+
+    def bits(self, cid):
+        if cid not in self._bits:
+            self._bits[cid] = self.timetable.bits(cid)
+        return self._bits[cid]
+
+    def options(self, cid, alternatives=ALTERNATIVES, min_similarity=MIN_SIMILARITY):
+        """(授業ID, スコア) の候補: 本人 (1.0) + 似ている授業 (類似度) の上位"""
+        options = [(cid, 1.0)] if cid in self.timetable.index else []
+        for other, score in self.recommendations.get(cid, [])[:alternatives]:
+            if score >= min_similarity and other in self.timetable.index:
+                options.append((other, float(score)))
+        return options
+
+    def solve(self, desired, required_credits=REQUIRED_CREDITS, max_credits=None, terms=ALL_TERMS,
+              max_per_day=MAX_PERIODS_PER_DAY, alternatives=ALTERNATIVES, min_similarity=MIN_SIMILARITY,
+              fixed=(), top_n=TOP_N, budget_ms=BUDGET_MS, use_bound=True):
+        """
+        desired: 履修したい授業のID (それぞれ 本人 / 代わりの授業 / 取らない のどれか)
+        terms: 使ってよいターム (bit k = 第k+1ターム)。fixed: すでに決まっている授業 (重ねない・候補にしない。
+               時間割に無い ID があれば ValueError)
+        use_bound=False にすると上限による枝刈りをしない (ベンチマーク用)
+        戻り値: スコアの高い順の時間割のリスト
+                [{"score", "credits", "courses": [ID...], "choices": [[希望ID, 選んだID or None], ...]}, ...]
+        """
+        start = time.perf_counter()
+        deadline = start + budget_ms / 1000.0 if budget_ms is not None else None
+        entries = self.timetable.entries
+        unknown = [cid for cid in fixed if cid not in self.timetable.index]
+        if unknown:
+            raise ValueError(f"fixed に時間割に無い授業IDがあります: {', '.join(map(str, unknown))}")
+        fixed = set(fixed)
+        fixed_bits = 0
+        for cid in fixed:
+            fixed_bits |= self.bits(cid)
+        base_credits = sum(entries[cid]["u"] for cid in fixed)
+
+        # 候補ごとの条件 (ターム・固定の授業との重なり・1日のコマ数) はここで一度だけ確認する
+        # 固定の授業そのものは候補にしない (コマの無い集中講義はビットでは重ならないため)
+        groups = []
+        for position, cid in enumerate(desired):
+            options = []
+            for option, score in self.options(cid, alternatives, min_similarity):
+                if option in fixed:
+                    continue
+                bits = self.bits(option)
+                if entries[option]["tm"] & ~terms or bits & fixed_bits:
+                    continue
+                if max_per_day is not None and max_periods_per_day(bits | fixed_bits) > max_per_day:
+                    continue
+                options.append((score, option, bits, entries[option]["u"]))
+            options.sort(key=lambda o: -o[0])
+            groups.append((position, options))
+        # 候補の少ない授業から決める (早く行き詰まる方を先に)
+        groups.sort(key=lambda g: len(g[1]))
+
+        # 残りの授業で取れる最大のスコア・単位 (上限の見積もり)
+        n = len(groups)
+        best_rest = [0.0] * (n + 1)
+        credits_rest = [0.0] * (n + 1)
+        for g in range(n - 1, -1, -1):
+            options = groups[g][1]
+            best_rest[g] = best_rest[g + 1] + (options[0][0] if options else 0.0)
+            credits_rest[g] = credits_rest[g + 1] + max((o[3] for o in options), default=0.0)
+
+        heap = []       # (スコア, -見つけた順, 単位, 選択) の最小ヒープ (上位 top_n 件。同点なら先に見つけた方)
+        seen = set()    # 同じ授業の組み合わせを2回数えない
+        choice = [None] * len(desired)
+        stats = {"nodes": 0, "pruned": 0, "complete": True}
+
+        def search(g, bits, score, credits, taken):
+            stats["nodes"] += 1
+            if deadline is not None and stats["nodes"] % CHECK_EVERY == 0 and time.perf_counter() > deadline:
+                stats["complete"] = False
+                raise TimeoutError
+            full = len(heap) >= top_n
+            if use_bound and full and score + best_rest[g] <= heap[0][0]:
+                stats["pruned"] += 1
+                return
+            if credits + credits_rest[g] < required_credits:
+                stats["pruned"] += 1
+                return
+            if g == n:
+                key = frozenset(taken)
+                if not taken or key in seen:
+                    return
+                seen.add(key)
+                item = (score, -len(seen), credits, tuple(choice))
+                if not full:
+                    heapq.heappush(heap, item)
+                elif score > heap[0][0]:
+                    heapq.heapreplace(heap, item)
+                return
+            position, options = groups[g]
+            for option_score, option, option_bits, option_credits in options:
+                if option_bits & bits or option in taken:
+                    continue
+                if max_credits is not None and credits + option_credits > max_credits:
+                    continue
+                merged = bits | option_bits
+                if max_per_day is not None and max_periods_per_day(merged) > max_per_day:
+                    continue
+                choice[position] = option
+                taken.add(option)
+                search(g + 1, merged, score + option_score, credits + option_credits, taken)
+                taken.discard(option)
+            choice[position] = None
+            search(g + 1, bits, score, credits, taken)  # この授業は取らない
+
+        try:
+            search(0, fixed_bits, 0.0, base_credits, set())
+        except TimeoutError:
+            pass
+        stats["ms"] = (time.perf_counter() - start) * 1000
+        self.last_stats = stats
+
+        results = []
+        for score, _, credits, chosen in sorted(heap, reverse=True):
+            results.append({
+                "score": round(score, 6),
+                "credits": credits,
+                "courses": [cid for cid in chosen if cid is not None],
+                "choices": [[cid, option] for cid, option in zip(desired, chosen)],
+            })
+        return results
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python timetable_solver.py <講義コード> [...]")
+        return
+    solver = TimetableSolver.load()
+    desired = sys.argv[1:]
+    schedules = solver.solve(desired)
+    stats = solver.last_stats
+    print(f"{len(schedules)} schedules ({stats['nodes']} nodes, {stats['ms']:.1f} ms"
+          f"{'' if stats['complete'] else ', 時間予算で打ち切り'})")
+    for rank, schedule in enumerate(schedules, 1):
+        print(f"\n#{rank} score {schedule['score']:.3f} / {schedule['credits']:g} 単位")
+        for cid, option in schedule["choices"]:
+            note = "取らない" if option is None else ("" if option == cid else f"-> {option} (代わり)")
+            print(f"  {cid} {note}".rstrip())
+
+
+if __name__ == "__main__":
+    main()